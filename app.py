@@ -39,6 +39,12 @@ if not os.path.exists('wordlists'):
 # Global dictionary to store scan statuses
 scan_statuses = {}
 
+# Hard limit for tools other than ffuf (seconds)
+TOOL_TIMEOUT = 300
+# Sublist3r stops on its own a bit earlier and prints what it found so far,
+# so a slow scan gives partial results instead of a timeout page
+SUBLIST3R_MAX_TIME = TOOL_TIMEOUT - 30
+
 def strip_ansi_codes(text):
     """Removes ANSI escape codes from a string."""
     ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
@@ -103,7 +109,7 @@ def run_command(command, output_file_base_for_logs, tool_name, scan_folder):
             stdout, stderr = process.communicate()
         else:
             # For other tools, use 5-minute timeout
-            stdout, stderr = process.communicate(timeout=300)
+            stdout, stderr = process.communicate(timeout=TOOL_TIMEOUT)
 
         # Write stdout to its log file
         with open(stdout_path, 'w', encoding='utf-8') as f_out:
@@ -119,7 +125,7 @@ def run_command(command, output_file_base_for_logs, tool_name, scan_folder):
 
     except subprocess.TimeoutExpired:
         # Handle command timeout
-        error_message = f"Komut zaman aşımına uğradı (300 saniye)."
+        error_message = f"Komut zaman aşımına uğradı ({TOOL_TIMEOUT} saniye)."
         update_scan_status(scan_folder, tool_name, "Zaman Aşımı", error_message)
         with open(stdout_path, 'w', encoding='utf-8') as f_out:
             f_out.write(error_message)
@@ -140,7 +146,7 @@ def run_scan_tool(tool_name, target_url, scan_folder, wordlist_path=None):
         sublist3r_py_path = get_tool_path('Sublist3r/sublist3r')
         parsed_url = urlparse(target_url)
         domain_for_sublist3r = parsed_url.netloc or parsed_url.path.split('/')[0]
-        command = ['python', sublist3r_py_path, '-d', domain_for_sublist3r]
+        command = ['python', sublist3r_py_path, '-d', domain_for_sublist3r, '--max-time', str(SUBLIST3R_MAX_TIME)]
         run_command(command, os.path.join(scan_folder, "sublist3r_"), "sublist3r", scan_folder)
     
     elif tool_name == 'subdomainizer':
@@ -28,56 +28,103 @@ from itertools import repeat
 from collections import Counter
 from math import log2
 import urllib3
-import queue
-import glob
 import os
-import time
+import mmap
+import multiprocessing
+from collections import deque
 import warnings
 import colorama
-colorama.init()
-
-parse = argparse.ArgumentParser()
-parse.add_argument('-c', '--cookie', help="Cookies which needs to be sent with request. User double quotes if have more than one.")
-parse.add_argument('-cop', '--cloudop', help="Enter the file name in which you want to save results of cloud services finding.")
-parse.add_argument('-sop', '--secretop', help="Enter the file name in which you want to save results of secrets found.")
-parse.add_argument('-gop', '--gitsecretop', help="Enter the file name in which you want to save results of secrets found in github.") 
-parse.add_argument('-d', '--domains', help="Enter the top-level-domain(s) seperated with comma (no spaces after comma) to extract all the subdomain of those domains")
-parse.add_argument('-f', '--folder', help="Folder in which files needs to be scanned.")
-parse.add_argument('-g', '--gitscan', help="Give this option if you wants to search for subdomain from github", action='store_true')
-parse.add_argument('-gt', '--gittoken', help="Finding subdomains from github")
-parse.add_argument('-k', '--nossl', help="Use it when SSL certiheadsficate is not verified.", action='store_true')
-parse.add_argument('-l', '--listfile', help="List file which contain list of URLs to be scanned for subdomains")
-parse.add_argument('-o', '--output', help="Enter the file name to which you want to save the results of subdomains found.")
-parse.add_argument('-san', '--subject_alt_name', help="Get Subject Alternative Names, Options: 'all', 'same'")
-parse.add_argument('-u', '--url', help="Enter the URL in which you want to find (sub)domains.")
-
-args = parse.parse_args()
-url = args.url
-listfile = args.listfile
-cloudop = args.cloudop
-secretop = args.secretop
-gitToken = args.gittoken
-isGit = args.gitscan
-isSSL = args.nossl
-folderName = args.folder
-is_san = args.subject_alt_name
-githubsc_out = args.gitsecretop
-
-jsLinkList = list()
-jsname = list()
-finalset = set()
-new_final_dict = dict()
-secret_dict = dict()
-git_data = dict()
-cloudurlset = set()
-finallist = list()
-github_secrets = set()
-
-if args.cookie:
-    heads = {"Cookie": args.cookie,
-             "User-agent": "Mozilla/5.0 (X11; Linux x86_64; rv:60.0) Gecko/20100101 Firefox/70.0"}
-else:
-    heads = {"User-agent": "Mozilla/5.0 (X11; Linux x86_64; rv:60.0) Gecko/20100101 Firefox/70.0"}
+import hashlib
+import functools
+import threading
+import time
+
+# The DNS answer cache and the hostname set of subbrute (tools/Sublist3r), shared with Sublist3r when both tools are present.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Sublist3r'))
+try:
+    from subbrute import cache as dns_cache
+except ImportError:
+    dns_cache = None
+try:
+    from subbrute import hostset
+except ImportError:
+    hostset = None
+
+# Public Suffix List of the domain parsing:  the copy saved by update_suffix_list() (in the cache folder of subbrute,
+# or the one of tldextract), else the snapshot shipped with tldextract.  It is never fetched during a scan.
+suffix_list_name = "public_suffix_list.json"
+suffix_list_urls = ('https://publicsuffix.org/list/public_suffix_list.dat',
+                    'https://raw.githubusercontent.com/publicsuffix/list/master/public_suffix_list.dat')
+tld_extract = tldextract.TLDExtract(cache_file=(dns_cache and dns_cache.cache_path(suffix_list_name)) or tldextract.tldextract.CACHE_FILE,
+                                    suffix_list_urls=None)
+# Results of the analysis of the contents, by content hash, kept between runs (in the cache folder of subbrute).
+# Contents smaller than analysis_cache_min are analysed every time, the entries unused for analysis_ttl are removed.
+# analysis_version is part of the keys:  change it when the regexes or analyse_data() find something else.  Only the
+# cloud URLs and the secrets are kept, the subdomains depend on the domain scanned and are searched every time.
+analysis_cache_name = "analysis.sqlite"
+analysis_cache_min = 4096
+analysis_ttl = 30 * 24 * 3600
+analysis_version = b"2"
+# Javascript files of well-known libraries and third-party services, they are not fetched nor analysed (unless the
+# vendor option is set):  the files on the public CDNs of libraries, and the library files named like
+# jquery-3.6.0.min.js on any host.
+vendor_script = re.compile(r'^https?://(?:cdnjs\.cloudflare\.com|ajax\.googleapis\.com|code\.jquery\.com|cdn\.jsdelivr\.net|'
+                           r'unpkg\.com|(?:stackpath|maxcdn|netdna)\.bootstrapcdn\.com|www\.google-analytics\.com|'
+                           r'connect\.facebook\.net)/|/(?:jquery|jquery-ui|jquery-migrate|react|react-dom|angular|vue|'
+                           r'bootstrap|lodash|underscore|moment|d3|popper)(?:[.-]v?\d+(?:\.\d+)*)?'
+                           r'(?:\.(?:production|development|slim|bundle))*(?:\.min)?\.js(?:[?#].*)?$', re.IGNORECASE)
+# The contents of a page are analysed by the processes of the analysis pool when there are this many bytes to
+# analyse, in the scanning process otherwise.
+analysis_pool_min = 256 << 10
+# Registered domains and domain regexes kept in memory.
+domain_cache_size = 65536
+scheme = re.compile(r'^([a-zA-Z0-9+\-.]+:)?//')
+
+user_agent = "Mozilla/5.0 (X11; Linux x86_64; rv:60.0) Gecko/20100101 Firefox/70.0"
+# Files bigger than this are mapped in memory and scanned in parts of this size, in folder mode.
+folder_chunk = 4 << 20
+# Bytes of the next part scanned with a part, for the secrets written on several lines.
+folder_overlap = 64 << 10
+whitespace = re.compile(rb'\s')
+# Characters which are not part of a domain, a URL or a secret value, to cut the minified files (without whitespace).
+delimiter = re.compile(rb'[\s"\'`;,(){}\[\]<>]')
+# TLS connections opened at the same time, and hosts connected at most, to find Subject Alternative Names.
+san_workers = 32
+san_max_hosts = 5000
+
+
+def parse_args():
+    """
+
+    This function will parse the command line arguments.
+
+    Returns
+    --------
+    object
+        Namespace of the arguments.
+    """
+    parse = argparse.ArgumentParser()
+    parse.add_argument('-c', '--cookie', help="Cookies which needs to be sent with request. User double quotes if have more than one.")
+    parse.add_argument('-cr', '--crawl', type=int, default=0, help="Depth of the Javascript chunks to crawl (chunks referenced by the Javascript files, then by those chunks...), 0 to not crawl (default).")
+    parse.add_argument('-cb', '--crawlbytes', type=float, default=50, help="Megabytes of Javascript chunks to crawl at most, for each URL (default 50).")
+    parse.add_argument('-ct', '--crawltime', type=float, default=60, help="Seconds spent crawling Javascript chunks at most, for each URL (default 60).")
+    parse.add_argument('-psl', '--updatepsl', help="Download the Public Suffix List used to find the domains, it is not downloaded otherwise.", action='store_true')
+    parse.add_argument('-av', '--analysevendor', help="Fetch and analyse the Javascript files of well-known libraries (jQuery, React... on public CDNs) too, they are skipped otherwise.", action='store_true')
+    parse.add_argument('-nc', '--nocache', help="Analyse every content again, instead of using the results cached by the previous scans.", action='store_true')
+    parse.add_argument('-p', '--processes', type=int, help="Processes analysing the Javascript files, github code and folder files (default: number of CPUs, 1 to analyse in the main process).")
+    parse.add_argument('-cop', '--cloudop', help="Enter the file name in which you want to save results of cloud services finding.")
+    parse.add_argument('-sop', '--secretop', help="Enter the file name in which you want to save results of secrets found.")
+    parse.add_argument('-gop', '--gitsecretop', help="Enter the file name in which you want to save results of secrets found in github.") 
+    parse.add_argument('-d', '--domains', help="Enter the top-level-domain(s) seperated with comma (no spaces after comma) to extract all the subdomain of those domains")
+    parse.add_argument('-f', '--folder', help="Folder in which files needs to be scanned.")
+    parse.add_argument('-g', '--gitscan', help="Give this option if you wants to search for subdomain from github", action='store_true')
+    parse.add_argument('-gt', '--gittoken', help="Finding subdomains from github")
+    parse.add_argument('-k', '--nossl', help="Use it when SSL certiheadsficate is not verified.", action='store_true')
+    parse.add_argument('-l', '--listfile', help="List file which contain list of URLs to be scanned for subdomains")
+    parse.add_argument('-o', '--output', help="Enter the file name to which you want to save the results of subdomains found.")
+    parse.add_argument('-san', '--subject_alt_name', help="Get Subject Alternative Names, Options: 'all', 'same'")
+    parse.add_argument('-u', '--url', help="Enter the URL in which you want to find (sub)domains.")
+    return parse.parse_args()
 
 
 def argerror(urls, listfile):
@@ -118,68 +165,478 @@ def gitArgError(gitToken, isGit):
         pass
 
 
-def getRecursiveFolderData(rootfolder):
+def getRecursiveFolderFiles(rootfolder):
     """
 
-    This function will get all the files path (including filename) recursively, given root folder.
+    This function will get all the files path (including filename) recursively, given root folder.  The hidden
+    files and folders are skipped.
 
     Parameters
     ----------
     rootfolder : str
         Root folder in which all files are present.
 
+    Yields
+    ----------
+    str
+        path of a file, one at a time, while the folder is walked.
+    """
+    for folder, folders, files in os.walk(rootfolder):
+        folders[:] = sorted(name for name in folders if not name.startswith('.'))
+        for name in sorted(files):
+            if not name.startswith('.'):
+                yield os.path.join(folder, name)
+
+
+def getFolderParts(files, errors):
+    """
+
+    This function will split the files to scan in parts, the files bigger than folder_chunk in several parts.
+
+    Parameters
+    ----------
+    files : iterable
+        Paths of the files.
+    errors : str
+        'strict' to skip the files which are not text (utf-8), 'ignore' to scan them anyway.
+
+    Yields
+    ----------
+    tuple
+        path, start and end (None for the whole file) of the part, errors, and True for the last part of the file.
+    """
+    for path in files:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        if size <= folder_chunk:
+            yield path, 0, None, errors, True
+            continue
+        for start in range(0, size, folder_chunk):
+            yield path, start, start + folder_chunk, errors, start + folder_chunk >= size
+
+
+def cutAtBoundary(data, pos):
+    """
+
+    Returns the first position from pos which is the end of data or follows a whitespace, so that the parts of a file
+    never cut a cloud URL, a domain or a secret value in two.  Without whitespace in the folder_overlap bytes from pos
+    (minified files), the first position which follows a delimiter, or else pos itself:  the parts stay bounded, and what
+    is cut in two is found whole in the overlap of the part before.
+    """
+    if pos <= 0:
+        return 0
+    if pos >= len(data):
+        return len(data)
+    endpos = pos + folder_overlap
+    match = whitespace.search(data, pos - 1, endpos) or delimiter.search(data, pos - 1, endpos)
+    if match:
+        return match.end()
+    if endpos >= len(data):
+        return len(data)
+    # Not inside a UTF-8 character.
+    while pos > 0 and data[pos] & 0xc0 == 0x80:
+        pos -= 1
+    return pos
+
+
+def readFolderPart(path, start, end, errors):
+    """
+
+    This function will read a part of a file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    start : int
+        Offset of the part, moved by cutAtBoundary().
+    end : int
+        End of the part (moved by cutAtBoundary()) or None for the whole file.
+    errors : str
+        'strict' or 'ignore', like open().
+
     Returns
     ----------
-    dict
-        dict of files path and their data.
+    str
+        Content of the part, followed by folder_overlap bytes of the next part.  None if it is not text.
     int
-        total number of (only) files within the root folder.
+        Length of the part without the overlap.
     """
-    folderData = dict()
-    for filename in glob.iglob(rootfolder + '**/**', recursive=True):
-        if os.path.isfile(filename):
-            with open(filename, 'r') as file:
-                try:
-                    folderData[filename] = file.read()
-                except UnicodeDecodeError:
-                    pass
-    return folderData, len(folderData)
+    try:
+        with open(path, 'rb') as file:
+            if end is None:
+                parts = [file.read()]
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    start = cutAtBoundary(data, start)
+                    end = cutAtBoundary(data, end)
+                    parts = [data[start:end], data[end:cutAtBoundary(data, end + folder_overlap)]] if start < end else []
+        # Universal newlines, like open() in text mode.
+        parts = [part.decode('utf-8', errors).replace('\r\n', '\n').replace('\r', '\n') for part in parts]
+    except (OSError, ValueError):
+        return None, 0
+    if not parts:
+        return '', 0
+    return ''.join(parts), len(parts[0])
 
 
-def getUrlsFromFile():
+analysis_context = None
+
+
+def init_analysis_worker(domains, cache):
+    """
+
+    Initializer of the processes of the analysis pool, they build the regexes once.
+
+    Parameters
+    ----------
+    domains : str
+        Top-level-domain(s) seperated with comma, like ScanContext.
+    cache : bool
+        Look for the results in the analysis cache, like ScanContext.
+    """
+    global analysis_context
+    analysis_context = ScanContext(domains=domains, cache=cache)
+
+
+def analyse_folder_part(part, context=None):
+    """
+
+    This function will find secrets, cloud URLs and the subdomains of the custom domains in a part of a file.
+
+    Parameters
+    ----------
+    part : tuple
+        Part of a file, from getFolderParts().
+    context : ScanContext
+        Context with the regexes, the one of the process in the analysis pool if it is None.
+
+    Returns
+    ----------
+    tuple
+        path and last of the part, what analyse_data() found (None if the file is not text), and the key to save it
+        with in the analysis cache (None if it came from the cache).  The results are only saved by the process of
+        the scan.
+    """
+    context = context or analysis_context
+    path, start, end, errors, last = part
+    data, limit = readFolderPart(path, start, end, errors)
+    if data is None:
+        return path, last, None, None
+    key = analysis_key(data, limit)
+    info = cached_analysis(context, key, data, None)
+    if info is not None:
+        return path, last, info, None
+    return path, last, analyse_data(context, data, None, limit), key
+
+
+def getUrlsFromFile(listfile):
     """
 
     Getting urls from file provided in input, file contains url seperated by newline.
 
+    Parameters
+    ----------
+    listfile: str
+        Path of file which contains urls seperated by newline.
+
     Returns
     ---------
     list
         It returns list of urls from file.
     """
-    with open(args.listfile, 'rt') as f:
+    with open(listfile, 'rt') as f:
         urllst = f.readlines()
     urllst = [x.strip() for x in urllst if x != '']
     urllst = set(urllst)
     return urllst
 
 
+class AnalysisCache:
+    """
+    This class keeps the cloud URLs and the secrets analyse_data() found in the contents, by key (see analysis_key()),
+    so that the same vendor bundle is analysed once instead of on every page, every URL and every run.  The entries are saved in analysis.sqlite, in
+    the cache folder of subbrute when it is available, in memory only otherwise.
+
+    Methods
+    -------
+    get(key)
+        It will return the cloud URLs and the secrets for the key, None if the content was not analysed yet.
+    -------
+    put(key, info)
+        It will keep the cloud URLs and the secrets of what analyse_data() found, for the key.
+    -------
+    close()
+        It will save the results kept and remove the old ones.
+    """
+
+    # Writes are batched, one transaction for this many results.
+    flush_every = 64
+
+    def __init__(self, path=None, persist=True):
+        """
+
+        Parameters
+        ----------
+        path: str
+            Path of the sqlite file, analysis.sqlite in the cache folder of subbrute by default.
+        persist: bool
+            Keep the results between runs, in memory only if it is False.
+        """
+        if path is None and persist and dns_cache:
+            path = dns_cache.cache_path(analysis_cache_name)
+        self.path = path if persist else None
+        # The rows are (key, info, used): a result not used for analysis_ttl is removed on close.
+        if dns_cache:
+            self.store = dns_cache.sqlite_store(self.path,
+                                                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, info TEXT, used INTEGER)",
+                                                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                                "DELETE FROM results WHERE used <= ?",
+                                                self.flush_every, memory=True)
+        else:
+            self.store = None
+            self.results = dict()
+
+    def get(self, key):
+        if self.store is None:
+            row = self.results.get(key)
+        else:
+            row = self.store.get(key, "SELECT * FROM results WHERE key = ?", (key,))
+            if row is not None and key not in self.store.pending:
+                # Read from the database: mark it used, so that close() keeps it.
+                self.store.put(key, (key, row[1], int(time.time())))
+        if row is None:
+            return None
+        cloudurls, secrets = json.loads(row[1])
+        return set(cloudurls), secrets
+
+    def put(self, key, info):
+        cloudurls, secrets, _ = info
+        row = (key, json.dumps([sorted(cloudurls), secrets]), int(time.time()))
+        if self.store is None:
+            self.results[key] = row
+        else:
+            self.store.put(key, row)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close((int(time.time()) - analysis_ttl,))
+
+
+class ScanContext:
+    """
+    This class holds the options and the results of one scan, so that several scans can run in the same process,
+    at the same time.
+
+    Attributes
+    ----------
+    finalset: set
+        Subdomains found.
+    cloudurlset: set
+        Cloud URLs found.
+    secret_dict: dict
+        Secrets found, by file or URL they were found in.
+    github_secrets: set
+        Secrets found in github (if gitsecrets is set).
+    sans: list
+        Hostnames found in Subject Alternative Names, in the order they were found.
+    san_sources: dict
+        Host whose certificate listed each hostname of sans.
+    certificates: dict
+        Certificate of the hosts connected to find Subject Alternative Names (fingerprint, subject, sans, not_after),
+        None for the hosts which could not be connected.
+    domainSet: set
+        Domains of the URLs scanned, to search in github.
+    errors: dict
+        Error message of the URLs which could not be scanned.
+
+    Methods
+    -------
+    log(*text)
+        It will print text if the context is verbose.
+    -------
+    results()
+        It will return the results as a dict.
+    -------
+    pool()
+        It will return the pool of processes analysing the contents.
+    -------
+    close()
+        It will save the results of the analysis to the cache and stop the analysis pool.
+    """
+
+    def __init__(self, cookie=None, nossl=False, domains=None, gittoken=None, gitsecrets=False, verbose=False,
+                 crawl=0, crawlbytes=50 << 20, crawltime=60, processes=1, cache=True, vendor=False):
+        """
+
+        Parameters
+        ----------
+        cookie: str
+            Cookies which needs to be sent with request.
+        nossl: bool
+            Do not verify the SSL certificates.
+        domains: str
+            Top-level-domain(s) seperated with comma, to extract all the subdomain of those domains.
+        gittoken: str
+            AuthToken provided by github, to search in github.
+        gitsecrets: bool
+            Keep the secrets found in github in github_secrets too.
+        verbose: bool
+            Print the progress on the screen, like the command line does.
+        crawl: int
+            Depth of the Javascript chunks to crawl (chunks referenced by the Javascript files of the page, then by
+            those chunks...), 0 to only scan the Javascript files of the page.
+        crawlbytes: int
+            Bytes of chunks fetched at most, for each URL scanned.
+        crawltime: float
+            Seconds spent crawling chunks at most, for each URL scanned.
+        processes: int
+            Processes analysing the contents, 1 (the default) to analyse them in the calling thread.  A pool of
+            processes is forked from the process of the scan:  only the command line uses one by default, a
+            process running scans in threads must not fork.
+        cache: bool
+            Keep the results of the analysis of the contents between runs, to not analyse the same content again.
+        vendor: bool
+            Fetch and analyse the Javascript files of well-known libraries too (see vendor_script).
+        """
+        self.heads = {"User-agent": user_agent}
+        if cookie:
+            self.heads = {"Cookie": cookie, "User-agent": user_agent}
+        self.isSSL = nossl
+        self.gitToken = gittoken
+        self.githubsc_out = gitsecrets
+        self.verbose = verbose
+        self.crawl = crawl
+        self.crawlbytes = crawlbytes
+        self.crawltime = crawltime
+        self.domains = domains
+        self.processes = processes or 1
+        self.cache = cache
+        self.vendor = vendor
+        self.analysisCache = AnalysisCache(persist=cache)
+        self.analysisPool = None
+
+        self.compiledRegexCloud = pre_compiled_cloud_regex()
+        self.compiledRegexSecretList = pre_compiled_secret_regex()
+        self.compiledRegexIP = pre_compiled_ip_regex()
+        self.precompiled_domains_regex = custom_domains_regex(domains) if domains else None
+
+        self.finalset = set()
+        self.cloudurlset = set()
+        self.secret_dict = dict()
+        self.github_secrets = set()
+        self.sans = list()
+        self.san_sources = dict()
+        self.certificates = dict()
+        self.domainSet = set()
+        self.errors = dict()
+
+    def log(self, *text):
+        """
+
+        Prints text if the context is verbose.
+        """
+        if self.verbose:
+            print(*text)
+
+    def pool(self):
+        """
+
+        Returns
+        --------
+        Pool
+            the processes analysing the contents (started on the first call), None if processes is 1.
+        """
+        if self.analysisPool is None and self.processes > 1:
+            self.analysisPool = multiprocessing.Pool(self.processes, init_analysis_worker, (self.domains, self.cache))
+        return self.analysisPool
+
+    def close(self):
+        """
+
+        Saves the results of the analysis to the cache and stops the analysis pool, the context can still be used.
+        """
+        self.analysisCache.close()
+        if self.analysisPool is not None:
+            self.analysisPool.terminate()
+            self.analysisPool.join()
+            self.analysisPool = None
+
+    def results(self):
+        """
+
+        Returns
+        --------
+        dict
+            subdomains (sorted), cloud_urls, secrets (by file or URL), github_secrets, sans, san_sources (by SAN),
+            certificates (by host) and errors (by URL).
+        """
+        return {'subdomains': tldSorting(self.finalset),
+                'cloud_urls': sorted(self.cloudurlset),
+                'secrets': {location: list(secrets) for location, secrets in self.secret_dict.items()},
+                'github_secrets': sorted(self.github_secrets),
+                'sans': list(self.sans),
+                'san_sources': dict(self.san_sources),
+                'certificates': {host: dict(cert) if cert else None for host, cert in self.certificates.items()},
+                'errors': dict(self.errors)}
+
+
 class JsExtract:
     """
     This class contain the methods to get data from Internal (Inline) and External Javascript files (Present in <script> tag).
 
     Methods
     -------
-    IntJsExtract(url, headers)
+    FetchPage(url, headers)
+        It will fetch and decode the page once, for both of the methods below.
+    -------
+    IntJsExtract(url, headers, page = None)
         It will get the data from Inline JS present within the page.
     -------
-    ExtJsExtract(url, headers)
+    ExtJsExtract(url, headers, page = None)
         It will get JS links present within source code of the page.
     -------
     SaveExtJsContent(js = JavascriptFileURL)
-        This module will get the data from JS URL provided and add data in master list (finallist).
+        This module will get the data from JS URL provided and add it to the content (new_final_dict).
+    -------
+    FindJsLinks(url, base, content)
+        It will get the links of the Javascript chunks referenced by a Javascript content.
+    -------
+    CrawlJsChunks(url, depth, maxbytes, deadline)
+        It will fetch the chunks referenced by the Javascript files, recursively, and add them to the content.
     """
 
-    def IntJsExtract(self, url, heads):
+    # import("./chunk.js"), import x from "./module.js"
+    importreg = re.compile(r"""(?:\bimport\s*\(\s*|\bimport\s+|\bfrom\s*)["'`]([^"'`\s]+?\.m?js(?:\?[^"'`\s]*)?)["'`]""")
+    # "static/js/main.chunk.js", ["assets/index-4ed9a1.js"]
+    jsstringreg = re.compile(r"""["'`]([^"'`\s<>(){},;*\\]+?\.m?js(?:\?[^"'`\s<>]*)?)["'`]""")
+    # Chunk map of the webpack runtime:  "static/js/" + ({2: "vendors"}[e] || e) + "." + {2: "8f2c1a", 7: "d41d8c"}[e] + ".chunk.js"
+    chunkmapreg = re.compile(r"""["']([^"'\s]*)["']\s*\+\s*(?:\(\s*(\{[^{}]*\})\s*\[\s*\w+\s*\]\s*\|\|\s*\w+\s*\)|\w+)\s*\+\s*"""
+                             r"""["']([^"'\s]*)["']\s*\+\s*(\{[^{}]*\})\s*\[\s*\w+\s*\]\s*\+\s*["']([^"'\s]*\.m?js)["']""")
+    chunkpairreg = re.compile(r"""["']?([\w\-./@~]+)["']?\s*:\s*["']([^"']*)["']""")
+    # Public path of the webpack runtime:  n.p = "/"
+    publicpathreg = re.compile(r"""\.p\s*=\s*["']([^"'\s]*)["']""")
+    # Chunks waiting to be fetched at most, at each depth.
+    crawl_frontier = 1000
+
+    def __init__(self, context):
+        """
+
+        Parameters
+        ----------
+        context: ScanContext
+            Context of the scan.
+        """
+        self.context = context
+        self.jsLinkList = list()
+        self.new_final_dict = dict()
+        self.crawlLock = threading.Lock()
+        self.crawlBytes = 0
+        self.crawlDeadline = None
+
+    def FetchPage(self, url, heads):
         """
 
         Parameters
@@ -190,41 +647,25 @@ class JsExtract:
         heads : dict
             Headers needed to make request, given URL.
 
-        Raises
+        Returns
         ----------
-        UnicodeDecodeError
-            Raise an error if the endcoding found in the page is unkown.
+        tuple
+            The response, and its content decoded with 'unicode-escape' and unquoted (None if the encoding is unknown).
         """
 
-        if url.startswith('http://') or url.startswith('https://'):
-            if isSSL:
-                req = requests.get(url, headers=heads, verify=False, timeout=(20, 20))
-            else:
-                req = requests.get(url, headers=heads, timeout=(20, 20))
+        if not (url.startswith('http://') or url.startswith('https://')):
+            url = 'http://' + url
+        if self.context.isSSL:
+            req = requests.get(url, headers=heads, verify=False, timeout=(20, 20))
         else:
-            if isSSL:
-                req = requests.get('http://' + url, headers=heads, verify=False, timeout=(20, 20))
-            else:
-                req = requests.get('http://' + url, headers=heads, timeout=(20, 20))
-
-        print(termcolor.colored("Searching for Inline Javascripts...", color='yellow', attrs=['bold']))
-
+            req = requests.get(url, headers=heads, timeout=(20, 20))
         try:
             html = unquote(req.content.decode('unicode-escape'))
-            minhtml = htmlmin.minify(html, remove_empty_space=True)
-            minhtml = minhtml.replace('\n', '')
-            finallist.append(minhtml)
-            new_final_dict["Inline"] = minhtml
-            print(termcolor.colored("Successfully got all the Inline Scripts.", color='blue', attrs=['bold']))
         except UnicodeDecodeError:
-            try:
-                html = str(req.content)
-                new_final_dict["Inline"] = unquote(html)
-            except:
-                print("Error, Exiting...")
-                sys.exit(1)
+            html = None
+        return req, html
 
-    def ExtJsExtract(self, url, heads):
+    def IntJsExtract(self, url, heads, page=None):
         """
 
         Parameters
@@ -234,38 +675,55 @@ class JsExtract:
             Note: This is the url of the page given as user input.
         heads : dict
             Headers needed to make request, given URL.
+        page : tuple
+            The page from FetchPage(), it is fetched if not given.
+        """
+
+        if page is None:
+            page = self.FetchPage(url, heads)
+        req, html = page
+
+        self.context.log(termcolor.colored("Searching for Inline Javascripts...", color='yellow', attrs=['bold']))
+
+        if html is not None:
+            minhtml = htmlmin.minify(html, remove_empty_space=True)
+            minhtml = minhtml.replace('\n', '')
+            self.new_final_dict["Inline"] = minhtml
+            self.context.log(termcolor.colored("Successfully got all the Inline Scripts.", color='blue', attrs=['bold']))
+        else:
+            self.new_final_dict["Inline"] = unquote(str(req.content))
 
-        Raises
+    def ExtJsExtract(self, url, heads, page=None):
+        """
+
+        Parameters
         ----------
-        UnicodeDecodeError
-            Raise an error if the endcoding found in the page is unkown.
+        url : str
+            URL of the page from which data needs to be extracted.
+            Note: This is the url of the page given as user input.
+        heads : dict
+            Headers needed to make request, given URL.
+        page : tuple
+            The page from FetchPage(), it is fetched if not given.
         """
         # domain = urlparse(url).netloc
 
-        print(termcolor.colored(
+        self.context.log(termcolor.colored(
             "Searching for External Javascript links in page...", color='yellow', attrs=['bold']))
-        if url.startswith('http://') or url.startswith('https://'):
-            if isSSL:
-                req = requests.get(url, headers=heads, verify=False, timeout=(20,20))
-            else:
-                req = requests.get(url, headers=heads, timeout=(20, 20))
-        else:
-            if isSSL:
-                req = requests.get('http://' + url, headers=heads, verify=False, timeout=(20, 20))
-            else:
-                req = requests.get('http://' + url, headers=heads, timeout=(20, 20))
-        try:
-            if 'text/html' in req.headers.get('content-type', 'None'):
-                html = unquote(req.content.decode('unicode-escape'))
-                soup = BeautifulSoup(html, features='html.parser')
-
-                for link in soup.find_all('script'):
-                    if link.get('src'):
-                        text = urljoin(url, link.get('src'))
-                        jsLinkList.append(text)
-                print(termcolor.colored("Successfully got all the external js links.", color='blue', attrs=['bold']))
-        except UnicodeDecodeError:
-            print("Decoding error.")
+        if page is None:
+            page = self.FetchPage(url, heads)
+        req, html = page
+        if 'text/html' in req.headers.get('content-type', 'None'):
+            if html is None:
+                self.context.log("Decoding error.")
+                return
+            soup = BeautifulSoup(html, features='html.parser')
+
+            for link in soup.find_all('script'):
+                if link.get('src'):
+                    text = urljoin(url, link.get('src'))
+                    self.jsLinkList.append(text)
+            self.context.log(termcolor.colored("Successfully got all the external js links.", color='blue', attrs=['bold']))
 
     def SaveExtJsContent(self, js):
         """
@@ -275,18 +733,139 @@ class JsExtract:
         js : str
             Link to the URL of external Javascript file.
         """
+        if not self.context.vendor and vendor_script.search(js):
+            self.context.log("Skipping the library " + js)
+            return
         try:
-            if isSSL:
-                content = unquote(requests.get(js, verify=False, headers=heads, timeout=(20, 20)).content.decode('utf-8'))
-                finallist.append(content)
-                new_final_dict[str(js)] = content
+            if self.context.isSSL:
+                content = unquote(requests.get(js, verify=False, headers=self.context.heads, timeout=(20, 20)).content.decode('utf-8'))
+                self.new_final_dict[str(js)] = content
             else:
-                content = unquote(requests.get(js, headers=heads, timeout=(20, 20)).content.decode('utf-8'))
-                finallist.append(content)
-                new_final_dict[str(js)] = content
+                content = unquote(requests.get(js, headers=self.context.heads, timeout=(20, 20)).content.decode('utf-8'))
+                self.new_final_dict[str(js)] = content
         except:
             pass
 
+    def FindJsLinks(self, url, base, content):
+        """
+
+        Parameters
+        ----------
+        url : str
+            URL of the page given as user input, the chunks of the webpack runtime are relative to it.
+        base : str
+            URL of the Javascript content, the imported modules are relative to it.
+        content : str
+            Javascript content.
+
+        Returns
+        ----------
+        list
+            Absolute URLs of the Javascript chunks referenced by the content.
+        """
+        links = list()
+        for path in self.importreg.findall(content):
+            links.append(urljoin(base, path))
+        publicpath = self.publicpathreg.search(content)
+        root = urljoin(url, publicpath.group(1)) if publicpath else url
+        for prefix, names, separator, hashes, suffix in self.chunkmapreg.findall(content):
+            names = dict(self.chunkpairreg.findall(names)) if names else dict()
+            for chunk, chunkhash in self.chunkpairreg.findall(hashes):
+                links.append(urljoin(root, prefix + names.get(chunk, chunk) + separator + chunkhash + suffix))
+        for path in self.jsstringreg.findall(content):
+            if path.startswith('./') or path.startswith('../'):
+                links.append(urljoin(base, path))
+            else:
+                links.append(urljoin(root, path))
+        return [link.split('#')[0] for link in links if link.startswith('http://') or link.startswith('https://')]
+
+    def FetchJsChunk(self, link):
+        """
+
+        Parameters
+        ----------
+        link : str
+            URL of the Javascript chunk.
+
+        Returns
+        ----------
+        str
+            Content of the chunk, cut at the byte budget of the crawl, None if it could not be fetched or is not Javascript.
+        """
+        timeout = min(20, self.crawlDeadline - time.time())
+        if timeout <= 0:
+            return None
+        try:
+            with requests.get(link, headers=self.context.heads, verify=not self.context.isSSL, timeout=(timeout, timeout),
+                              stream=True) as req:
+                # Single page apps answer their index page for any path.
+                if req.status_code != 200 or 'text/html' in req.headers.get('content-type', ''):
+                    return None
+                data = list()
+                for block in req.iter_content(65536):
+                    with self.crawlLock:
+                        left = self.context.crawlbytes - self.crawlBytes
+                        block = block[:max(left, 0)]
+                        self.crawlBytes += len(block)
+                    if block:
+                        data.append(block)
+                    if len(block) == 0 or time.time() > self.crawlDeadline:
+                        break
+            return unquote(b''.join(data).decode('utf-8', errors='ignore')) if data else None
+        except requests.exceptions.RequestException:
+            return None
+
+    def CrawlJsChunks(self, url, depth, deadline):
+        """
+
+        Fetches the chunks referenced by the content (new_final_dict) concurrently, depth by depth, and adds them to it.
+        The chunks are only fetched from the hosts of the page and its Javascript files, once by URL, and a chunk
+        with the same content as another one is skipped.
+
+        Parameters
+        ----------
+        url : str
+            URL of the page from which data needs to be extracted.
+        depth : int
+            Chunks are followed this many times at most.
+        deadline : float
+            time.time() after which no chunk is fetched.
+        """
+        self.crawlDeadline = deadline
+        hosts = set(urlparse(link).netloc for link in [url] + self.jsLinkList)
+        seen = set(self.jsLinkList)
+        seen.add(url)
+        hashes = set(hashlib.sha1(content.encode('utf-8', errors='ignore')).digest() for content in self.new_final_dict.values())
+        frontier = [(url if name == "Inline" else name, content) for name, content in self.new_final_dict.items()]
+
+        for level in range(depth):
+            links = list()
+            for base, content in frontier:
+                for link in self.FindJsLinks(url, base, content):
+                    if link not in seen and urlparse(link).netloc in hosts and (self.context.vendor or not vendor_script.search(link)):
+                        seen.add(link)
+                        links.append(link)
+            links = links[:self.crawl_frontier]
+            if not links or time.time() > deadline or self.crawlBytes >= self.context.crawlbytes:
+                break
+            self.context.log(termcolor.colored("Crawling " + str(len(links)) + " Javascript chunks (depth " + str(level + 1) + ")...",
+                                               color='yellow', attrs=['bold']))
+            crawlthread = ThreadPool(8)
+            contents = crawlthread.map(self.FetchJsChunk, links)
+            crawlthread.close()
+            crawlthread.join()
+
+            frontier = list()
+            for link, content in zip(links, contents):
+                if content is None:
+                    continue
+                digest = hashlib.sha1(content.encode('utf-8', errors='ignore')).digest()
+                if digest in hashes:
+                    continue
+                hashes.add(digest)
+                self.new_final_dict[link] = content
+                frontier.append((link, content))
+
 
 def logo():
     """
@@ -328,6 +907,55 @@ def entropy(s):
     return -sum(i / len(s) * log2(i / len(s)) for i in Counter(s).values())
 
 
+def update_suffix_list(timeout=10):
+    """
+
+    This function will download the Public Suffix List and save it for the next scans.
+
+    Parameters
+    -------
+    timeout: float
+        Timeout of the download, in seconds.
+
+    Returns
+    --------
+    int
+        number of suffixes saved, 0 if the list could not be downloaded (the saved list is kept).
+    """
+    global tld_extract
+    temp = tld_extract.cache_file + '.tmp'
+    updater = tldextract.TLDExtract(cache_file=temp, suffix_list_urls=suffix_list_urls, fallback_to_snapshot=False,
+                                    cache_fetch_timeout=timeout)
+    try:
+        updater.update(fetch_now=True)
+        os.replace(temp, tld_extract.cache_file)
+    except Exception:
+        return 0
+    tld_extract = tldextract.TLDExtract(cache_file=tld_extract.cache_file, suffix_list_urls=None)
+    registered_domain.cache_clear()
+    compiled_domain_regex.cache_clear()
+    return len(updater.tlds)
+
+
+@functools.lru_cache(maxsize=domain_cache_size)
+def registered_domain(hostname):
+    """
+
+    This function will get the registered domain of a hostname, like tldextract.extract() but offline and memoized.
+
+    Parameters
+    -------
+    hostname: str
+        Hostname (without scheme, port or path).
+
+    Returns
+    --------
+    str
+        registered domain, '' for an IP address or a hostname under no known suffix.
+    """
+    return tld_extract(hostname).registered_domain
+
+
 def getDomain(url):
     """
 
@@ -343,14 +971,54 @@ def getDomain(url):
     str
         top level domain will be returned.
     """
-    if urlparse(url).netloc != '':
-        finalset.add(urlparse(url).netloc)
-    ext = tldextract.extract(str(url))
-    return ext.registered_domain
+    # The host, like tldextract does, so the memoized lookups are by host instead of by URL.
+    host = scheme.sub('', str(url)).partition('/')[0].partition('?')[0].partition('#')[0].split('@')[-1]
+    return registered_domain(host.partition(':')[0].strip().rstrip('.'))
 
 
 def tldExt(name):
-    return tldextract.extract(name).registered_domain
+    return getDomain(name)
+
+
+def resolve_host(hostname, answers):
+    """
+
+    This function will resolve the hostname, using the shared DNS answer cache when it is available.
+
+    Parameters
+    -------
+    hostname: str
+        Hostname to resolve.
+    answers: answer_cache
+        DNS answer cache of subbrute, or None.
+
+    Returns
+    --------
+    str
+        IP address of the hostname, or None if the hostname does not exist.
+    """
+    if answers is not None:
+        addresses = answers.get(hostname, 'A')
+        if addresses:
+            return addresses[0]
+        # No A records may only mean an IPv6 only host, getaddrinfo() finds its address.
+        if answers.nxdomain(hostname):
+            return None
+    try:
+        infos = socket.getaddrinfo(hostname, 443, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        if answers is not None and e.errno == socket.EAI_NONAME:
+            answers.put_nxdomain(hostname)
+        return None
+    ipv4 = [sockaddr[0] for family, _, _, _, sockaddr in infos if family == socket.AF_INET]
+    if ipv4:
+        # The address cached is the one returned, so later calls connect to the same one.
+        if answers is not None:
+            answers.put(hostname, 'A', ipv4)
+        return ipv4[0]
+    if answers is not None:
+        answers.put_nodata(hostname, 'A')
+    return infos[0][4][0]
 
 
 def tldSorting(subdomainList):
@@ -369,6 +1037,10 @@ def tldSorting(subdomainList):
         a list of subdomains.
     """
 
+    if hostset:
+        # Sorted keys of the reversed labels instead of reversing every name twice around a sort.
+        return hostset.sorted_hostnames(subdomainList)
+
     localsortedlist = list()
     finallist = list()
     for item in subdomainList:
@@ -384,15 +1056,157 @@ def tldSorting(subdomainList):
     return finallist
 
 
+class AnchorMatcher:
+    """
+    This class finds the literal anchors (lowercase strings) which every match of some regex objects contains, so that
+    the regex objects only run around them instead of over the whole content.
+
+    Methods
+    -------
+    hits(data)
+        It will return the sorted (position, anchor index) of every anchor in data.
+    -------
+    runstart(data, pos, chars)
+        It will return the start of the characters matched by chars that end at pos.
+    """
+
+    # The only characters which match an ASCII letter when the case is ignored, but are not one once lowered.
+    folded_chars = re.compile('[\u0130\u0131\u017f\u212a]')
+
+    def __init__(self, anchors):
+        """
+
+        Parameters
+        ----------
+        anchors: list
+            List of the anchors, lowercase literals.
+        """
+        self.anchors = list()
+        for anchor in anchors:
+            if anchor not in self.anchors:
+                self.anchors.append(anchor)
+        # A lookahead so that overlapping anchors are all found.
+        self.anchorreg = re.compile('(?=(?:' + '|'.join('(' + re.escape(anchor) + ')' for anchor in self.anchors) + '))',
+                                    re.IGNORECASE)
+
+    def hits(self, data):
+        """
+
+        Returns the sorted (position, anchor index) of every anchor in data, overlapping ones included.
+        """
+        lowered = data.lower()
+        if len(lowered) != len(data) or self.folded_chars.search(data):
+            return [(match.start(), match.lastindex - 1) for match in self.anchorreg.finditer(data)]
+        # str.find() is much faster than the regex, once per anchor.
+        found = list()
+        for index, anchor in enumerate(self.anchors):
+            pos = lowered.find(anchor)
+            while pos != -1:
+                found.append((pos, index))
+                pos = lowered.find(anchor, pos + 1)
+        found.sort()
+        return found
+
+    @staticmethod
+    def runstart(data, pos, chars):
+        """
+
+        Returns the start of the characters matched by chars (a regex object like [...]*) that end at pos.
+        """
+        step = 64
+        while pos > 0:
+            start = max(0, pos - step)
+            size = chars.match(data[start:pos][::-1]).end()
+            if size < pos - start:
+                return pos - size
+            pos = start
+            step *= 2
+        return 0
+
+
+class SecretMatcher(AnchorMatcher):
+    """
+    This class finds the secrets (key = value pairs whose key contains a keyword) in linear time.
+
+    The keywords are found first, and a key = value regex only runs once at the start of each word which contains
+    a keyword, instead of a regex which tries every keyword at every character of the content.
+
+    Methods
+    -------
+    finditer(data)
+        It will yield the regex match objects of the secrets found in data, group(2) is the value.
+    """
+
+    word_chars = re.compile(r'[\w\-]*')
+
+    def __init__(self, keywords, equal, blacklist):
+        """
+
+        Parameters
+        ----------
+        keywords: list
+            List of the keyword regex strings, like 'secret[_-]?key'.
+        equal: list
+            List of the operators between a key and its value.
+        blacklist: list
+            List of the regex strings a value must not start with, like 'this.'.
+        """
+        self.keywords = sorted(keywords)
+        # A keyword starts with its anchor, the letters before the first special character.
+        AnchorMatcher.__init__(self, [re.split(r'[\[(?]', keyword)[0].lower() for keyword in self.keywords])
+        self.keywordreg = re.compile('(?:' + '|'.join(self.keywords) + ')', re.IGNORECASE)
+        pair = r'[\s]*["\']?[\s]*(?:' + '|'.join(equal) + r')[\s]*["\']?((?!' + '|'.join(sorted(blacklist)) + \
+               r')[\w\-/~!@#$%^*+.]+=*)["\']?)'
+        # The same matches as the key = value regex, as long as the word of the key contains a keyword.
+        self.pairreg = re.compile(r'(["\']?[\w\-]+' + pair, re.MULTILINE | re.IGNORECASE)
+        self.regex = re.compile(r'(["\']?[\w\-]*(?:' + '|'.join(self.keywords) + r')[\w\-]*' + pair,
+                                re.MULTILINE | re.IGNORECASE)
+
+    def finditer(self, data):
+        """
+
+        Parameters
+        ----------
+        data: str
+            Content in which secrets are searched.
+
+        Returns
+        --------
+        iterator
+            the match objects of the secrets found, the same ones as regex.finditer(data).
+        """
+        end = 0
+        wordend = -1
+        for pos, _ in self.hits(data):
+            if pos < end:
+                continue
+            if pos >= wordend:
+                wordstart = self.runstart(data, pos, self.word_chars)
+                wordend = self.word_chars.match(data, pos).end()
+                tried = False
+            if tried or not self.keywordreg.match(data, pos):
+                continue
+            # The key of a match starting anywhere in the word is the rest of the word, the same
+            # value follows it:  only the leftmost start is tried,  once per word.
+            tried = True
+            start = max(wordstart, end)
+            if start - 1 >= end and data[start - 1] in '"\'':
+                start -= 1
+            match = self.pairreg.match(data, start)
+            if match:
+                end = match.end()
+                yield match
+
+
 def pre_compiled_secret_regex():
     """
 
-    This function will create list of precompiled regex object to find secret (high entropy strings) within the content.
+    This function will create the matcher to find secret (high entropy strings) within the content.
 
     Returns
     --------
-    list
-        a list of precompiled regex objects.
+    SecretMatcher
+        a SecretMatcher object, its finditer() yields the regex match objects.
     """
     seclst = set(['secret', 'secret[_-]?key', 'token', 'secret[_-]?token', 'password',
               'aws[_-]?access[_-]?key[_-]?id', 'aws[_-]?secret[_-]?access[_-]?key', 'auth[-_]?token', 'access[-_]?token',
@@ -405,21 +1219,96 @@ def pre_compiled_secret_regex():
     equal = ['=', ':', '=>', '=:', '==']
 
     blacklist_secrets = set(['proptypes.', 'process.', 'this.', 'config.', 'key.'])
-    regex = r'(["\']?[\\w\-]*(?:' + '|'.join(seclst) + ')[\\w\\-]*[\\s]*["\']?[\\s]*(?:' + '|'.join(
-        equal) + ')[\\s]*["\']?((?!.*'+ '|'.join(blacklist_secrets) +'.*)[\\w\\-/~!@#$%^*+.]+=*)["\']?)'
 
-    return re.compile(regex, re.MULTILINE | re.IGNORECASE)
+    return SecretMatcher(seclst, equal, blacklist_secrets)
+
+
+class CloudMatcher(AnchorMatcher):
+    """
+    This class finds the cloud URLs of all the providers in one pass over the content.
+
+    Every cloud regex contains a literal anchor (amazonaws.com, googleapis, blob.core.windows.net...).
+    The anchors are found first, with str.find() on the lowered content, and the cloud regexes only run on the
+    URL-like text around each anchor, instead of 17 full scans of the content that
+    try a match at every character.
+
+    Methods
+    -------
+    findall(data)
+        It will return the cloud URLs found in data, the same ones as findall() of every regex.
+    """
+
+    # A match can have one non-URL character (an unescaped '.' of the regexes) right before
+    # its anchor or before its s3 part, and up to 9 characters like '.live.com' after it.
+    lead = 2
+    trail = 9
+    url_chars = re.compile(r'[\w\-./]*')
+
+    def __init__(self, patterns):
+        """
+
+        Parameters
+        ----------
+        patterns: list
+            List of (anchor, precompiled regex object) tuples, the anchor is a lowercase literal every match of the regex contains.
+        """
+        self.patterns = [regex for anchor, regex in patterns]
+        AnchorMatcher.__init__(self, [anchor for anchor, regex in patterns])
+        self.byanchor = [[regex for _anchor, regex in patterns if _anchor == anchor] for anchor in self.anchors]
+
+    def windows(self, data):
+        """
+
+        Yields the (start, end, anchors) parts of data which may contain a match, the overlapping parts merged.
+        """
+        start = end = -1
+        found = set()
+        for pos, anchor in self.hits(data):
+            right = self.url_chars.match(data, min(len(data), pos + len(self.anchors[anchor]) + self.trail)).end()
+            if pos >= end:
+                left = pos
+                for _ in range(self.lead):
+                    left = self.runstart(data, max(0, left - 1), self.url_chars)
+                if left > end:
+                    if found:
+                        yield start, end, found
+                    start, found = left, set()
+            end = max(end, right)
+            found.add(anchor)
+        if found:
+            yield start, end, found
+
+    def findall(self, data):
+        """
+
+        Parameters
+        ----------
+        data: str
+            Content in which cloud URLs are searched.
+
+        Returns
+        --------
+        list
+            a list of cloud URLs found.
+        """
+        items = list()
+        for start, end, found in self.windows(data):
+            window = data[start:end]
+            for anchor in sorted(found):
+                for regex in self.byanchor[anchor]:
+                    items.extend(regex.findall(window))
+        return items
 
 
 def pre_compiled_cloud_regex():
     """
 
-    This will create list of precompiled regex object to find cloud URLs within the content.
+    This will create the matcher of the precompiled regex objects to find cloud URLs within the content.
 
     Returns
     --------
-    list
-        a list of precompiled regex objects.
+    CloudMatcher
+        a CloudMatcher of the precompiled regex objects.
     """
     cfreg = re.compile(r'([\w]+\.cloudfront\.net)', re.MULTILINE | re.IGNORECASE)
     gbureg = re.compile(r'([\w\-.]+\.appspot\.com)', re.MULTILINE | re.IGNORECASE)
@@ -439,10 +1328,14 @@ def pre_compiled_cloud_regex():
     dreamhostreg2 = re.compile(r'([\w\-.]*\.?objects-us-west-1.dream.io/?[\w\-.]*)', re.MULTILINE | re.IGNORECASE)
     firebase = re.compile(r'([\w\-.]+\.firebaseio\.com)', re.MULTILINE | re.IGNORECASE)
 
-    cloudlist = [cfreg, s3bucketreg, doreg, gsreg1, gsreg2, gsreg3, gsreg4, gsreg5,
-                 azureg1, azureg2, azureg3, rackcdnreg, dreamhostreg1, dreamhostreg2, firebase, gbureg, s3bucketreg2]
+    cloudlist = [('cloudfront.net', cfreg), ('amazonaws.com', s3bucketreg), ('digitaloceanspaces.com', doreg),
+                 ('storage.cloud.google.com', gsreg1), ('googleapis', gsreg2), ('googleapis', gsreg3),
+                 ('googleapis', gsreg4), ('googleapis', gsreg5), ('1drv.com', azureg1), ('onedrive', azureg2),
+                 ('blob.core.windows.net', azureg3), ('rackcdn', rackcdnreg), ('objects.cdn.dream.io', dreamhostreg1),
+                 ('objects-us-west-1', dreamhostreg2), ('firebaseio.com', firebase), ('appspot.com', gbureg),
+                 ('amazonaws.com', s3bucketreg2)]
 
-    return cloudlist
+    return CloudMatcher(cloudlist)
 
 
 def pre_compiled_domain_regex(url):
@@ -455,8 +1348,16 @@ def pre_compiled_domain_regex(url):
     url: str
         Original URL from user provided input (URL argument).
     """
-    regex = re.compile(r'([a-zA-Z0-9][a-zA-Z0-9\-.]*[a-zA-Z0-9]\.' + str(getDomain(str(url))) + ')', re.IGNORECASE)
-    return regex
+    return compiled_domain_regex(str(getDomain(str(url))))
+
+
+@functools.lru_cache(maxsize=1024)
+def compiled_domain_regex(domain):
+    """
+
+    Precompiled regex to find the subdomains of a domain, compiled once for each domain.
+    """
+    return re.compile(r'([a-zA-Z0-9][a-zA-Z0-9\-.]*[a-zA-Z0-9]\.' + domain + ')', re.IGNORECASE)
 
 
 def pre_compiled_ip_regex():
@@ -474,53 +1375,240 @@ def pre_compiled_ip_regex():
     return ipv4reg
 
 
-def get_info_from_data(item_url, item_values, cloudlist, p, regex, ipv4reg, url, precompiled_domains_regex):
+def analyse_data(context, item_values, regex, limit=None):
     """
 
-    This function is used to call other functions to find secrets, cloud URLs etc.
+    This function is used to find secrets, cloud URLs and subdomains in a content, without changing the context.
 
     Parameters
     --------
-    file: list
-        List contains all the content from different source to find secrets, cloud URLs etc.
-    cloudlist: object
-        Precompiled regex object to find cloud URLs.
-    p: object
-        Precompiled regex object to find secret (high entropy strings) from content in the list.
+    context: ScanContext
+        Context of the scan, with the regexes.
+    item_values: str
+        Content in which secrets, cloud URLs etc. are searched.
     regex: object
-        Precompiled regex object to find subdomains for a given domain.
-    ipv4reg: object
-        Precompiled regex object to find IP version 4 addresses within content.
-    url: str
-        Original URL from user provided input (URL argument).
+        Precompiled regex object to find subdomains for a given domain, or None.
+    limit: int
+        The secrets starting from this position are left out (they are found in the next part of a file).
+
+    Returns
+    --------
+    tuple
+        set of cloud URLs, list of secrets and set of subdomains.
     """
     item_values = str(item_values).replace('\n', ' ')
 
     # cloud services
-    for x in cloudlist:
-        for item in x.findall(str(item_values)):
-            cloudurlset.add(item)
+    cloudurls = set(context.compiledRegexCloud.findall(item_values))
 
-    matches = p.finditer(str(item_values))
+    secrets = list()
+    matches = context.compiledRegexSecretList.finditer(item_values)
     for _, match in enumerate(matches):
+        if limit is not None and match.start() >= limit:
+            break
         if entropy(match.group(2)) > 3:
-            if item_url in secret_dict:
-                secret_dict[item_url].append(str(match.group()))
-                if githubsc_out and item_url.startswith("https://github.com"):
-                    github_secrets.add(str(match.group())) # adding github secrets explicitly to save in file
-            else:
-                secret_dict[item_url] = [str(match.group())]
-                if githubsc_out and item_url.startswith("https://github.com"):
-                    github_secrets.add(str(match.group())) # adding github secrets explicitly
+            secrets.append(str(match.group()))
+
+    return cloudurls, secrets, find_subdomains(context, item_values, regex)
+
+
+def find_subdomains(context, item_values, regex):
+    """
 
-    # for subdomains
-    for subdomain in regex.findall(str(item_values)):
-        finalset.add(subdomain.lower())
+    This function is used to find the subdomains of the domain scanned and of the custom domains in a content.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, with the regexes.
+    item_values: str
+        Content in which subdomains are searched, without newlines.
+    regex: object
+        Precompiled regex object to find subdomains for a given domain, or None.
+
+    Returns
+    --------
+    set
+        Subdomains found.
+    """
+    subdomains = set()
+    if regex:
+        for subdomain in regex.findall(item_values):
+            subdomains.add(subdomain.lower())
 
     # given custom domains regex
-    if precompiled_domains_regex:
-        for subdomain in precompiled_domains_regex.findall(str(item_values)):
-            finalset.add(subdomain)
+    if context.precompiled_domains_regex:
+        subdomains.update(context.precompiled_domains_regex.findall(item_values))
+    return subdomains
+
+
+def cached_analysis(context, key, item_values, regex):
+    """
+
+    This function returns what analyse_data() finds in a content, with the cloud URLs and the secrets from the
+    analysis cache:  only the subdomains are searched.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, with the regexes and the analysis cache.
+    key: str
+        Key of the content, from analysis_key() (None if it is not cached).
+    item_values: str
+        Content in which subdomains are searched.
+    regex: object
+        Precompiled regex object to find subdomains for a given domain, or None.
+
+    Returns
+    --------
+    tuple
+        set of cloud URLs, list of secrets and set of subdomains, None if the content is not in the cache.
+    """
+    found = context.analysisCache.get(key) if key else None
+    if found is None:
+        return None
+    cloudurls, secrets = found
+    return cloudurls, secrets, find_subdomains(context, item_values.replace('\n', ' '), regex)
+
+
+def merge_info(context, item_url, info):
+    """
+
+    This function adds what analyse_data() found in a content to the results of the context.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, the results are added to it.
+    item_url: str
+        URL or path of the content.
+    info: tuple
+        Result of analyse_data().
+    """
+    cloudurls, secrets, subdomains = info
+    context.cloudurlset.update(cloudurls)
+    for secret in secrets:
+        if item_url in context.secret_dict:
+            context.secret_dict[item_url].append(secret)
+        else:
+            context.secret_dict[item_url] = [secret]
+        if context.githubsc_out and item_url.startswith("https://github.com"):
+            context.github_secrets.add(secret) # adding github secrets explicitly to save in file
+    context.finalset.update(subdomains)
+
+
+def get_info_from_data(context, item_url, item_values, regex):
+    """
+
+    This function is used to call other functions to find secrets, cloud URLs etc.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, the results are added to it.
+    item_url: str
+        URL or path of the content.
+    item_values: str
+        Content in which secrets, cloud URLs etc. are searched.
+    regex: object
+        Precompiled regex object to find subdomains for a given domain, or None.
+    """
+    item_values = str(item_values)
+    key = analysis_key(item_values)
+    info = cached_analysis(context, key, item_values, regex)
+    if info is None:
+        info = analyse_data(context, item_values, regex)
+        if key:
+            context.analysisCache.put(key, info)
+    merge_info(context, item_url, info)
+
+
+def analyse_contents(context, contents, regex):
+    """
+
+    This function is used to find secrets, cloud URLs and subdomains in several contents, by the processes of the
+    analysis pool when there is enough to analyse, and to add them to the results in the order of contents.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, the results are added to it.
+    contents: dict
+        Contents by URL or path.
+    regex: object
+        Precompiled regex object to find subdomains for a given domain, or None.
+    """
+    infos = dict()
+    missing = list()
+    for item_url, item_values in contents.items():
+        item_values = str(item_values)
+        key = analysis_key(item_values)
+        info = cached_analysis(context, key, item_values, regex)
+        if info is None:
+            missing.append((item_url, item_values, key))
+        else:
+            infos[item_url] = info
+
+    pool = context.pool() if sum(len(item_values) for _, item_values, _ in missing) >= analysis_pool_min else None
+    if pool is not None:
+        pattern = (regex.pattern, regex.flags) if regex else None
+        found = pool.imap(analyse_content, [(item_values, pattern) for _, item_values, _ in missing])
+    else:
+        found = (analyse_data(context, item_values, regex) for _, item_values, _ in missing)
+    for (item_url, _, key), info in zip(missing, found):
+        if key:
+            context.analysisCache.put(key, info)
+        infos[item_url] = info
+
+    for item_url in contents:
+        merge_info(context, item_url, infos[item_url])
+
+
+def analyse_content(item):
+    """
+
+    This function runs analyse_data() in a process of the analysis pool.
+
+    Parameters
+    --------
+    item: tuple
+        Content, and pattern and flags of the regex to find subdomains for a given domain (or None).
+
+    Returns
+    --------
+    tuple
+        What analyse_data() found.
+    """
+    item_values, pattern = item
+    regex = re.compile(*pattern) if pattern else None
+    return analyse_data(analysis_context, item_values, regex)
+
+
+def analysis_key(item_values, limit=None):
+    """
+
+    This function returns the key of the cloud URLs and the secrets found in a content, in the analysis cache.  It
+    does not depend on the domain scanned, the same content has the same key for every URL and every domain.
+
+    Parameters
+    --------
+    item_values: str
+        Content in which secrets, cloud URLs etc. are searched.
+    limit: int
+        Like analyse_data().
+
+    Returns
+    --------
+    str
+        hash of the content, None if the content is too small to be cached.
+    """
+    if len(item_values) < analysis_cache_min:
+        return None
+    key = hashlib.sha256(analysis_version)
+    key.update(b'\0' + str(limit).encode('ascii'))
+    key.update(b'\0' + item_values.encode('utf-8', errors='surrogatepass'))
+    return key.hexdigest()
+
 
 def custom_domains_regex(domains):
     _domains = ''
@@ -570,18 +1658,22 @@ def getUrlsFromData(gitToken, domain):
     return contentApiURLs
 
 
-def get_github_data(item):
+def get_github_data(context, item, git_data):
     """
 
     This function will get data for a given GitHub URL.
 
     Parameters
     ----------
+    context: ScanContext
+        Context of the scan.
     item: str
         URL pointing to github data related to the given domain.
+    git_data: dict
+        Data of the github URLs, the data is added to it.
 
     """
-    headers = {"Authorization": "token " + gitToken}
+    headers = {"Authorization": "token " + context.gitToken}
 
     try:
         apiUrlContent = requests.get(
@@ -596,45 +1688,380 @@ def get_github_data(item):
         pass
 
 
-def subextractor(cloudlist, p, regex, ipv4reg, url, precompiled_domains_regex):
+def subextractor(context, url, regex):
     """
 
     This function is used to call other functions to find secrets, cloud URLs etc.
 
     Parameters
     --------
-    cloudlist: object
-        Precompiled regex object to find cloud URLs.
-    p: object
-        Precompiled regex object to find secret (high entropy strings) from content in the list.
-    regex: object
-        Precompiled regex object to find subdomains for a given domain.
-    ipv4reg: object
-        Precompiled regex object to find IP version 4 addresses within content.
+    context: ScanContext
+        Context of the scan, the results are added to it.
     url: str
         Original URL from user provided input (URL argument).
+    regex: object
+        Precompiled regex object to find subdomains for a given domain.
     """
-    jsfile = JsExtract()
-    jsfile.IntJsExtract(url, heads)
-    jsfile.ExtJsExtract(url, heads)
+    jsfile = JsExtract(context)
+    # One request for the page, shared by the inline and the external scripts extraction.
+    page = jsfile.FetchPage(url, context.heads)
+    jsfile.IntJsExtract(url, context.heads, page)
+    jsfile.ExtJsExtract(url, context.heads, page)
     jsthread = ThreadPool(8)
-    jsthread.map(jsfile.SaveExtJsContent, jsLinkList)
+    jsthread.map(jsfile.SaveExtJsContent, jsfile.jsLinkList)
     jsthread.close()
     jsthread.join()
-    print(termcolor.colored("Finding secrets, cloud URLs, subdomains in all Javascript files...",
-                            color='yellow',
-                            attrs=['bold']))
-    threads = ThreadPool(8)
-    threads.starmap(get_info_from_data,
-                    zip(new_final_dict.keys(), new_final_dict.values(), repeat(cloudlist), repeat(p), repeat(regex),
-                        repeat(ipv4reg), repeat(url), repeat(precompiled_domains_regex)))
-    threads.close()
-    threads.join()
-    print(termcolor.colored("Searching completed...", color='blue', attrs=['bold']))
-    finallist.clear()
+    if context.crawl:
+        jsfile.CrawlJsChunks(url, context.crawl, time.time() + context.crawltime)
+    context.log(termcolor.colored("Finding secrets, cloud URLs, subdomains in all Javascript files...",
+                                  color='yellow',
+                                  attrs=['bold']))
+    # The analysis is CPU bound, it runs in processes instead of threads when the context has a pool.
+    analyse_contents(context, jsfile.new_final_dict, regex)
+    context.log(termcolor.colored("Searching completed...", color='blue', attrs=['bold']))
+
+
+def scan_url(context, url):
+    """
+
+    This function will find subdomains, secrets and cloud URLs in the page and its Javascript files.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, the results are added to it.
+    url: str
+        URL of the page.
+    """
+    if urlparse(url).netloc != '':
+        context.finalset.add(urlparse(url).netloc)
+    compiledRegexDomain = pre_compiled_domain_regex(url)
+    context.domainSet.add(str(getDomain(str(url))))
+    subextractor(context, url, compiledRegexDomain)
+
+
+def scan_folder(context, folderName):
+    """
+
+    This function will find secrets, cloud URLs and the subdomains of the custom domains in the files of a folder.
+    The files are read while the folder is walked and analysed by context.processes processes, the big files in
+    parts, so the memory used does not grow with the folder.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, the results are added to it.
+    folderName: str
+        Folder (searched recursively) or file to scan.
+    """
+    if not os.path.isfile(folderName):
+        parts = getFolderParts(getRecursiveFolderFiles(folderName), 'strict')
+    else:
+        parts = getFolderParts([folderName], 'ignore')
+
+    context.log(termcolor.colored("Finding secrets in files with " + str(context.processes) + " processes, Please wait...",
+                                  color='blue', attrs=['bold']))
+    totalLength = 0
+    fileinfos = list()
+
+    def merge(result):
+        nonlocal totalLength
+        path, last, info, key = result
+        if key and info is not None:
+            context.analysisCache.put(key, info)
+        fileinfos.append(info)
+        if last:
+            # A file is left out if a part of it is not text.
+            if None not in fileinfos:
+                _path = os.path.normpath(os.path.join(os.getcwd(), path))
+                for info in fileinfos:
+                    merge_info(context, _path, info)
+                totalLength += 1
+            fileinfos.clear()
+
+    pool = context.pool()
+    if pool is None:
+        for part in parts:
+            merge(analyse_folder_part(part, context))
+    else:
+        # In order, and at most a few parts per process at a time.
+        pending = deque()
+        for part in parts:
+            pending.append(pool.apply_async(analyse_folder_part, (part,)))
+            if len(pending) >= context.processes * 4:
+                merge(pending.popleft().get())
+        while pending:
+            merge(pending.popleft().get())
+
+    context.log(termcolor.colored(
+        "\nTotal files scanned: " + str(totalLength) + '\n', color='red', attrs=['bold']))
+
+
+def scan_github(context):
+    """
+
+    This function will find subdomains, secrets and cloud URLs in the github code of the domains scanned so far.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, with a github token.
+    """
+    for item in set(context.domainSet):
+        compiledRegexDomain = pre_compiled_domain_regex(item)
+        context.log(
+            termcolor.colored('Finding Subdomains and secrets from Github..Please wait...', color='yellow',
+                              attrs=['bold']))
+        context.log(termcolor.colored(
+            'Searching in github for : ' + termcolor.colored(item, color='green', attrs=['bold']), color='blue', attrs=['bold']))
+
+        git_data = dict()
+        contentApiURLs = getUrlsFromData(context.gitToken, str(item))
+        gitThread = ThreadPool(8)
+        gitThread.starmap(get_github_data, zip(repeat(context), contentApiURLs, repeat(git_data)))
+        gitThread.close()
+        gitThread.join()
+        try:
+            analyse_contents(context, git_data, compiledRegexDomain)
+        except:
+            pass
+        context.log(termcolor.colored('Completed finding from github...', color='blue', attrs=['bold']))
+
+
+class SanHarvester:
+    """
+    This class finds hostnames in the Subject Alternative Names of the certificates of hosts, and in the ones of the
+    hostnames found, concurrently.
+
+    Attributes
+    ----------
+    certificates: dict
+        Certificate of each host connected, None if it could not be connected.  Hosts serving the same certificate
+        share its record (by fingerprint).
+
+    Methods
+    -------
+    FetchCertificate(hostname)
+        It will connect to the hostname and return the record of its certificate.
+    -------
+    Harvest(seeds, inscope)
+        It will return the hostnames found from the seeds, and the host whose certificate listed them.
+    """
+
+    def __init__(self, certificates=None, answers=None, workers=san_workers, timeout=5, maxhosts=san_max_hosts):
+        """
+
+        Parameters
+        ----------
+        certificates: dict
+            Certificates of the hosts already connected, by hostname (like ScanContext.certificates), updated.
+        answers: answer_cache
+            DNS answer cache of subbrute, or None.
+        workers: int
+            Connections opened at the same time.
+        timeout: float
+            Timeout of each connection, in seconds.
+        maxhosts: int
+            Hosts connected at most by Harvest.
+        """
+        self.certificates = certificates if certificates is not None else dict()
+        self.fingerprints = dict((cert['fingerprint'], cert) for cert in self.certificates.values() if cert)
+        self.answers = answers
+        self.workers = workers
+        self.timeout = timeout
+        self.maxhosts = maxhosts
+        self.lock = threading.Lock()
+        self.context_ssl = ssl.create_default_context()
+        self.context_ssl.check_hostname = False
+
+    def FetchCertificate(self, hostname):
+        """
+
+        Parameters
+        ----------
+        hostname: str
+            Host to connect to, on port 443.
+
+        Returns
+        ----------
+        dict
+            fingerprint (sha256), subject (common name), sans (DNS names) and not_after of the certificate, None if the
+            host does not resolve, cannot be connected or has no valid certificate.
+        """
+        if hostname in self.certificates:
+            return self.certificates[hostname]
+        cert = None
+        try:
+            address = resolve_host(hostname, self.answers)
+            if address is not None:
+                with socket.create_connection((address, 443), timeout=self.timeout) as sock:
+                    with self.context_ssl.wrap_socket(sock, server_hostname=hostname) as ssock:
+                        fingerprint = hashlib.sha256(ssock.getpeercert(binary_form=True)).hexdigest()
+                        with self.lock:
+                            cert = self.fingerprints.get(fingerprint)
+                        if cert is None:
+                            peercert = ssock.getpeercert()
+                            subject = dict(item for rdn in peercert.get('subject', ()) for item in rdn)
+                            cert = {'fingerprint': fingerprint,
+                                    'subject': subject.get('commonName'),
+                                    'sans': [v.lower() for k, v in peercert.get('subjectAltName', ()) if k == 'DNS'],
+                                    'not_after': peercert.get('notAfter')}
+        except (socket.gaierror, socket.timeout, ssl.SSLCertVerificationError, ConnectionRefusedError,
+                ssl.SSLError, OSError):
+            cert = None
+        with self.lock:
+            if cert is not None:
+                cert = self.fingerprints.setdefault(cert['fingerprint'], cert)
+            self.certificates[hostname] = cert
+        return cert
+
+    def Harvest(self, seeds, inscope=None):
+        """
+
+        The hosts are connected level by level (the seeds, then the hostnames their certificates list...), at most
+        workers at a time, and each host once.
+
+        Parameters
+        ----------
+        seeds: list
+            Hostnames to start from, they are not reported.
+        inscope: function
+            Returns True for the hostnames to report, all of them if it is None.
+
+        Returns
+        ----------
+        dict
+            Hostnames found (in the order they were found), and the host whose certificate listed each of them.
+        """
+        found = dict()
+        known = set(seeds)
+        level = list(dict.fromkeys(seeds))
+        connected = 0
+        pool = ThreadPool(self.workers)
+        try:
+            while level and connected < self.maxhosts:
+                level = level[:self.maxhosts - connected]
+                connected += len(level)
+                following = list()
+                for hostname, cert in zip(level, pool.imap(self.FetchCertificate, level)):
+                    if cert is None:
+                        continue
+                    for name in cert['sans']:
+                        # The hostnames of a wildcard certificate are under its domain.
+                        if name.startswith('*.'):
+                            name = name[2:]
+                        if name in known:
+                            continue
+                        known.add(name)
+                        following.append(name)
+                        if inscope is None or inscope(name):
+                            found[name] = hostname
+                level = following
+        finally:
+            pool.close()
+            pool.join()
+        return found
+
+
+def find_sans(context, url, is_san):
+    """
+
+    This function will find additional subdomains in the Subject Alternative Names of the certificates
+    of the subdomains found.
+
+    Parameters
+    --------
+    context: ScanContext
+        Context of the scan, the hostnames found are added to its sans.
+    url: str
+        URL which was scanned.
+    is_san: str
+        'all' for all the domains and subdomains, 'same' for the subdomains of the domains found only.
+
+    Returns
+    --------
+    list
+        the hostnames found.
+    """
+    answers = dns_cache.answer_cache() if dns_cache else None
+
+    finalset = set(context.finalset)
+    finalset.add(tldExt(url))
+    domains = set(getDomain(host) for host in finalset)
+
+    def inscope(hostname):
+        if is_san == "all":
+            return True
+        labels = hostname.split('.')
+        return any('.'.join(labels[i:]) in domains for i in range(len(labels)))
+
+    harvester = SanHarvester(context.certificates, answers)
+    try:
+        sources = harvester.Harvest(sorted(finalset), inscope)
+    finally:
+        if answers is not None:
+            answers.close()
+
+    found = list()
+    for hostname, source in sources.items():
+        if hostname not in context.san_sources:
+            context.log(termcolor.colored(hostname, color='green', attrs=['bold']))
+            context.san_sources[hostname] = source
+            found.append(hostname)
+
+    context.sans.extend(found)
+    return found
+
+
+def scan(urls=None, folder=None, github=False, san=None, **options):
+    """
+
+    This function will find subdomains, secrets and cloud URLs without printing anything, the results are in
+    the returned context (see ScanContext.results()).  Several scans can run at the same time, in threads.
 
+    Parameters
+    --------
+    urls: list
+        URLs (or one URL) of the pages to scan.
+    folder: str
+        Folder (searched recursively) or file to scan.
+    github: bool
+        Search in github too, options must have a gittoken.
+    san: str
+        'all' or 'same', to find the Subject Alternative Names of the subdomains found.
+    options: dict
+        Options of ScanContext: cookie, nossl, domains, gittoken, gitsecrets, verbose, crawl, crawlbytes, crawltime,
+        processes, cache and vendor.
 
-def savedata():
+    Returns
+    --------
+    ScanContext
+        Context of the scan, with its results.
+    """
+    context = ScanContext(**options)
+    if isinstance(urls, str):
+        urls = [urls]
+    urls = list(urls or [])
+    try:
+        if folder:
+            scan_folder(context, folder)
+        for url in urls:
+            try:
+                scan_url(context, url)
+            except requests.exceptions.RequestException as e:
+                context.errors[url] = str(e)
+        if github and context.gitToken:
+            scan_github(context)
+        if san in ("same", "all"):
+            for url in urls:
+                if url not in context.errors:
+                    find_sans(context, url, san)
+    finally:
+        context.close()
+    return context
+
+
+def savedata(context, output):
     """
 
     This function will put data in output file if given.
@@ -643,32 +2070,32 @@ def savedata():
 
     print(termcolor.colored(
         "\nWriting all the subdomains to given file...\n", color='yellow', attrs=['bold']))
-    with open(args.output, 'w+') as f:
-        for item in tldSorting(finalset):
+    with open(output, 'w+') as f:
+        for item in tldSorting(context.finalset):
             f.write(item + '\n')
     print(termcolor.colored("\nWriting Done..\n", color='yellow', attrs=['bold']))
 
 
-def savecloudresults():
+def savecloudresults(context, cloudop):
     """
     This function will save cloud URL's data into the given file.
     """
     with open(cloudop, 'w+') as f:
-        for item in cloudurlset:
+        for item in context.cloudurlset:
             f.write(item + '\n')
 
-def savesecretsresults():
+def savesecretsresults(context, secretop):
     """
     This function will save secret data into the given file.
     """
     with open(secretop, 'w+') as f:
-        for location, secretlst in secret_dict.items():
+        for location, secretlst in context.secret_dict.items():
             for secret in secretlst:
                 f.write(secret + ' | ' + location + '\n')
 
-def save_github_secrets():
+def save_github_secrets(context, githubsc_out):
     with open(githubsc_out, 'w+') as f:
-        for secret in github_secrets:
+        for secret in context.github_secrets:
             f.write(secret + '\n')
 
 def printlogo():
@@ -683,17 +2110,29 @@ def printlogo():
     return termcolor.colored(logo(), color='red', attrs=['bold'])
 
 
-if __name__ == "__main__":
-
-    domainSet = set()
-    compiledRegexCloud = pre_compiled_cloud_regex()
-    compiledRegexSecretList = pre_compiled_secret_regex()
-    compiledRegexIP = pre_compiled_ip_regex()
+def interactive():
+    """
 
-    if args.domains:
-        precompiled_domains_regex = custom_domains_regex(args.domains)
-    else:
-        precompiled_domains_regex = None
+    This function will run SubDomainizer from the command line arguments, and print and/or save the results.
+    """
+    colorama.init()
+    args = parse_args()
+    url = args.url
+    listfile = args.listfile
+    cloudop = args.cloudop
+    secretop = args.secretop
+    gitToken = args.gittoken
+    isGit = args.gitscan
+    isSSL = args.nossl
+    folderName = args.folder
+    is_san = args.subject_alt_name
+    githubsc_out = args.gitsecretop
+
+    context = ScanContext(cookie=args.cookie, nossl=isSSL, domains=args.domains, gittoken=gitToken,
+                          gitsecrets=bool(githubsc_out), verbose=True, crawl=args.crawl,
+                          crawlbytes=int(args.crawlbytes * (1 << 20)), crawltime=args.crawltime,
+                          processes=args.processes or os.cpu_count(), cache=not args.nocache,
+                          vendor=args.analysevendor)
 
     try:
         print(printlogo())
@@ -707,83 +2146,46 @@ if __name__ == "__main__":
 
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+        if args.updatepsl:
+            suffixes = update_suffix_list()
+            if suffixes:
+                print(termcolor.colored("Public Suffix List updated: " + str(suffixes) + " suffixes.", color='green', attrs=['bold']))
+            else:
+                print(termcolor.colored("Could not download the Public Suffix List, using the saved one.", color='red', attrs=['bold']))
+            if not url and not listfile and not folderName:
+                sys.exit(0 if suffixes else 1)
+
         # checking if only folder needs to be scanned.
         if folderName and not url and not listfile:
 
             # if isGit:
             #     gitArgError(gitToken, isGit)
 
-            print(termcolor.colored("Getting data from folder recursively...", color='yellow',
-                                    attrs=['bold']))
-            if not os.path.isfile(folderName):
-                folderData, totalLength = getRecursiveFolderData(folderName)
-            else:
-                folderData = dict()
-                totalLength = 1
-                file_name = folderName
-                with open(file_name, 'rt', errors='ignore') as file:
-                    try:
-                        folderData[file_name] = file.read()
-                    except UnicodeDecodeError:
-                        pass
-
-            print(termcolor.colored(
-                "\nTotal files to scan: " + str(totalLength) + '\n', color='red', attrs=['bold']))
-
-            time.sleep(0.5)
-            print(termcolor.colored("Finding secrets in files, Please wait...", color='blue',
-                                    attrs=['bold']))
-            for path, data in folderData.items():
-
-                for cloud in compiledRegexCloud:
-                    for item in cloud.findall(str(data.replace('\n', ' '))):
-                        cloudurlset.add(item)
-
-                matches = compiledRegexSecretList.finditer(
-                    str(data.replace('\n', ' ')))
-                for matchNum, match in enumerate(matches):
-                    if entropy(match.group(2)) > 3:
-                        _path = os.path.normpath(os.path.join(os.getcwd(), path))
-                        if _path in secret_dict:
-                            secret_dict[_path].append(str(match.group()))
-                        else:
-                            secret_dict[_path] = [str(match.group())]
-
-                if precompiled_domains_regex:
-                    for subdomain in precompiled_domains_regex.findall(str(data.replace('\n', ' '))):
-                        finalset.add(subdomain)
-        
+            scan_folder(context, folderName)
+
         else:
             argerror(url, listfile)
             if isGit:
                 gitArgError(gitToken, isGit)
             if listfile:
-                urllist = getUrlsFromFile()
+                urllist = getUrlsFromFile(listfile)
                 if urllist:
                     for i in urllist:
-                        compiledRegexDomain = pre_compiled_domain_regex(i)
-                        domainSet.add(str(getDomain(str(i))))
                         print(termcolor.colored("Extracting data from internal and external js for url:", color='blue', attrs=['bold']))
                         print(termcolor.colored(i, color='red', attrs=['bold']))
                         try:
                             try:
-                                subextractor(compiledRegexCloud, compiledRegexSecretList, compiledRegexDomain,
-                                             compiledRegexIP, i, precompiled_domains_regex)
+                                scan_url(context, i)
                             except requests.exceptions.ConnectionError:
                                 print('An error occured while fetching URL, Might be URL is wrong, Please check!')
                         except requests.exceptions.InvalidSchema:
                             print("Invalid Schema Provided!")
                             pass
-                        
-                        new_final_dict.clear() #clear data of dict as we check new url after this.
-                        
+
             else:
                 try:
                     try:
-                        compiledRegexDomain = pre_compiled_domain_regex(url)
-                        domainSet.add(str(getDomain(str(url))))
-                        subextractor(compiledRegexCloud, compiledRegexSecretList,
-                                     compiledRegexDomain, compiledRegexIP, url, precompiled_domains_regex)
+                        scan_url(context, url)
                     except requests.exceptions.ConnectionError:
                         print(
                             termcolor.colored(
@@ -798,27 +2200,7 @@ if __name__ == "__main__":
                     sys.exit(1)
 
             if gitToken and isGit:
-                for item in domainSet:
-                    compiledRegexDomain = pre_compiled_domain_regex(item)
-                    print(
-                        termcolor.colored('Finding Subdomains and secrets from Github..Please wait...', color='yellow',
-                                          attrs=['bold']))
-                    print(termcolor.colored(
-                        'Searching in github for : ' + termcolor.colored(item, color='green', attrs=['bold']), color='blue', attrs=['bold']))
-
-                    gitThread = ThreadPool(8)
-                    contentApiURLs = getUrlsFromData(gitToken, str(item))
-                    gitThread.map(get_github_data, contentApiURLs)
-                    gitContentThread = ThreadPool(8)
-                    try:
-                        gitContentThread.starmap(get_info_from_data,
-                                                 zip(git_data.keys(), git_data.values(), repeat(compiledRegexCloud),
-                                                     repeat(compiledRegexSecretList),
-                                                     repeat(compiledRegexDomain), repeat(compiledRegexIP),
-                                                     repeat(item), repeat(custom_domains_regex)))
-                    except:
-                        pass
-                    print(termcolor.colored('Completed finding from github...', color='blue', attrs=['bold']))
+                scan_github(context)
 
 
     except KeyboardInterrupt:
@@ -827,57 +2209,59 @@ if __name__ == "__main__":
     except FileNotFoundError:
         print(termcolor.colored("\nFile Not found, Please check filename. Exiting...\n", color='yellow', attrs=['bold']))
         sys.exit(1)
+    finally:
+        context.close()
 
     print(termcolor.colored("Got all the important, printing and/or saving...\n", color='blue', attrs=['bold']))
     print(termcolor.colored('_' * 22 + 'Start of Results' + '_' * 22, color='white', attrs=['bold']))
 
     if args.output:
-        savedata()
+        savedata(context, args.output)
 
     if cloudop:
         print(
             termcolor.colored("\nWriting all the cloud services URL's to given file...", color='yellow', attrs=['bold']))
-        savecloudresults()
+        savecloudresults(context, cloudop)
         print(
             termcolor.colored("Written cloud services URL's in file: ", color='red', attrs=['bold']) + cloudop)
 
     if secretop:
         print(termcolor.colored("\nWriting all the secrets to given file...", color='yellow', attrs=['bold']))
-        savesecretsresults()
+        savesecretsresults(context, secretop)
         print(termcolor.colored("Written secrets in file: ", color='red', attrs=['bold']) + secretop)
     
     print(termcolor.colored('_' * 60, color='white', attrs=['bold']))
 
 
-    if finalset:
+    if context.finalset:
         print(termcolor.colored("\nGot some subdomains...", color='yellow', attrs=['bold']))
-        print(termcolor.colored('Total Subdomains: ' + str(len(finalset)), color='red', attrs=['bold']))
-        for item in tldSorting(finalset):
+        print(termcolor.colored('Total Subdomains: ' + str(len(context.finalset)), color='red', attrs=['bold']))
+        for item in tldSorting(context.finalset):
             print(termcolor.colored(item, color='green', attrs=['bold']))
 
-    if cloudurlset:
+    if context.cloudurlset:
         print(termcolor.colored('_' * 60, color='white', attrs=['bold']))
         print(termcolor.colored("\nSome cloud services urls are found...", color='yellow', attrs=['bold']))
-        print(termcolor.colored('Total Cloud URLs: ' + str(len(cloudurlset)), color='red', attrs=['bold']))
-        for item in cloudurlset:
+        print(termcolor.colored('Total Cloud URLs: ' + str(len(context.cloudurlset)), color='red', attrs=['bold']))
+        for item in context.cloudurlset:
             print(termcolor.colored(item, color='green', attrs=['bold']))
 
-    if secret_dict:
+    if context.secret_dict:
         print(termcolor.colored('_' * 60, color='white', attrs=['bold']))
         print(termcolor.colored("\nFound some secrets(might be false positive)...", color='yellow', attrs=['bold']))
                                 
         print(termcolor.colored('Total Possible Secrets: ' +
-                                str(sum(len(sec_lst) for sec_lst in secret_dict.values())), color='red', attrs=['bold']))
-        for file_url, secrets in secret_dict.items():
+                                str(sum(len(sec_lst) for sec_lst in context.secret_dict.values())), color='red', attrs=['bold']))
+        for file_url, secrets in context.secret_dict.items():
             for secret in set(secrets):
                 print(termcolor.colored(secret, color='green', attrs=['bold']),
                       termcolor.colored("| " + file_url, color='yellow', attrs=['bold']))
     
-    if isGit and github_secrets:
+    if isGit and context.github_secrets:
         print(termcolor.colored('_' * 60, color='white', attrs=['bold']))
         print(termcolor.colored("\nWriting github secrets to the given file...", color='yellow', attrs=['bold']))
         try:
-            save_github_secrets()
+            save_github_secrets(context, githubsc_out)
             print(termcolor.colored("\nSaved", color='red', attrs=['bold']))
         except:
             print(termcolor.colored("\nError in saving the github secrets file...", color='red', attrs=['bold']))
@@ -885,52 +2269,17 @@ if __name__ == "__main__":
     if is_san in ("same", "all") and url and not folderName:
         print(termcolor.colored('_' * 60, color='white', attrs=['bold']))
         print(termcolor.colored("\nFinding additional subdomains using Subject Alternative Names(SANs)...\n", color='yellow', attrs=['bold']))
-        nothing_found_flag = True
-        context = ssl.create_default_context()
-        context.check_hostname = False
-
-        socket.setdefaulttimeout(5)
-
-        q = queue.Queue()
-        printed = set()
-        completed = set()
-
-        finalset.add(tldExt(url))
-
-        for host in finalset:
-            tld = getDomain(host)
-            q.put(host)
-            while not q.empty():
-                try:
-                    hostname = q.get()
-                    if is_san == "same":
-                        if hostname not in printed and hostname not in finalset and hostname.endswith(tld):
-                            print(termcolor.colored(hostname, color='green', attrs=['bold']))
-                            nothing_found_flag = False
-                            printed.add(hostname)
-                    elif is_san == "all":
-                        if hostname not in printed and hostname not in finalset:
-                            print(termcolor.colored(hostname, color='green', attrs=['bold']))
-                            nothing_found_flag = False
-                            printed.add(hostname)
-
-                    if hostname not in completed:
-                        completed.add(hostname)
-                        with socket.create_connection((hostname, 443)) as sock:
-                            with context.wrap_socket(sock, server_hostname=hostname, ) as ssock:
-                                for (k, v) in ssock.getpeercert()['subjectAltName']:
-                                    if v not in q.queue and v.startswith("*.") and v.lstrip('*.') not in finalset:
-                                        q.put(v.lstrip('*.'))
-                                    elif v not in q.queue and v not in finalset:
-                                        q.put(v.lstrip('*.'))
-                except (socket.gaierror, socket.timeout, ssl.SSLCertVerificationError, ConnectionRefusedError,
-                        ssl.SSLError, OSError):
-                    pass
-                except KeyboardInterrupt:
-                    print(termcolor.colored("\nKeyboard Interrupt. Exiting...\n", color='red', attrs=['bold']))
-                    sys.exit(1)
+        try:
+            found = find_sans(context, url, is_san)
+        except KeyboardInterrupt:
+            print(termcolor.colored("\nKeyboard Interrupt. Exiting...\n", color='red', attrs=['bold']))
+            sys.exit(1)
 
-        if nothing_found_flag:
+        if not found:
             print(termcolor.colored("No SANs found.", color='green', attrs=['bold']))
 
     print(termcolor.colored('\n' + '_' * 23 + 'End of Results' + '_' * 23 + '\n', color='white', attrs=['bold']))
+
+
+if __name__ == "__main__":
+    interactive()
@@ -0,0 +1,114 @@
+import functools
+import http.server
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SubDomainizer
+
+SITE = {
+    "index.html": '<html><script src="/static/js/main.js"></script></html>',
+    # webpack runtime: chunk map, public path and a dynamic import
+    "static/js/main.js": 'n.p="/";u="https://main.example.com";'
+                         'f=function(e){return "static/js/"+({2:"vendors"}[e]||e)+"."+{2:"8f2c1a",7:"d41d8c"}[e]+".chunk.js"};'
+                         'import("./lazy.js");import("http://localhost:{port}/static/js/other.js")',
+    "static/js/vendors.8f2c1a.chunk.js": 'u="https://vendors.example.com";import("./deep.js");import("./lazy.js")',
+    "static/js/7.d41d8c.chunk.js": 'u="https://seven.example.com"',
+    # same content as the chunk 7
+    "static/js/lazy.js": 'u="https://seven.example.com"',
+    "static/js/deep.js": 'u="https://deep.example.com";import("./deeper.js")',
+    "static/js/deeper.js": 'u="https://deeper.example.com"',
+    "static/js/other.js": 'u="https://other.example.com"',
+}
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    # whatever the scan caches stays out of ~/.cache
+    monkeypatch.setenv("SUBBRUTE_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "site"
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(root)))
+    server.requests = []
+    port = server.server_address[1]
+    for name, content in SITE.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content.replace("{port}", str(port)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, "http://127.0.0.1:%d/" % port
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(url, depth, **options):
+    context = SubDomainizer.ScanContext(cache=False, **options)
+    jsfile = SubDomainizer.JsExtract(context)
+    page = jsfile.FetchPage(url, context.heads)
+    jsfile.IntJsExtract(url, context.heads, page)
+    jsfile.ExtJsExtract(url, context.heads, page)
+    for js in jsfile.jsLinkList:
+        jsfile.SaveExtJsContent(js)
+    jsfile.CrawlJsChunks(url, depth, time.time() + 30)
+    return jsfile
+
+
+def test_chunks_are_crawled_to_the_depth(site):
+    server, url = site
+    jsfile = crawl(url, 2)
+    names = set(jsfile.new_final_dict)
+    assert {url + "static/js/main.js", url + "static/js/vendors.8f2c1a.chunk.js", url + "static/js/deep.js"} <= names
+    assert url + "static/js/7.d41d8c.chunk.js" in names or url + "static/js/lazy.js" in names
+    assert url + "static/js/deeper.js" not in names
+    assert "/static/js/deeper.js" not in server.requests
+
+
+def test_chunks_are_fetched_once_and_deduplicated_by_content(site):
+    server, url = site
+    jsfile = crawl(url, 3)
+    # lazy.js is referenced by main.js and by the vendors chunk
+    assert server.requests.count("/static/js/lazy.js") == 1
+    assert len(server.requests) == len(set(server.requests))
+    # lazy.js has the same content as the chunk 7, only one of them is kept
+    assert "/static/js/7.d41d8c.chunk.js" in server.requests
+    assert (url + "static/js/lazy.js" in jsfile.new_final_dict) != (url + "static/js/7.d41d8c.chunk.js" in jsfile.new_final_dict)
+    assert url + "static/js/deeper.js" in jsfile.new_final_dict
+
+
+def test_chunks_of_other_hosts_are_not_fetched(site):
+    server, url = site
+    crawl(url, 3)
+    assert "/static/js/other.js" not in server.requests
+
+
+def test_byte_budget_stops_the_crawl(site):
+    server, url = site
+    budget = len(SITE["static/js/7.d41d8c.chunk.js"]) + 5
+    jsfile = crawl(url, 3, crawlbytes=budget)
+    assert jsfile.crawlBytes <= budget
+    assert "/static/js/deep.js" not in server.requests
+
+
+def test_scan_finds_the_subdomains_of_the_chunks(site):
+    server, url = site
+    found = SubDomainizer.scan(url, domains="example.com", crawl=2, cache=False).results()["subdomains"]
+    assert {"main.example.com", "vendors.example.com", "seven.example.com", "deep.example.com"} <= set(found)
+    assert "deeper.example.com" not in found
+    found = SubDomainizer.scan(url, domains="example.com", cache=False).results()["subdomains"]
+    assert "main.example.com" in found
+    assert "vendors.example.com" not in found
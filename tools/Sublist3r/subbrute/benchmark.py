@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+#
+#Throughput benchmark for SubBrute.
+#
+#Starts a local DNS server for a synthetic zone and runs subbrute.run()
+#against it,  once per engine and process count,  so a regression shows up
+#as a number instead of noise from the internet.  The server can add
+#latency,  drop queries,  answer SERVFAIL and serve a wildcard.  A share of
+#the names can be CNAMEs to a few CDN names with A and AAAA records,  to
+#count the queries of --type A,AAAA,CNAME.
+#
+#Every trial runs in its own process with an empty cache folder,  and
+#reports the queries per second seen by the server,  the p50/p99 round trip
+#time of the queries seen by the engine,  the CPU time and the peak RSS.
+#
+#    python benchmark.py --names 20000 --records 2000 --latency 0.005 --drop 0.01
+#
+import os
+import time
+import json
+import heapq
+import random
+import select
+import shutil
+import socket
+import struct
+import optparse
+import tempfile
+import resource
+import multiprocessing
+from array import array
+
+import dns.resolver
+
+try:
+    from . import subbrute
+except ImportError:
+    import subbrute
+
+#rcodes
+NOERROR = 0
+SERVFAIL = 2
+NXDOMAIN = 3
+#Record types
+A = 1
+CNAME = 5
+AAAA = 28
+
+def wire_name(name):
+    return b"".join(struct.pack("!B", len(label)) + label for label in name.encode("ascii").split(b".")) + b"\0"
+
+#A synthetic zone:  records names of the wordlist exist,  the rest do not
+#(or resolve to the wildcard address).  A share cnames of the records are
+#CNAMEs to one of cdn names outside the zone.
+class synthetic_zone(object):
+
+    def __init__(self, zone, names, records, wildcard = None, ttl = 300, seed = 1, cnames = 0.0, cdn = 4):
+        self.zone = zone.lower()
+        self.suffix = "." + self.zone
+        self.ttl = ttl
+        self.wildcard = socket.inet_aton(wildcard) if wildcard else None
+        rnd = random.Random(seed)
+        self.records = {}
+        for i in rnd.sample(range(len(names)), min(records, len(names))):
+            hostname = "%s.%s" % (names[i], self.zone)
+            self.records[hostname] = struct.pack("!BBBB", 10, (i >> 16) & 255, (i >> 8) & 255, i & 255)
+        self.records[self.zone] = socket.inet_aton("10.255.255.254")
+        self.edges = {}
+        for i in range(cdn):
+            self.edges["edge%d.cdn.example" % i] = (socket.inet_aton("192.0.2.%d" % (i + 1)),
+                                                    socket.inet_pton(socket.AF_INET6, "2001:db8::%x" % (i + 1)))
+        self.aliases = {}
+        if cnames and self.edges:
+            edges = sorted(self.edges)
+            for hostname in sorted(self.records):
+                if rnd.random() < cnames:
+                    self.aliases[hostname] = rnd.choice(edges)
+
+    #(rcode, [(owner, record type, rdata)]),  owner None is the name of the question.
+    def lookup(self, name, qtype):
+        answers = []
+        owner = None
+        target = self.aliases.get(name)
+        if target is not None:
+            answers.append((None, CNAME, wire_name(target)))
+            if qtype == CNAME:
+                return NOERROR, answers
+            owner = wire_name(target)
+            name = target
+        if name in self.edges:
+            a, aaaa = self.edges[name]
+            if qtype == A:
+                answers.append((owner, A, a))
+            elif qtype == AAAA:
+                answers.append((owner, AAAA, aaaa))
+            return NOERROR, answers
+        address = self.records.get(name)
+        if address is None and self.wildcard and name.endswith(self.suffix):
+            address = self.wildcard
+        if address is None:
+            return NXDOMAIN, []
+        if qtype == A:
+            return NOERROR, [(None, A, address)]
+        #No other records,  NODATA.
+        return NOERROR, []
+
+#Build the response to a query straight from the wire format,  so the
+#server is much faster than the engines it measures.
+def respond(zone, data, rcode = None):
+    if len(data) < 17:
+        return None
+    qid, flags, qdcount = struct.unpack("!HHH", data[:6])
+    if qdcount != 1 or flags & 0x8000:
+        return None
+    labels = []
+    i = 12
+    try:
+        while data[i]:
+            length = data[i]
+            if length > 63:
+                return None
+            labels.append(data[i + 1:i + 1 + length])
+            i += 1 + length
+        qtype, qclass = struct.unpack("!HH", data[i + 1:i + 5])
+    except (IndexError, struct.error):
+        return None
+    question = data[12:i + 5]
+    answers = []
+    if rcode is None:
+        name = b".".join(labels).decode("ascii", "replace").lower()
+        rcode, answers = zone.lookup(name, qtype)
+    #QR, AA, RD copied from the query, RA
+    flags = 0x8400 | (flags & 0x0100) | 0x0080 | rcode
+    wire = [struct.pack("!HHHHHH", qid, flags, 1, len(answers), 0, 0), question]
+    for owner, rtype, rdata in answers:
+        #0xc00c points to the name of the question.
+        wire.append((owner or b"\xc0\x0c") + struct.pack("!HHIH", rtype, 1, zone.ttl, len(rdata)) + rdata)
+    return b"".join(wire)
+
+#The server loop,  run in its own process so it does not share a CPU
+#budget (or a GIL) with the engine being measured.
+#Commands on control:  "reset" zeroes the counters,  "stats" sends them back,  "stop".
+def serve(zone, sockets, control, latency = 0.0, jitter = 0.0, drop = 0.0, servfail = 0.0, seed = 1):
+    rnd = random.Random(seed)
+    stats = dict(queries = 0, answered = 0, dropped = 0, servfail = 0)
+    delayed = []
+    sequence = 0
+    readers = list(sockets) + [control]
+    while True:
+        timeout = None
+        if delayed:
+            timeout = max(0, delayed[0][0] - time.time())
+        readable, _, _ = select.select(readers, [], [], timeout)
+        for s in readable:
+            if s is control:
+                command = control.recv()
+                if command == "reset":
+                    for key in stats:
+                        stats[key] = 0
+                elif command == "stats":
+                    control.send(dict(stats))
+                elif command == "stop":
+                    return
+                continue
+            #Drain the socket,  one select() per burst of queries.
+            while True:
+                try:
+                    data, addr = s.recvfrom(4096)
+                except (BlockingIOError, InterruptedError):
+                    break
+                stats["queries"] += 1
+                if drop and rnd.random() < drop:
+                    stats["dropped"] += 1
+                    continue
+                rcode = None
+                if servfail and rnd.random() < servfail:
+                    stats["servfail"] += 1
+                    rcode = SERVFAIL
+                response = respond(zone, data, rcode)
+                if response is None:
+                    continue
+                stats["answered"] += 1
+                delay = latency + (rnd.random() * jitter if jitter else 0)
+                if delay > 0:
+                    sequence += 1
+                    heapq.heappush(delayed, (time.time() + delay, sequence, s, response, addr))
+                else:
+                    s.sendto(response, addr)
+        now = time.time()
+        while delayed and delayed[0][0] <= now:
+            due, n, s, response, addr = heapq.heappop(delayed)
+            s.sendto(response, addr)
+
+#One nameserver per loopback address,  all on the same port.
+def open_sockets(count, port):
+    sockets = []
+    for i in range(count):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        try:
+            s.bind(("127.0.0.%d" % (i + 2), port))
+        except OSError:
+            #Only 127.0.0.1 is routed on some systems (macOS).
+            s.close()
+            if i:
+                break
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.bind(("127.0.0.1", port))
+        s.setblocking(False)
+        sockets.append(s)
+    return sockets
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+#Round trip times of the queries sent by the engine.  The async engine sends
+#them from dns_protocol.query(),  the process engine from dns.resolver in the
+#lookup processes,  which are forked after this runs and send theirs back.
+def record_rtts(engine, rtts, rtt_q):
+    if engine == "async":
+        query = subbrute.dns_protocol.query
+        async def timed_query(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await query(self, *args, **kwargs)
+            finally:
+                rtts.append(time.perf_counter() - started)
+        subbrute.dns_protocol.query = timed_query
+    else:
+        query = dns.resolver.Resolver.query
+        def timed_query(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return query(self, *args, **kwargs)
+            finally:
+                rtt_q.put(time.perf_counter() - started)
+        dns.resolver.Resolver.query = timed_query
+
+def trial(engine, process_count, target, record_type, names, resolvers, port, max_time, result_conn):
+    #No warm resolver scores,  wildcards or answers from a previous trial.
+    cache_dir = tempfile.mkdtemp(prefix = "subbrute-bench-")
+    os.environ["SUBBRUTE_CACHE_DIR"] = cache_dir
+    rtts = array("d")
+    rtt_q = multiprocessing.Queue()
+    record_rtts(engine, rtts, rtt_q)
+    found = set()
+    started = time.time()
+    cpu = os.times()
+    try:
+        for hostname, record_type, response in subbrute.run(target, record_type, names, resolvers, process_count,
+                                                             deadline = started + max_time, engine = engine, port = port):
+            found.add(hostname)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors = True)
+    elapsed = time.time() - started
+    for child in multiprocessing.active_children():
+        child.join(1)
+    while True:
+        try:
+            rtts.append(rtt_q.get(True, 0.2))
+        except Exception:
+            break
+    end = os.times()
+    cpu_time = (end.user - cpu.user) + (end.system - cpu.system) + (end.children_user - cpu.children_user) + (end.children_system - cpu.children_system)
+    result_conn.send(dict(
+        elapsed = elapsed,
+        found = sorted(found),
+        cpu = cpu_time,
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        child_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0,
+        p50 = percentile(rtts, 0.50),
+        p99 = percentile(rtts, 0.99),
+        samples = len(rtts),
+    ))
+
+def run_trial(control, engine, process_count, target, record_type, names, resolvers, port, max_time):
+    control.send("reset")
+    parent_conn, child_conn = multiprocessing.Pipe(False)
+    proc = multiprocessing.Process(target = trial, args = (engine, process_count, target, record_type, names, resolvers, port, max_time, child_conn))
+    proc.start()
+    result = parent_conn.recv()
+    proc.join()
+    control.send("stats")
+    result.update(control.recv())
+    result["qps"] = result["queries"] / result["elapsed"] if result["elapsed"] else 0
+    return result
+
+def benchmark(options):
+    names = ["n%07d" % i for i in range(options.names)]
+    zone = synthetic_zone(options.zone, names, options.records, options.wildcard, seed = options.seed,
+                          cnames = options.cnames, cdn = options.cdn)
+    expected = set(zone.records)
+    sockets = open_sockets(options.resolvers, options.port)
+    resolvers = [s.getsockname()[0] for s in sockets]
+    control, server_control = multiprocessing.Pipe()
+    server = multiprocessing.Process(target = serve, args = (zone, sockets, server_control, options.latency,
+                                                             options.jitter, options.drop, options.servfail, options.seed))
+    server.daemon = True
+    server.start()
+    report = []
+    print("%-8s %6s %8s %8s %9s %8s %8s %8s %8s %9s %6s %6s" % ("engine", "procs", "time s", "queries", "queries/s", "p50 ms",
+                                                               "p99 ms", "cpu s", "rss MB", "child MB", "found", "extra"))
+    try:
+        for engine in options.engines.split(","):
+            for process_count in [int(c) for c in options.process_counts.split(",")]:
+                r = run_trial(control, engine, process_count, options.zone, options.type, names, resolvers, options.port, options.max_time)
+                found = set(r.pop("found"))
+                r.update(engine = engine, process_count = process_count, expected = len(expected),
+                         missing = len(expected - found), extra = len(found - expected))
+                report.append(r)
+                ms = lambda v: "%.2f" % (v * 1000) if v is not None else "-"
+                print("%-8s %6d %8.2f %8d %9.0f %8s %8s %8.2f %8.1f %9.1f %6s %6d" % (engine, process_count, r["elapsed"], r["queries"], r["qps"],
+                      ms(r["p50"]), ms(r["p99"]), r["cpu"], r["rss_mb"], r["child_rss_mb"],
+                      "%d/%d" % (len(expected) - r["missing"], len(expected)), r["extra"]))
+    finally:
+        control.send("stop")
+        server.join(2)
+        for s in sockets:
+            s.close()
+    return report
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser("usage: %prog [options]")
+    parser.add_option("--zone", default = "bench.test", help = "Synthetic zone, default = bench.test")
+    parser.add_option("--names", type = "int", default = 20000, help = "Size of the wordlist, default = 20000")
+    parser.add_option("--records", type = "int", default = 2000, help = "Names of the wordlist that exist in the zone, default = 2000")
+    parser.add_option("--wildcard", default = None, help = "Answer this address for every other name of the zone")
+    parser.add_option("--cnames", type = "float", default = 0.0, help = "Share of the records that are CNAMEs to a CDN name")
+    parser.add_option("--cdn", type = "int", default = 4, help = "Number of CDN names the CNAMEs point at, default = 4")
+    parser.add_option("--type", default = None, help = "Record type(s) to resolve, like subbrute.py --type (A,AAAA,CNAME...)")
+    parser.add_option("--latency", type = "float", default = 0.0, help = "Seconds added to every answer")
+    parser.add_option("--jitter", type = "float", default = 0.0, help = "Up to this many more seconds, at random")
+    parser.add_option("--drop", type = "float", default = 0.0, help = "Share of the queries left unanswered")
+    parser.add_option("--servfail", type = "float", default = 0.0, help = "Share of the queries answered SERVFAIL")
+    parser.add_option("--resolvers", type = "int", default = 16, help = "Number of nameservers (127.0.0.2, 127.0.0.3...), a lookup process of the process engine uses at least one,  default = 16")
+    parser.add_option("--port", type = "int", default = 5353, help = "Port of the nameservers, default = 5353")
+    parser.add_option("--engines", default = "async,process", help = "Comma separated engines, default = async,process")
+    parser.add_option("-c", "--process_counts", default = "4,16", help = "Comma separated process counts, default = 4,16")
+    parser.add_option("--max-time", dest = "max_time", type = "float", default = 300, help = "Time limit of a trial in seconds, default = 300")
+    parser.add_option("--seed", type = "int", default = 1, help = "Seed of the zone and of the faults, default = 1")
+    parser.add_option("-j", "--json", dest = "json", default = None, help = "Also write the results to this file (JSON)")
+    (options, args) = parser.parse_args()
+    report = benchmark(options)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(dict(options = vars(options), results = report), f, indent = 2)
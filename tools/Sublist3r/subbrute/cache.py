@@ -0,0 +1,294 @@
+#
+#Persistent state for SubBrute.
+#
+#Everything SubBrute learns that is worth keeping between runs lives in
+#one folder,  $SUBBRUTE_CACHE_DIR or ~/.cache/subbrute by default.
+#
+import os
+import json
+import time
+import threading
+import sqlite3
+
+#Full path of a cache file,  or None if there is no usable cache folder.
+#Losing the cache only makes the next run slower,  so errors are not fatal.
+def cache_path(name):
+    folder = os.environ.get("SUBBRUTE_CACHE_DIR")
+    if not folder:
+        folder = os.path.join(os.path.expanduser("~"), ".cache", "subbrute")
+    try:
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+    except OSError:
+        return None
+    return os.path.join(folder, name)
+
+def load_json(name):
+    path = cache_path(name)
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+#Written to a temporary file first,  so a run killed halfway (or two runs
+#saving at once) never leaves a corrupt cache behind.
+def save_json(name, data):
+    path = cache_path(name)
+    if not path:
+        return False
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        return True
+    except (IOError, OSError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+#Wildcard answers of a zone,  per nameserver.
+#A nameserver has to pass the wildcard checks (up to 9 random label queries)
+#before it is used.  Zones that are scanned again and again can reuse the
+#answers found by a recent run,  so a warm run starts resolving right away.
+wildcard_cache_name = "wildcards.json"
+wildcard_ttl = 6 * 3600
+
+class wildcard_cache(object):
+
+    def __init__(self, zone, record_type = "A", ttl = None, persist = True):
+        self.key = "%s/%s" % (zone.lower().rstrip("."), record_type)
+        self.ttl = wildcard_ttl if ttl is None else ttl
+        self.persist = persist
+        self.entries = {}
+        self.changed = False
+        if persist:
+            entries = self.load().get(self.key)
+            if isinstance(entries, dict):
+                self.entries = entries
+
+    def load(self):
+        data = load_json(wildcard_cache_name)
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    #The wildcard answers of nameserver,  or None if it has to be checked again.
+    def get(self, nameserver):
+        entry = self.entries.get(nameserver)
+        try:
+            if entry and entry["expires"] > time.time():
+                return entry["wildcards"]
+        except (KeyError, TypeError):
+            pass
+        return None
+
+    #Only nameservers that passed the checks are stored,  a failure may be a
+    #timeout that will not happen next time.
+    def put(self, nameserver, wildcards):
+        self.entries[nameserver] = {"wildcards": sorted(set(wildcards)), "expires": int(time.time() + self.ttl)}
+        self.changed = True
+
+    #Merged with what other runs saved in the meantime.
+    def save(self):
+        if not self.persist or not self.changed:
+            return False
+        now = time.time()
+        data = self.load()
+        entries = data.get(self.key)
+        if not isinstance(entries, dict):
+            entries = {}
+        entries.update(self.entries)
+        data[self.key] = entries
+        for key in list(data):
+            zone = data[key]
+            if isinstance(zone, dict):
+                for nameserver in list(zone):
+                    try:
+                        if zone[nameserver]["expires"] <= now:
+                            del zone[nameserver]
+                    except (KeyError, TypeError):
+                        del zone[nameserver]
+            if not zone:
+                del data[key]
+        self.changed = False
+        return save_json(wildcard_cache_name, data)
+
+#A sqlite table shared by the threads of a process,  written in batches of
+#flush_every rows.  One connection per process,  a forked worker must not use
+#the connection of its parent.  WAL lets the scans running at the same time
+#read while one of them writes,  and the sqlite errors are not fatal:  a lost
+#row only costs a lookup in the next run.  Without a database the rows are
+#dropped,  or kept in memory with memory = True.
+class sqlite_store(object):
+
+    def __init__(self, path, schema, insert, expire, flush_every = 256, memory = False):
+        self.path = path
+        self.schema = schema
+        self.insert = insert
+        self.expire = expire
+        self.flush_every = flush_every
+        self.memory = memory
+        self.lock = threading.Lock()
+        self.db = None
+        self.pid = None
+        self.pending = {}
+
+    def connect(self):
+        if self.pid != os.getpid():
+            self.db = None
+            self.pending = {}
+            self.pid = os.getpid()
+            if self.path:
+                try:
+                    self.db = sqlite3.connect(self.path, timeout = 5, check_same_thread = False)
+                    self.db.execute("PRAGMA journal_mode=WAL")
+                    self.db.execute(self.schema)
+                except sqlite3.Error:
+                    self.db = None
+        return self.db
+
+    #The row of key not written yet,  or the one the query returns.
+    def get(self, key, query, args):
+        with self.lock:
+            db = self.connect()
+            row = self.pending.get(key)
+            if row is None and db is not None:
+                try:
+                    row = db.execute(query, args).fetchone()
+                except sqlite3.Error:
+                    row = None
+        return row
+
+    def put(self, key, row):
+        with self.lock:
+            if self.connect() is None and not self.memory:
+                return
+            self.pending[key] = row
+            if len(self.pending) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if not self.pending or self.db is None:
+            return
+        rows = list(self.pending.values())
+        self.pending = {}
+        try:
+            with self.db:
+                self.db.executemany(self.insert, rows)
+        except sqlite3.Error:
+            #Another scan holds the lock for too long,  these rows are lost.
+            pass
+
+    def flush(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                self._flush()
+
+    #Writes the rows kept and deletes the ones the expire statement matches,
+    #with args.
+    def close(self, args = ()):
+        with self.lock:
+            if self.pid != os.getpid() or self.db is None:
+                return
+            self._flush()
+            try:
+                with self.db:
+                    self.db.execute(self.expire, args)
+                self.db.close()
+            except sqlite3.Error:
+                pass
+            self.db = None
+            self.pid = None
+
+#DNS answers shared by every tool that resolves names:  subbrute,  the
+#DNSdumpster validation and the port scanner of Sublist3r,  and the SAN
+#lookups of SubDomainizer.  Positive answers are kept for their own TTL.
+#A name that does not exist (NXDOMAIN) is kept for negative_ttl under the
+#nxdomain type,  for every record type,  so the names that were dead in
+#yesterday's scan of a zone are not asked for again.  A name without
+#records of one type (NODATA,  an IPv6 only host has no A records) is only
+#kept for that type,  and for a few minutes:  the name exists and a flaky
+#resolver may answer NODATA for a live record.
+answer_cache_name = "answers.sqlite"
+negative_ttl = 24 * 3600
+nodata_ttl = 300
+max_nodata_ttl = 3600
+max_ttl = 24 * 3600
+#For answers that come without a TTL,  from getaddrinfo().
+default_ttl = 300
+#Writes are batched,  one transaction per flush_every answers.
+flush_every = 256
+nxdomain_type = "NXDOMAIN"
+
+class answer_cache(object):
+
+    def __init__(self, path = None, persist = True):
+        if path is None and persist:
+            path = cache_path(answer_cache_name)
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.store = sqlite_store(path,
+                                  "CREATE TABLE IF NOT EXISTS answers (name TEXT, rdtype TEXT, answers TEXT, expires INTEGER, PRIMARY KEY (name, rdtype))",
+                                  "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                                  "DELETE FROM answers WHERE expires <= ?",
+                                  flush_every)
+
+    def _rows(self, name, rdtypes):
+        rows = {}
+        for rdtype in rdtypes:
+            row = self.store.get((name, rdtype), "SELECT * FROM answers WHERE name = ? AND rdtype = ?", (name, rdtype))
+            if row is not None and row[3] > time.time():
+                rows[rdtype] = row[2]
+        return rows
+
+    #A list of answers,  an empty list if the name is known not to exist or to
+    #have no rdtype records,  or None if it has to be resolved.
+    def get(self, name, rdtype = "A"):
+        name = name.lower().rstrip(".")
+        rows = self._rows(name, (rdtype, nxdomain_type))
+        answers = rows.get(rdtype, rows.get(nxdomain_type))
+        if answers is None:
+            return None
+        return json.loads(answers)
+
+    #True if the name is known not to exist.  An empty list from get() may only
+    #mean that the name has no records of that type.
+    def nxdomain(self, name):
+        name = name.lower().rstrip(".")
+        return nxdomain_type in self._rows(name, (nxdomain_type,))
+
+    #No answers is NODATA,  kept for ttl (the SOA minimum of the response)
+    #or nodata_ttl,  max_nodata_ttl at most.
+    def put(self, name, rdtype, answers, ttl = None):
+        answers = [str(a) for a in answers]
+        if not answers:
+            ttl = min(nodata_ttl if ttl is None else ttl, max_nodata_ttl)
+        elif ttl is None:
+            ttl = default_ttl
+        else:
+            ttl = min(ttl, max_ttl)
+        self._put(name, rdtype, answers, ttl)
+
+    def put_nxdomain(self, name, ttl = None):
+        self._put(name, nxdomain_type, [], self.negative_ttl if ttl is None else min(ttl, self.negative_ttl))
+
+    def put_nodata(self, name, rdtype = "A", ttl = None):
+        self.put(name, rdtype, [], ttl)
+
+    def _put(self, name, rdtype, answers, ttl):
+        if ttl <= 0:
+            return
+        name = name.lower().rstrip(".")
+        self.store.put((name, rdtype), (name, rdtype, json.dumps(answers), int(time.time() + ttl)))
+
+    def flush(self):
+        self.store.flush()
+
+    def close(self):
+        self.store.close((int(time.time()),))
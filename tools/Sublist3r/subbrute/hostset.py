@@ -0,0 +1,196 @@
+#
+#Compact sets of hostnames.
+#
+#A hostname_table keeps its hostnames as keys made of their reversed labels,
+#"www.example.com" => "com\0example\0www".  The separator sorts before any
+#character of a label,  so the keys sort like the lists of labels (DNS
+#order),  and the subdomains of a name are the keys between name + "\0" and
+#name + "\1":  a whole subtree ("everything under corp.example.com") is one
+#range of the sorted keys.
+#
+#The sorted keys are packed in blocks of block_size keys,  each block a single
+#string ("\n" + "\n".join(keys) + "\n"),  so a name costs the bytes of its key
+#instead of a str object and a hash table slot:  200k names take about 4 MB
+#against 22 MB for a set of str.  A lookup bisects the first keys of the
+#blocks and searches one block.  The names added are kept in a set until
+#there are enough of them to merge into the blocks,  an insert costs a few
+#microseconds instead of the fraction of one of a set.
+#
+import bisect
+import heapq
+import re
+
+sep = "\0"
+block_size = 128
+#The added names are merged into the blocks when they are more than this,  or
+#than an eighth of the names.
+merge_min = 4096
+
+#"www.example.com" => ["com", "example", "www"],  None if it is not a hostname.
+def labels(hostname):
+    path = str(hostname).strip().lower().rstrip(".").split(".")[::-1]
+    if "" in path:
+        return None
+    return path
+
+def _key(hostname):
+    path = labels(hostname)
+    return sep.join(path) if path else None
+
+def _name(key):
+    return ".".join(reversed(key.split(sep)))
+
+#The key www.x gets in the report order:  right after x,  before the other
+#subdomains of x (see subdomain_sorting_key() in sublist3r).
+_www = re.compile("[^\n]*\0www(?=\n)")
+
+def _www_key(key):
+    return key[:-3]
+
+class hostname_table(object):
+
+    def __init__(self, hostnames = None):
+        self.blocks = []
+        #First key of each block.
+        self.heads = []
+        self.added = set()
+        #The names given in another form than their key ("WWW.Example.com").
+        self.spellings = {}
+        self.count = 0
+        if hostnames is not None:
+            self.update(hostnames)
+
+    def _has(self, key):
+        if key in self.added:
+            return True
+        i = bisect.bisect_right(self.heads, key) - 1
+        return i >= 0 and ("\n" + key + "\n") in self.blocks[i]
+
+    #Returns False if hostname was already there (names are not case
+    #sensitive) or is not a hostname.
+    def add(self, hostname):
+        key = _key(hostname)
+        if key is None or self._has(key):
+            return False
+        self.added.add(key)
+        hostname = str(hostname)
+        if hostname != _name(key):
+            self.spellings[key] = hostname
+        self.count += 1
+        if len(self.added) > max(merge_min, self.count >> 3):
+            self._merge()
+        return True
+
+    def update(self, hostnames):
+        added = 0
+        for hostname in hostnames:
+            if self.add(hostname):
+                added += 1
+        return added
+
+    #Only the blocks that get new keys are rebuilt,  and split in blocks of
+    #block_size keys at most.
+    def _merge(self):
+        if not self.added:
+            return
+        added = sorted(self.added)
+        self.added = set()
+        blocks = []
+        heads = []
+        j = 0
+        for i, block in enumerate(self.blocks):
+            #The keys before the first key of the next block go in this one.
+            if i + 1 < len(self.heads):
+                end = bisect.bisect_left(added, self.heads[i + 1], j)
+            else:
+                end = len(added)
+            if end == j:
+                blocks.append(block)
+                heads.append(self.heads[i])
+                continue
+            keys = block[1:-1].split("\n") + added[j:end]
+            keys.sort()
+            self._pack(keys, blocks, heads)
+            j = end
+        if j < len(added):
+            self._pack(added[j:], blocks, heads)
+        self.blocks = blocks
+        self.heads = heads
+
+    @staticmethod
+    def _pack(keys, blocks, heads):
+        parts = (len(keys) + block_size - 1) // block_size
+        for i in range(parts):
+            block = keys[len(keys) * i // parts:len(keys) * (i + 1) // parts]
+            blocks.append("\n" + "\n".join(block) + "\n")
+            heads.append(block[0])
+
+    def __contains__(self, hostname):
+        key = _key(hostname)
+        return key is not None and self._has(key)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.ordered()
+
+    #True if hostname is a member or a subdomain of one,  the members are the scope.
+    def covers(self, hostname):
+        path = labels(hostname)
+        if not path:
+            return False
+        for i in range(1, len(path) + 1):
+            if self._has(sep.join(path[:i])):
+                return True
+        return False
+
+    #The sorted keys from first (included) to last (excluded),  all of them if
+    #first is None.
+    def _range(self, first = None, last = None):
+        i = 0
+        if first is not None:
+            i = max(bisect.bisect_right(self.heads, first) - 1, 0)
+        for block in self.blocks[i:]:
+            for key in block[1:-1].split("\n"):
+                if first is not None and key < first:
+                    continue
+                if last is not None and key >= last:
+                    return
+                yield key
+
+    #The members in DNS order (by reversed labels),  only the ones under
+    #domain (domain included) if it is given.  www_first puts www.x right
+    #after x,  the order of the Sublist3r reports.  The members are given as
+    #they were added.
+    def ordered(self, domain = None, www_first = False):
+        self._merge()
+        first = last = None
+        if domain is not None:
+            first = _key(domain)
+            if first is None:
+                return iter(())
+            last = first + "\1"
+        keys = self._range(first, last)
+        if www_first:
+            www = []
+            for block in self.blocks:
+                for match in _www.finditer(block):
+                    key = match.group()
+                    if (first is None or first <= key < last):
+                        www.append(key)
+            www.sort(key = _www_key)
+            hoisted = set(www)
+            keys = heapq.merge((key for key in keys if key not in hoisted), www,
+                               key = lambda key: _www_key(key) if key in hoisted else key)
+        return (self.spellings.get(key) or _name(key) for key in keys)
+
+#The hostnames in the order of ordered(),  as given.  The names that are not
+#hostnames ("a..example.com") or another spelling of one already there
+#("WWW.example.com" after "www.example.com") are not dropped:  they follow,
+#sorted by their reversed labels.
+def sorted_hostnames(hostnames, www_first = False):
+    names = hostname_table()
+    others = [hostname for hostname in hostnames if not names.add(hostname)]
+    others.sort(key = lambda hostname: str(hostname).split(".")[::-1])
+    return list(names.ordered(www_first = www_first)) + others
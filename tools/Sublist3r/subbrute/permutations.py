@@ -0,0 +1,118 @@
+#
+#Permutations of the subdomains already found.
+#
+#The best new hits are variations of known names:  dev-api,  api2,
+#api-staging.  permutations() turns the discovered hostnames into new
+#candidates lazily,  the most promising first,  so a cap on the number of
+#candidates only cuts off the long tail.
+#
+import re
+from collections import Counter
+
+try:
+    from . import wordlist
+except ImportError:
+    import wordlist
+
+#Environment and role words that often sit next to a name.
+common_words = ["dev", "staging", "stage", "test", "prod", "qa", "uat", "api", "admin", "internal",
+                "beta", "demo", "preprod", "int", "old", "new", "v1", "v2", "app", "web", "m", "mobile",
+                "portal", "cdn", "static", "mail", "vpn", "backup", "sandbox", "origin"]
+#Default cap on the number of candidates.
+default_limit = 50000
+
+token_split = re.compile(r"[-.]")
+number_match = re.compile(r"\d+")
+label_match = re.compile(r"^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?$")
+
+#The part of hostname in front of target,  or None if it is not a subdomain of target.
+def subdomain_part(hostname, target):
+    hostname = hostname.strip().lower().rstrip(".")
+    suffix = "." + target.lower()
+    if not hostname.endswith(suffix):
+        return None
+    return hostname[:-len(suffix)] or None
+
+#Words of the subdomains sorted by frequency,  like extract_subdomains() does for labels.
+def token_frequencies(subs):
+    tokens = Counter()
+    for sub in subs:
+        for token in token_split.split(sub):
+            token = number_match.sub("", token)
+            if len(token) >= 2:
+                tokens[token] += 1
+    return [t for t, n in tokens.most_common()]
+
+def valid(sub):
+    return all(label_match.match(label) for label in sub.split("."))
+
+#api2 => api1, api3, api4 ; api => api1, api2.  Zero padding is kept.
+def number_variations(sub):
+    first, dot, rest = sub.partition(".")
+    digits = list(number_match.finditer(first))
+    if not digits:
+        for n in ("1", "2"):
+            yield first + n + dot + rest
+        return
+    for d in digits:
+        n = int(d.group())
+        for m in (n - 1, n + 1, n + 2):
+            if m >= 0:
+                yield first[:d.start()] + str(m).zfill(len(d.group())) + first[d.end():] + dot + rest
+
+#Variations of sub with word,  the usual naming schemes first.
+def word_variations(sub, word):
+    first, dot, rest = sub.partition(".")
+    tokens = first.split("-")
+    if word in tokens:
+        return
+    yield "%s-%s%s%s" % (word, first, dot, rest)
+    yield "%s-%s%s%s" % (first, word, dot, rest)
+    #api-staging => api-dev
+    if len(tokens) > 1:
+        for i in range(len(tokens)):
+            yield "-".join(tokens[:i] + [word] + tokens[i + 1:]) + dot + rest
+    yield "%s.%s" % (word, sub)
+    yield "%s%s%s%s" % (word, first, dot, rest)
+    yield "%s%s%s%s" % (first, word, dot, rest)
+
+#Every word is tried with every name before the next,  less frequent,  word.
+def generate(subs, words):
+    for sub in subs:
+        for candidate in number_variations(sub):
+            yield candidate
+    for word in words:
+        for sub in subs:
+            for candidate in word_variations(sub, word):
+                yield candidate
+
+#hostnames are the subdomains found so far,  target the domain.
+#words are tried after the words of the found names and before common_words.
+#seen is a wordlist.hostname_set() of the hostnames already tried,  the
+#candidates are added to it.  At most limit candidates are generated.
+def permutations(hostnames, target, words = None, limit = default_limit, seen = None):
+    if seen is None:
+        seen = wordlist.hostname_set()
+    subs = set()
+    for hostname in hostnames:
+        seen.add(hostname.strip().rstrip("."))
+        sub = subdomain_part(hostname, target)
+        if sub:
+            subs.add(sub)
+    subs = list(subs)
+    #Short names have more siblings.
+    subs.sort(key = lambda s: (s.count("."), len(s), s))
+    ordered = token_frequencies(subs)
+    for word in (words or []) + common_words:
+        word = word.strip().lower()
+        if word and word not in ordered:
+            ordered.append(word)
+    count = 0
+    for sub in generate(subs, ordered):
+        if limit and count >= limit:
+            return
+        if valid(sub):
+            hostname = "%s.%s" % (sub, target)
+            if seen.add(hostname):
+                count += 1
+                yield hostname
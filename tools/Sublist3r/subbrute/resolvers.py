@@ -0,0 +1,211 @@
+#
+#Latency scored resolver pool for SubBrute.
+#
+#Every answer (or timeout) updates a moving average of the nameserver's
+#round trip time and error rate.  Queries go to the cheaper of two random
+#nameservers ("power of two choices"),  so fast resolvers get most of the
+#traffic,  and a few random picks keep the slow ones measured so they can
+#recover.  A nameserver that keeps failing is benched for a while.  The
+#scores are saved between runs,  so the next run verifies the known good
+#resolvers first and skips the known spam ones.
+#
+import time
+import random
+
+try:
+    from . import cache
+except ImportError:
+    import cache
+
+cache_name = "resolvers.json"
+#Scores older than this are forgotten,  resolvers come and go.
+max_age = 7 * 24 * 3600
+#Spam and good verdicts are checked again after a day.
+verdict_ttl = 24 * 3600
+#Share of the queries sent to a random nameserver,  to keep measuring the slow ones.
+explore = 0.02
+#Moving average weights of a new sample.
+rtt_weight = 0.2
+error_weight = 0.1
+#Bench a nameserver once its error rate is above bench_errors,  for
+#bench_time seconds the first time and twice as long on each relapse.
+bench_errors = 0.5
+bench_samples = 8
+bench_time = 10
+max_bench_time = 300
+
+class resolver_stats(object):
+
+    __slots__ = ("srtt", "errors", "samples", "verdict", "seen", "checked", "strikes")
+
+    def __init__(self, srtt, errors = 0.0, samples = 0, verdict = None, seen = 0):
+        self.srtt = srtt
+        self.errors = errors
+        self.samples = samples
+        #True if it passed the wildcard checks,  False if it is a spam DNS.
+        self.verdict = verdict
+        self.seen = seen
+        #When the verdict was given.
+        self.checked = seen
+        self.strikes = 0
+
+    #Expected cost of a query,  a failing resolver costs a retry.
+    def cost(self):
+        return self.srtt * (1 + 4 * self.errors)
+
+class resolver_pool(object):
+
+    def __init__(self, timeout = 2, persist = True):
+        self.timeout = timeout
+        self.persist = persist
+        #Unknown resolvers start out optimistic,  so they get tried.
+        self.initial_rtt = timeout / 4.0
+        self.stats = {}
+        #Nameservers that can be picked,  and the benched ones.
+        self.active = []
+        self.benched = {}
+        self.next_release = 0
+        if persist:
+            self.load()
+
+    def get(self, nameserver):
+        stats = self.stats.get(nameserver)
+        if stats is None:
+            stats = self.stats[nameserver] = resolver_stats(self.initial_rtt)
+        return stats
+
+    def verdict(self, nameserver):
+        stats = self.stats.get(nameserver)
+        return stats.verdict if stats else None
+
+    def set_verdict(self, nameserver, verdict):
+        stats = self.get(nameserver)
+        stats.verdict = verdict
+        stats.seen = stats.checked = time.time()
+
+    #Known spam nameservers are dropped,  known good ones come first and the
+    #rest keep their order (the caller shuffles it).
+    def ordered(self, nameservers):
+        ranked = []
+        for i, nameserver in enumerate(nameservers):
+            stats = self.stats.get(nameserver.strip())
+            if stats is None:
+                ranked.append((1, 0, i, nameserver))
+            elif stats.verdict is not False:
+                ranked.append((0 if stats.verdict else 1, stats.cost(), i, nameserver))
+        ranked.sort()
+        return [r[3] for r in ranked]
+
+    #Make a verified nameserver available to pick().
+    def add(self, nameserver):
+        self.get(nameserver)
+        if nameserver not in self.active and nameserver not in self.benched:
+            self.active.append(nameserver)
+
+    def __len__(self):
+        return len(self.active) + len(self.benched)
+
+    def pick(self):
+        if self.benched and time.time() >= self.next_release:
+            self.release()
+        active = self.active
+        if not active:
+            if not self.benched:
+                raise IndexError("No nameservers")
+            #Everything is benched,  use the one that comes back first.
+            return min(self.benched, key = self.benched.get)
+        if len(active) == 1:
+            return active[0]
+        if random.random() < explore:
+            return random.choice(active)
+        a, b = random.sample(active, 2)
+        if self.stats[a].cost() <= self.stats[b].cost():
+            return a
+        return b
+
+    def success(self, nameserver, rtt):
+        stats = self.get(nameserver)
+        stats.srtt += rtt_weight * (rtt - stats.srtt)
+        stats.errors -= error_weight * stats.errors
+        stats.samples += 1
+        if stats.errors < bench_errors / 2:
+            stats.strikes = 0
+
+    #A timeout also counts as a slow answer.
+    def failure(self, nameserver, rtt = None):
+        stats = self.get(nameserver)
+        if rtt is not None:
+            stats.srtt += rtt_weight * (rtt - stats.srtt)
+        stats.errors += error_weight * (1 - stats.errors)
+        stats.samples += 1
+        if stats.samples >= bench_samples and stats.errors > bench_errors and nameserver in self.active:
+            self.bench(nameserver)
+
+    def bench(self, nameserver):
+        stats = self.stats[nameserver]
+        self.active.remove(nameserver)
+        until = time.time() + min(bench_time << stats.strikes, max_bench_time)
+        stats.strikes += 1
+        self.benched[nameserver] = until
+        if len(self.benched) == 1 or until < self.next_release:
+            self.next_release = until
+
+    #Benched nameservers get another chance,  with a clean slate.
+    def release(self):
+        now = time.time()
+        for nameserver, until in list(self.benched.items()):
+            if until <= now:
+                del self.benched[nameserver]
+                stats = self.stats[nameserver]
+                stats.errors = bench_errors / 2
+                stats.samples = 0
+                self.active.append(nameserver)
+        if self.benched:
+            self.next_release = min(self.benched.values())
+
+    def load(self):
+        data = cache.load_json(cache_name)
+        if not isinstance(data, dict):
+            return
+        now = time.time()
+        for nameserver, s in data.get("resolvers", {}).items():
+            try:
+                if now - s["seen"] > max_age:
+                    continue
+                verdict = s.get("verdict")
+                if now - s.get("checked", 0) > verdict_ttl:
+                    verdict = None
+                stats = resolver_stats(float(s["srtt"]), float(s["errors"]), 0, verdict, s["seen"])
+                stats.checked = s.get("checked", 0)
+                self.stats[nameserver] = stats
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    #Merged with what other runs saved in the meantime:  the newer score
+    #(seen) and the newer verdict (checked) of each nameserver are kept.
+    def save(self):
+        if not self.persist:
+            return False
+        now = time.time()
+        resolvers = {}
+        data = cache.load_json(cache_name)
+        if isinstance(data, dict) and isinstance(data.get("resolvers"), dict):
+            for nameserver, s in data["resolvers"].items():
+                try:
+                    if now - s["seen"] <= max_age:
+                        resolvers[nameserver] = {"srtt": float(s["srtt"]), "errors": float(s["errors"]),
+                                                 "verdict": s.get("verdict"), "seen": int(s["seen"]),
+                                                 "checked": int(s.get("checked", 0))}
+                except (KeyError, TypeError, ValueError):
+                    continue
+        for nameserver, stats in self.stats.items():
+            if stats.samples:
+                stats.seen = now
+            if now - stats.seen > max_age:
+                continue
+            entry = resolvers.setdefault(nameserver, {"seen": -1, "checked": -1})
+            if int(stats.seen) >= entry["seen"]:
+                entry.update({"srtt": round(stats.srtt, 4), "errors": round(stats.errors, 4), "seen": int(stats.seen)})
+            if int(stats.checked) >= entry["checked"]:
+                entry.update({"verdict": stats.verdict, "checked": int(stats.checked)})
+        return cache.save_json(cache_name, {"resolvers": resolvers})
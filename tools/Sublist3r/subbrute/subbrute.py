@@ -14,11 +14,32 @@ import signal
 import sys
 import uuid
 import random
+import time
 import ctypes
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import dns.resolver
 import dns.rdatatype
+import dns.rdataclass
+import dns.rcode
+import dns.message
+import dns.name
+import dns.exception
 import json
 
+#Sibling modules,  subbrute.py can also run as a script from its own folder.
+try:
+    from . import wordlist
+    from . import resolvers
+    from . import cache
+    from . import hostset
+except ImportError:
+    import wordlist
+    import resolvers
+    import cache
+    import hostset
+
 #Python 2.x and 3.x compatiablity
 #We need the Queue library for exception handling
 try:
@@ -32,12 +53,11 @@ import multiprocessing
 #Microsoft compatiablity
 if  sys.platform.startswith('win'):
     #Drop-in replacement,  subbrute + multiprocessing throws exceptions on windows.
-    import threading
     multiprocessing.Process = threading.Thread
 
 class verify_nameservers(multiprocessing.Process):
 
-    def __init__(self, target, record_type, resolver_q, resolver_list, wildcards):
+    def __init__(self, target, record_type, resolver_q, resolver_list, wildcards, resolver_verdicts = None, pool = None, wildcard_cache = None, port = 53):
         multiprocessing.Process.__init__(self, target = self.run)
         self.daemon = True
         signal_init()
@@ -45,6 +65,15 @@ class verify_nameservers(multiprocessing.Process):
         self.time_to_die = False
         self.resolver_q = resolver_q
         self.wildcards = wildcards
+        #nameserver => True if it was usable, False if it is a spam DNS.
+        #Shared by the runs of a batch,  so each run starts with the known good ones.
+        if resolver_verdicts is None:
+            resolver_verdicts = {}
+        self.resolver_verdicts = resolver_verdicts
+        #Scores of previous runs,  the wildcard checks are timed to update them.
+        if pool is None:
+            pool = resolvers.resolver_pool()
+        self.pool = pool
         #Do we need wildcards for other types of records?
         #This needs testing!
         self.record_type = "A"
@@ -54,6 +83,10 @@ class verify_nameservers(multiprocessing.Process):
         resolver = dns.resolver.Resolver()
         #The domain provided by the user.
         self.target = target
+        #Wildcard answers of the resolvers that were checked by a recent run.
+        if wildcard_cache is None:
+            wildcard_cache = cache.wildcard_cache(target, self.record_type)
+        self.wildcard_cache = wildcard_cache
         #1 website in the world,  modify the following line when this status changes.
         #www.google.cn,  I'm looking at you ;)
         self.most_popular_website = "www.google.com"
@@ -71,6 +104,7 @@ class verify_nameservers(multiprocessing.Process):
         except:
             #Our connection is slower than a junebug in molasses
             resolver = dns.resolver.Resolver()
+        resolver.port = port
         self.resolver = resolver
 
     def end(self):
@@ -96,32 +130,55 @@ class verify_nameservers(multiprocessing.Process):
                 break
             server = server.strip()
             if server:
+                cached = self.wildcard_cache.get(server)
+                if cached is not None:
+                    #Checked by a recent run,  no need to ask again.
+                    for w in cached:
+                        self.wildcards[w] = None
+                    self.add_nameserver(server)
+                    self.resolver_verdicts[server] = True
+                    added_resolver = True
+                    continue
                 self.resolver.nameservers = [server]
+                started = time.time()
                 try:
                     #test_result = self.resolver.query(self.most_popular_website, "A")
                     #should throw an exception before this line.
                     if True:#test_result:
                         #Only add the nameserver to the queue if we can detect wildcards. 
-                        if(self.find_wildcards(self.target)):# and self.find_wildcards(".com")
+                        found = []
+                        if(self.find_wildcards(self.target, found)):# and self.find_wildcards(".com")
                             #wildcards have been added to the set, it is now safe to be added to the queue.
+                            self.wildcard_cache.put(server, found)
+                            #The checks take at least two queries.
+                            self.pool.success(server, (time.time() - started) / 2)
+                            self.pool.set_verdict(server, True)
                             #blocking queue,  this process will halt on put() when the queue is full:
                             self.add_nameserver(server)
+                            self.resolver_verdicts[server] = True
                             added_resolver = True
                         else:
                             trace("Rejected nameserver - wildcard:", server)
+                            self.pool.failure(server, time.time() - started)
                 except Exception as e:
                     #Rejected server :(
                     trace("Rejected nameserver - unreliable:", server, type(e)) 
+                    self.pool.failure(server, time.time() - started)
         return added_resolver
 
     def run(self):
         #Every user will get a different set of resovlers, this helps redistribute traffic.
         random.shuffle(self.resolver_list)
-        if not self.verify(self.resolver_list):
+        #Known spam nameservers are skipped,  the ones that worked before are tried first,  fastest first.
+        resolver_list = [s for s in self.pool.ordered(self.resolver_list) if self.resolver_verdicts.get(s.strip()) is not False]
+        resolver_list.sort(key = lambda s: not self.resolver_verdicts.get(s.strip(), False))
+        if not self.verify(resolver_list):
             #This should never happen,  inform the user.
             sys.stderr.write('Warning: No nameservers found, trying fallback list.\n')
             #Try and fix it for the user:
             self.verify(self.backup_resolver)
+        self.pool.save()
+        self.wildcard_cache.save()
         #End of the resolvers list.
         try:
             self.resolver_q.put(False, timeout = 1)
@@ -129,8 +186,8 @@ class verify_nameservers(multiprocessing.Process):
             pass
 
     #Only add the nameserver to the queue if we can detect wildcards. 
-    #Returns False on error.
-    def find_wildcards(self, host):
+    #Returns False on error.  The wildcard answers of this nameserver are appended to found.
+    def find_wildcards(self, host, found = None):
         #We want sovle the following three problems:
         #1)The target might have a wildcard DNS record.
         #2)The target maybe using geolocaiton-aware DNS.
@@ -141,6 +198,8 @@ class verify_nameservers(multiprocessing.Process):
              wildtest = self.resolver.query(uuid.uuid4().hex + ".com", "A")
              if len(wildtest):
                 trace("Spam DNS detected:", host)
+                self.resolver_verdicts[self.resolver.nameservers[0]] = False
+                self.pool.set_verdict(self.resolver.nameservers[0], False)
                 return False
         except:
             pass
@@ -157,6 +216,8 @@ class verify_nameservers(multiprocessing.Process):
                 if wildtest:
                     for w in wildtest:
                         w = str(w)
+                        if found is not None:
+                            found.append(w)
                         if w not in self.wildcards:
                             #wildcards were detected.
                             self.wildcards[w] = None
@@ -176,25 +237,36 @@ class verify_nameservers(multiprocessing.Process):
 
 class lookup(multiprocessing.Process):
 
-    def __init__(self, in_q, out_q, resolver_q, domain, wildcards, spider_blacklist):
+    def __init__(self, in_q, out_q, resolver_q, domain, wildcards, spider_blacklist, answers = None, port = 53, record_types = None, cnames = None):
         multiprocessing.Process.__init__(self, target = self.run)
         signal_init()
         self.required_nameservers = 16
+        #Answers of previous scans,  the names that did not exist are skipped.
+        if answers is None:
+            answers = cache.answer_cache()
+        self.answers = answers
         self.in_q = in_q
         self.out_q = out_q
         self.resolver_q = resolver_q        
         self.domain = domain
+        self.scope = hostset.hostname_table([domain])
         self.wildcards = wildcards
         self.spider_blacklist = spider_blacklist
+        #A, AAAA and CNAME together,  see async_lookup.check_records().
+        self.record_types = record_types
+        if cnames is None:
+            cnames = cname_cache()
+        self.cnames = cnames
         self.resolver = dns.resolver.Resolver()
         #Force pydns to use our nameservers
         self.resolver.nameservers = []
+        self.resolver.port = port
 
     def get_ns(self):
         ret = []
         try:
             ret = [self.resolver_q.get_nowait()]
-            if ret == False:
+            if ret == [False]:
                 #Queue is empty,  inform the rest.
                 self.resolver_q.put(False)
                 ret = []
@@ -205,16 +277,79 @@ class lookup(multiprocessing.Process):
     def get_ns_blocking(self):
         ret = []
         ret = [self.resolver_q.get()]
-        if ret == False:
+        if ret == [False]:
             trace("get_ns_blocking - Resolver list is empty.")
             #Queue is empty,  inform the rest.
             self.resolver_q.put(False)
             ret = []
         return ret
 
-    def check(self, host, record_type = "A", retries = 0):
+    #The CNAME chain of host,  read from the response to its A query.
+    def cname_chain(self, host, response):
+        self.cnames.learn(response)
+        chain, complete = self.cnames.chain(host)
+        while not complete:
+            name = chain[-1] if chain else host
+            try:
+                self.cnames.learn(self.resolver.query(name, "CNAME").response)
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                pass
+            if self.cnames.targets.get(name) is None:
+                self.cnames.targets[name] = ""
+            chain, complete = self.cnames.chain(host)
+        return chain
+
+    #rdtype records of a canonical name,  resolved once per run.
+    def canonical_records(self, name, rdtype):
+        records = self.cnames.get(name, rdtype)
+        if records is None:
+            try:
+                records = self.resolver.query(name, rdtype)
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                records = []
+            except Exception:
+                #Not worth a retry,  the host is reported without them.
+                return []
+            self.cnames.put(name, rdtype, records)
+            records = self.cnames.get(name, rdtype)
+        return records
+
+    #Same as async_lookup.check_records()
+    def check_records(self, host, retries = 0):
+        cached = dict((t, self.answers.get(host, t)) for t in self.record_types)
+        if None not in cached.values():
+            trace("Cached answer:", host)
+            return any(cached.values()) and cached
+        resp = self.check(host, "A", retries, cached = False)
+        if resp is False:
+            #An NXDOMAIN is cached for every record type by check().
+            return False
+        if isinstance(resp, list):
+            #Timed out too many times.
+            return dict((t, resp) for t in self.record_types)
+        response = resp.response
+        #A host without A records can still have AAAA ones,  NoAnswer is not raised.
+        records = {"A": [str(a) for a in resp.rrset or []], "AAAA": [], "CNAME": []}
+        try:
+            records["CNAME"] = self.cname_chain(host, response)
+            canonical = records["CNAME"][-1] if records["CNAME"] else host
+            if "AAAA" in self.record_types:
+                records["AAAA"] = self.canonical_records(canonical, "AAAA")
+        except Exception as e:
+            trace("Problem processing host:", host, type(e))
+        ttl = answer_ttl(response)
+        records = dict((t, records[t]) for t in self.record_types)
+        for t in self.record_types:
+            self.answers.put(host, t, records[t], ttl if records[t] else negative_ttl(response))
+        return records
+
+    def check(self, host, record_type = "A", retries = 0, cached = True):
         trace("Checking:", host)
-        cname_record = []
+        if cached:
+            cached = self.answers.get(host, record_type or "A")
+            if cached is not None:
+                trace("Cached answer:", host)
+                return cached or False
         retries = 0        
         if len(self.resolver.nameservers) <= self.required_nameservers:
             #This process needs more nameservers,  lets see if we have one avaible
@@ -224,31 +359,29 @@ class lookup(multiprocessing.Process):
             try:
                 #Query the nameserver, this is not simple...
                 if not record_type or record_type == "A":
-                    resp = self.resolver.query(host)
+                    resp = self.resolver.query(host, raise_on_no_answer = not self.record_types)
                     #Crawl the response
-                    hosts = extract_hosts(str(resp.response), self.domain)
+                    hosts = extract_hosts(str(resp.response), self.scope)
                     for h in hosts:
-                        if h not in self.spider_blacklist:
+                        #The answer repeats the question.
+                        if h != host and h not in self.spider_blacklist:
                             self.spider_blacklist[h]=None
                             trace("Found host with spider:", h)
                             self.in_q.put((h, record_type, 0))
+                    if resp.rrset is not None:
+                        self.answers.put(host, "A", resp, resp.rrset.ttl)
                     return resp
                 if record_type == "CNAME":
-                    #A max 20 lookups
-                    for x in range(20):
-                        try:
-                            resp = self.resolver.query(host, record_type)
-                        except dns.resolver.NoAnswer:
-                            resp = False
-                            pass
-                        if resp and resp[0]:
-                            host = str(resp[0]).rstrip(".")
-                            cname_record.append(host)
-                        else:
-                            return cname_record                    
+                    #The answer to the A query holds the chain.
+                    resp = self.resolver.query(host, "A", raise_on_no_answer = False)
+                    chain = self.cname_chain(host, resp.response)
+                    self.answers.put(host, record_type, chain, answer_ttl(resp.response))
+                    return chain
                 else:
                     #All other records:
-                    return self.resolver.query(host, record_type)
+                    resp = self.resolver.query(host, record_type)
+                    self.answers.put(host, record_type, resp, resp.rrset.ttl)
+                    return resp
 
             except Exception as e:
                 if type(e) == dns.resolver.NoNameservers:
@@ -260,11 +393,13 @@ class lookup(multiprocessing.Process):
                     return False
                 elif type(e) == dns.resolver.NXDOMAIN:
                     #"Non-existent domain name."
+                    self.answers.put_nxdomain(host, nxdomain_ttl(e))
                     return False
                 elif type(e) == dns.resolver.NoAnswer:
                     #"The response did not contain an answer."
                     if retries >= 1:
                         trace("NoAnswer retry")
+                        self.answers.put_nodata(host, record_type or "A", negative_ttl(e.kwargs.get("response")))
                         return False
                     retries += 1
                 elif type(e) == dns.resolver.Timeout:
@@ -275,7 +410,7 @@ class lookup(multiprocessing.Process):
                             #Sometimes 'internal use' subdomains will timeout for every request.
                             #As far as I'm concerned, the authorative name server has told us this domain exists,
                             #we just can't know the address value using this method.
-                            return ['Mutiple Query Timeout - External address resolution was restricted']
+                            return [timeout_answer]
                         else:
                             #Maybe another process can take a crack at it.
                             self.in_q.put((host, record_type, retries + 1))
@@ -301,8 +436,11 @@ class lookup(multiprocessing.Process):
     def run(self):
         #This process needs one resolver before it can start looking.
         self.resolver.nameservers += self.get_ns_blocking()
+        if not self.resolver.nameservers:
+            #More processes than nameservers,  the others will do the work.
+            self.out_q.put(False)
+            return
         while True:
-            found_addresses = []
             work = self.in_q.get()
             #Check if we have hit the end marker
             while not work:
@@ -321,51 +459,648 @@ class lookup(multiprocessing.Process):
             if not work:
                 #Perpetuate the end marker for all threads to see
                 self.in_q.put(False)
+                self.answers.close()
                 #Notify the parent that we have died of natural causes
                 self.out_q.put(False)
                 break
             else:
+                timeout_retries = 0
                 if len(work) == 3:
                     #keep track of how many times this lookup has timedout.
                     (hostname, record_type, timeout_retries) = work
-                    response = self.check(hostname, record_type, timeout_retries)
                 else:
                     (hostname, record_type) = work
-                    response = self.check(hostname, record_type) 
+                if self.record_types:
+                    records = self.check_records(hostname, timeout_retries)
+                else:
+                    response = self.check(hostname, record_type, timeout_retries)
+                    records = response and {record_type: response}
                 sys.stdout.flush()
-                trace(response)                  
+                trace(records)
                 #self.wildcards is populated by the verify_nameservers() thread.
                 #This variable doesn't need a muetex, because it has a queue. 
                 #A queue ensure nameserver cannot be used before it's wildcard entries are found.
-                reject = False
-                if response:
-                    for a in response:
-                        a = str(a)
-                        if a in self.wildcards:
-                            trace("resovled wildcard:", hostname)
-                            reject= True
-                            #reject this domain.
-                            break;
-                        else:
-                            found_addresses.append(a)
-                    if not reject:
+                if records:
+                    for record_type, found_addresses in filter_wildcards(hostname, records, self.wildcards):
                         #This request is filled, send the results back  
-                        result = (hostname, record_type, found_addresses)
-                        self.out_q.put(result)
+                        self.out_q.put((hostname, record_type, found_addresses))
+
+#One UDP socket shared by all the queries in flight,  answers are matched
+#back to their query by (query id, nameserver).
+class dns_protocol(asyncio.DatagramProtocol):
+
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            response = dns.message.from_wire(data)
+        except Exception:
+            #Garbage or a truncated packet,  the query will time out.
+            return
+        waiting = self.pending.get((response.id, addr[0]))
+        if waiting:
+            query, future = waiting
+            if not future.done() and query.is_response(response):
+                future.set_result(response)
+
+    def error_received(self, exc):
+        #ICMP errors are not tied to a query,  the query will time out.
+        pass
+
+    def connection_lost(self, exc):
+        for query, future in self.pending.values():
+            if not future.done():
+                future.set_exception(dns.resolver.NoNameservers())
+
+    async def query(self, host, rdtype, nameserver, port, timeout):
+        query = dns.message.make_query(host, rdtype)
+        key = (query.id, nameserver)
+        while key in self.pending:
+            query.id = random.randint(0, 65535)
+            key = (query.id, nameserver)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = (query, future)
+        try:
+            self.transport.sendto(query.to_wire(), (nameserver, port))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise dns.exception.Timeout()
+        finally:
+            del self.pending[key]
+
+#Find the answer for host in a response,  following the CNAME chain like dns.resolver does.
+def answer_rrset(response, host, rdtype):
+    name = dns.name.from_text(host)
+    for x in range(16):
+        try:
+            return response.find_rrset(response.answer, name, dns.rdataclass.IN, rdtype)
+        except KeyError:
+            pass
+        try:
+            cname = response.find_rrset(response.answer, name, dns.rdataclass.IN, dns.rdatatype.CNAME)
+        except KeyError:
+            return None
+        name = cname[0].target
+    return None
+
+#Smallest TTL of the records in a response,  None if it has no answer.
+def answer_ttl(response):
+    ttls = [rrset.ttl for rrset in response.answer]
+    if not ttls:
+        return None
+    return min(ttls)
+
+#TTL of a negative answer:  the SOA of its authority section (RFC 2308),
+#None if there is none.
+def negative_ttl(response):
+    if response is None:
+        return None
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA:
+            return min(rrset.ttl, rrset[0].minimum)
+    return None
+
+#An NXDOMAIN error that keeps the response,  like the ones of dns.resolver.
+def nxdomain_error(host, response):
+    qname = dns.name.from_text(host)
+    return dns.resolver.NXDOMAIN(qnames = [qname], responses = {qname: response})
+
+#TTL of the NXDOMAIN error e,  see negative_ttl().
+def nxdomain_ttl(e):
+    for response in (e.kwargs.get("responses") or {}).values():
+        return negative_ttl(response)
+    return None
+
+#Reported instead of the records of a host that timed out on every try.
+timeout_answer = "Multiple Query Timeout - External address resolution was restricted"
+
+#Record types that are resolved together,  in one pass per host:  --type A,AAAA,CNAME
+multi_types = ["A", "AAAA", "CNAME"]
+
+#The record types of a comma separated record_type,  None if it is a single type.
+def record_types(record_type):
+    if not record_type or "," not in record_type:
+        return None
+    types = []
+    for t in record_type.upper().split(","):
+        t = t.strip()
+        if t not in multi_types:
+            error("Only A, AAAA and CNAME records can be resolved together:", record_type)
+        if t not in types:
+            types.append(t)
+    return types
+
+#CNAME chains and the records of canonical names seen during a run.
+#The answer to an A query holds the whole CNAME chain of the host,  so the
+#chain is read from it instead of one CNAME query per hop.  Thousands of hosts
+#point at the same few CDN names,  their records are only resolved once.
+#targets maps a name to its CNAME target,  or to "" if it has none,  records
+#maps "name/rdtype" to the answers of a name.  Both can be Manager() dicts
+#shared by the lookup processes.
+max_chain = 20
+
+class cname_cache(object):
+
+    def __init__(self, targets = None, records = None):
+        self.targets = {} if targets is None else targets
+        self.records = {} if records is None else records
+
+    def learn(self, response):
+        for rrset in response.answer:
+            name = str(rrset.name).rstrip(".").lower()
+            if rrset.rdtype == dns.rdatatype.CNAME:
+                self.targets[name] = str(rrset[0].target).rstrip(".").lower()
+            elif rrset.rdtype in (dns.rdatatype.A, dns.rdatatype.AAAA):
+                self.put(name, dns.rdatatype.to_text(rrset.rdtype), rrset)
+
+    #name has no CNAME,  these are its answers (an empty list if there are none).
+    def put(self, name, rdtype, answers):
+        name = name.rstrip(".").lower()
+        self.targets[name] = ""
+        self.records["%s/%s" % (name, rdtype)] = [str(a) for a in answers]
+
+    def get(self, name, rdtype):
+        return self.records.get("%s/%s" % (name.rstrip(".").lower(), rdtype))
+
+    #The chain of host as far as it is known,  and whether it is complete.
+    def chain(self, host):
+        chain = []
+        name = host.rstrip(".").lower()
+        for x in range(max_chain):
+            target = self.targets.get(name)
+            if not target:
+                return chain, target is not None
+            chain.append(target)
+            name = target
+        #Too long or a loop,  asking again will not help.
+        return chain, True
+
+#Event loop replacement for verify_nameservers + lookup.
+#Instead of process_count processes doing one blocking query each, a few
+#UDP sockets keep process_count * queries_per_process queries in flight.
+#The semantics are the same: nameservers are only used once their wildcard
+#answers are known, answers matching a wildcard are rejected, A responses
+#are spidered for more hosts, NoAnswer is retried once and Timeout 3 times.
+#subdomains can be any iterable,  it is consumed lazily and only a window of
+#twice the queries in flight is queued at a time.
+#Queries are routed by a resolvers.resolver_pool,  which scores every
+#nameserver by latency and error rate and remembers the scores between runs.
+class async_lookup(object):
+
+    queries_per_process = 64
+    socket_count = 4
+    verify_concurrency = 32
+
+    def __init__(self, target, record_type, subdomains, resolver_list, process_count = 16, resolver_verdicts = None, timeout = 2, port = 53, pool = None, wildcard_cache = None, answers = None):
+        self.target = target
+        self.record_type = record_type
+        self.subdomains = subdomains
+        self.resolver_list = [r.strip() for r in resolver_list if r.strip()]
+        self.max_in_flight = max(1, process_count * self.queries_per_process)
+        if resolver_verdicts is None:
+            resolver_verdicts = {}
+        self.resolver_verdicts = resolver_verdicts
+        self.timeout = timeout
+        self.port = port
+        if pool is None:
+            pool = resolvers.resolver_pool(timeout)
+        self.pool = pool
+        #A, AAAA and CNAME together.
+        self.record_types = record_types(record_type)
+        self.wildcard_type = "A"
+        if record_type == "AAAA":
+            self.wildcard_type = record_type
+        self.wildcards = {}
+        if wildcard_cache is None:
+            wildcard_cache = cache.wildcard_cache(target, self.wildcard_type)
+        self.wildcard_cache = wildcard_cache
+        #Answers of previous scans,  the names that did not exist are skipped.
+        if answers is None:
+            answers = cache.answer_cache()
+        self.answers = answers
+        #The answer cache is sqlite behind a lock,  it is only used from this
+        #thread so a flush never stalls the event loop.
+        self.cache_thread = None
+        self.spider_blacklist = wordlist.hostname_set()
+        self.scope = hostset.hostname_table([target])
+        self.cnames = cname_cache()
+        #Canonical name lookups in flight,  hosts that share a CDN name wait for the same one.
+        self.resolving = {}
+        self.nameservers = []
+        self.protocols = []
+        self.next_protocol = 0
+        self.loop = None
+        self.task = None
+
+    def pick_protocol(self):
+        self.next_protocol = (self.next_protocol + 1) % len(self.protocols)
+        return self.protocols[self.next_protocol]
+
+    #The response of a nameserver,  NXDOMAIN responses included:  their answer
+    #section can hold the CNAME chain of a dangling name.
+    async def exchange(self, host, rdtype, nameserver = None):
+        if nameserver is None:
+            nameserver = self.pool.pick()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            response = await self.pick_protocol().query(host, rdtype, nameserver, self.port, self.timeout)
+        except dns.exception.Timeout:
+            self.pool.failure(nameserver, self.timeout)
+            raise
+        rcode = response.rcode()
+        if rcode == dns.rcode.REFUSED:
+            self.pool.failure(nameserver, loop.time() - started)
+        else:
+            #A SERVFAIL is usually the fault of the target's nameservers.
+            self.pool.success(nameserver, loop.time() - started)
+        if rcode not in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+            #SERVFAIL, REFUSED...  another nameserver should try this host.
+            raise dns.resolver.NoNameservers()
+        return response
+
+    async def query(self, host, rdtype, nameserver = None):
+        response = await self.exchange(host, rdtype, nameserver)
+        if response.rcode() == dns.rcode.NXDOMAIN:
+            raise nxdomain_error(host, response)
+        rrset = answer_rrset(response, host, rdtype)
+        if rrset is None:
+            raise dns.resolver.NoAnswer(response = response)
+        return rrset, response
+
+    #Same checks as verify_nameservers.find_wildcards()
+    async def find_wildcards(self, nameserver, found = None):
+        try:
+            #Spam nameservers answer for domains that do not exist.
+            await self.query(uuid.uuid4().hex + ".com", "A", nameserver)
+            trace("Spam DNS detected:", nameserver)
+            self.resolver_verdicts[nameserver] = False
+            self.pool.set_verdict(nameserver, False)
+            return False
+        except Exception:
+            pass
+        test_counter = 8
+        looking_for_wildcards = True
+        while looking_for_wildcards and test_counter >= 0:
+            looking_for_wildcards = False
+            test_counter -= 1
+            try:
+                testdomain = "%s.%s" % (uuid.uuid4().hex, self.target)
+                wildtest, response = await self.query(testdomain, self.wildcard_type, nameserver)
+                for w in wildtest:
+                    w = str(w)
+                    if found is not None:
+                        found.append(w)
+                    if w not in self.wildcards:
+                        self.wildcards[w] = None
+                        looking_for_wildcards = True
+            except (dns.resolver.NXDOMAIN, dns.name.EmptyLabel):
+                return True
+            except Exception as e:
+                trace("wildcard exception:", nameserver, type(e))
+                return False
+        return (test_counter >= 0)
+
+    async def verify(self, nameserver):
+        found = self.wildcard_cache.get(nameserver)
+        if found is not None:
+            #Checked by a recent run,  no need to ask again.
+            for w in found:
+                self.wildcards[w] = None
+        else:
+            found = []
+            if not await self.find_wildcards(nameserver, found):
+                trace("Rejected nameserver:", nameserver)
+                return
+            self.wildcard_cache.put(nameserver, found)
+        trace("Added nameserver:", nameserver)
+        self.resolver_verdicts[nameserver] = True
+        self.pool.set_verdict(nameserver, True)
+        self.pool.add(nameserver)
+        self.nameservers.append(nameserver)
+        self.ready.set()
+
+    async def verify_all(self, resolver_list):
+        pending = set()
+        try:
+            for nameserver in resolver_list:
+                if ":" in nameserver:
+                    #The sockets are IPv4.
+                    continue
+                if len(pending) >= self.verify_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+                pending.add(asyncio.ensure_future(self.verify(nameserver)))
+            if pending:
+                await asyncio.wait(pending)
+        except asyncio.CancelledError:
+            #The lookups can be done before the slow nameservers are verified.
+            for task in pending:
+                task.cancel()
+            raise
+
+    async def verify_nameservers(self):
+        #Every user will get a different set of resovlers, this helps redistribute traffic.
+        random.shuffle(self.resolver_list)
+        #Known spam nameservers are skipped,  the ones that worked before are tried first,  fastest first.
+        resolver_list = [s for s in self.pool.ordered(self.resolver_list) if self.resolver_verdicts.get(s) is not False]
+        resolver_list.sort(key = lambda s: not self.resolver_verdicts.get(s, False))
+        await self.verify_all(resolver_list)
+        if not self.nameservers:
+            sys.stderr.write('Warning: No nameservers found, trying fallback list.\n')
+            await self.verify_all(dns.resolver.Resolver().nameservers + ['127.0.0.1', '8.8.8.8', '8.8.4.4'])
+        if not self.nameservers:
+            sys.stderr.write('Error: No usable nameservers.\n')
+        #Unblock the workers,  with no nameservers they stop right away.
+        self.ready.set()
+
+    #The CNAME chain of host,  read from the response to its A query.  CNAME
+    #queries are only sent for the hops left out,  once per name and run.
+    async def cname_chain(self, host, response = None):
+        if response is None:
+            response = await self.exchange(host, "A")
+        self.cnames.learn(response)
+        chain, complete = self.cnames.chain(host)
+        if response.rcode() == dns.rcode.NXDOMAIN:
+            if not chain:
+                raise nxdomain_error(host, response)
+            #A dangling CNAME,  the last name does not exist.
+            self.cnames.targets[chain[-1]] = ""
+            complete = True
+        while not complete:
+            name = chain[-1] if chain else host
+            response = await self.exchange(name, "CNAME")
+            self.cnames.learn(response)
+            if self.cnames.targets.get(name) is None:
+                #No CNAME,  or a dangling one.
+                self.cnames.targets[name] = ""
+            chain, complete = self.cnames.chain(host)
+        return chain
+
+    #rdtype records of a canonical name,  resolved once per run.
+    #None if the nameservers kept failing.
+    async def canonical_records(self, name, rdtype):
+        records = self.cnames.get(name, rdtype)
+        if records is not None:
+            return records
+        key = (name, rdtype)
+        task = self.resolving.get(key)
+        if task is None:
+            task = self.resolving[key] = asyncio.ensure_future(self.resolve_canonical(name, rdtype))
+        #A cancelled worker must not cancel the lookup the others wait for.
+        return await asyncio.shield(task)
+
+    async def resolve_canonical(self, name, rdtype):
+        records = None
+        try:
+            for x in range(4):
+                try:
+                    resp, response = await self.query(name, rdtype)
+                    records = resp
+                    break
+                except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                    records = []
+                    break
+                except (dns.exception.Timeout, dns.resolver.NoNameservers):
+                    pass
+        finally:
+            del self.resolving[(name, rdtype)]
+        if records is None:
+            return None
+        self.cnames.put(name, rdtype, records)
+        return self.cnames.get(name, rdtype)
+
+    #The cached answers of host for rdtypes,  read by the cache thread.
+    async def cached(self, host, rdtypes):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cache_thread, lambda: dict((t, self.answers.get(host, t)) for t in rdtypes))
+
+    #Writes to the cache are not waited for,  the cache thread runs them in order.
+    def cache(self, method, *args):
+        self.cache_thread.submit(method, *args)
+
+    #A, AAAA and CNAME records of host in one pass:  the A query brings the
+    #CNAME chain along and the AAAA records are asked for the canonical name,
+    #which many hosts share.  Returns the answers by record type,  or False.
+    async def check_records(self, host, retries = 0, spidered = None):
+        trace("Checking:", host)
+        cached = await self.cached(host, self.record_types)
+        if None not in cached.values():
+            trace("Cached answer:", host)
+            return any(cached.values()) and cached
+        failures = 0
+        while True:
+            try:
+                response = await self.exchange(host, "A")
+                chain = await self.cname_chain(host, response)
+                break
+            except dns.resolver.NXDOMAIN as e:
+                self.cache(self.answers.put_nxdomain, host, nxdomain_ttl(e))
+                return False
+            except dns.exception.Timeout:
+                trace("lookup failure:", host, retries)
+                if retries >= 3:
+                    return dict((t, [timeout_answer]) for t in self.record_types)
+                retries += 1
+            except dns.resolver.NoNameservers:
+                if failures >= 3:
+                    return False
+                failures += 1
+        records = {"A": [], "AAAA": [], "CNAME": chain}
+        canonical = chain[-1] if chain else host
+        #A dangling CNAME has an NXDOMAIN response,  and no addresses.
+        if response.rcode() == dns.rcode.NOERROR:
+            for h in extract_hosts(str(response), self.scope):
+                if self.spider_blacklist.add(h):
+                    trace("Found host with spider:", h)
+                    spidered.append((h, self.record_type, 0))
+            records["A"] = self.cnames.get(canonical, "A") or []
+            if "AAAA" in self.record_types:
+                records["AAAA"] = await self.canonical_records(canonical, "AAAA") or []
+        ttl = answer_ttl(response)
+        records = dict((t, records[t]) for t in self.record_types)
+        for t in self.record_types:
+            self.cache(self.answers.put, host, t, records[t], ttl if records[t] else negative_ttl(response))
+        return any(records.values()) and records
+
+    #Spidered hosts are appended to spidered,  the worker resolves them next.
+    async def check(self, host, record_type, retries = 0, spidered = None):
+        trace("Checking:", host)
+        rdtype = record_type or "A"
+        cached = (await self.cached(host, [rdtype]))[rdtype]
+        if cached is not None:
+            trace("Cached answer:", host)
+            return cached or False
+        no_answer_retries = 0
+        failures = 0
+        while True:
+            try:
+                if rdtype == "A":
+                    resp, response = await self.query(host, "A")
+                    #Crawl the response
+                    for h in extract_hosts(str(response), self.scope):
+                        if self.spider_blacklist.add(h):
+                            trace("Found host with spider:", h)
+                            spidered.append((h, record_type, 0))
+                    self.cache(self.answers.put, host, rdtype, resp, resp.ttl)
+                    return resp
+                if rdtype == "CNAME":
+                    response = await self.exchange(host, "A")
+                    chain = await self.cname_chain(host, response)
+                    self.cache(self.answers.put, host, rdtype, chain, answer_ttl(response))
+                    return chain
+                #All other records:
+                resp, response = await self.query(host, rdtype)
+                self.cache(self.answers.put, host, rdtype, resp, resp.ttl)
+                return resp
+            except dns.resolver.NXDOMAIN as e:
+                #"Non-existent domain name."
+                self.cache(self.answers.put_nxdomain, host, nxdomain_ttl(e))
+                return False
+            except dns.resolver.NoAnswer as e:
+                #"The response did not contain an answer."
+                if no_answer_retries >= 1:
+                    trace("NoAnswer retry")
+                    self.cache(self.answers.put_nodata, host, rdtype, negative_ttl(e.kwargs.get("response")))
+                    return False
+                no_answer_retries += 1
+            except dns.exception.Timeout:
+                trace("lookup failure:", host, retries)
+                if retries >= 3:
+                    #Sometimes 'internal use' subdomains will timeout for every request.
+                    #As far as I'm concerned, the authorative name server has told us this domain exists,
+                    #we just can't know the address value using this method.
+                    return [timeout_answer]
+                retries += 1
+            except dns.resolver.NoNameservers:
+                #Let another nameserver take a crack at it.
+                if failures >= 3:
+                    return False
+                failures += 1
+
+    async def worker(self, results):
+        await self.ready.wait()
+        while self.nameservers:
+            work = [await self.in_q.get()]
+            try:
+                #Spidered hosts are not put back in the bounded queue,  a worker
+                #blocked on a full queue could never drain it.
+                while work:
+                    (hostname, record_type, retries) = work.pop()
+                    try:
+                        if self.record_types:
+                            records = await self.check_records(hostname, retries, work)
+                        else:
+                            response = await self.check(hostname, record_type, retries, work)
+                            records = response and {record_type: response}
+                    except Exception as e:
+                        trace("Problem processing host:", hostname, type(e))
+                        continue
+                    trace(records)
+                    if records:
+                        for record_type, found_addresses in filter_wildcards(hostname, records, self.wildcards):
+                            results.put((hostname, record_type, found_addresses))
+            finally:
+                self.in_q.task_done()
+
+    async def produce(self):
+        #The empty string
+        self.spider_blacklist.add(self.target)
+        await self.in_q.put((self.target, self.record_type, 0))
+        #put() blocks while the queue is full,  so the wordlist is read as fast as it is resolved.
+        for hostname in wordlist.candidates(self.target, self.subdomains, self.spider_blacklist):
+            await self.in_q.put((hostname, self.record_type, 0))
+
+    async def main(self, results):
+        loop = asyncio.get_running_loop()
+        for i in range(self.socket_count):
+            transport, protocol = await loop.create_datagram_endpoint(dns_protocol, local_addr = ('0.0.0.0', 0))
+            self.protocols.append(protocol)
+        self.ready = asyncio.Event()
+        self.in_q = asyncio.Queue(maxsize = self.max_in_flight * 2)
+        verifier = asyncio.ensure_future(self.verify_nameservers())
+        workers = [asyncio.ensure_future(self.worker(results)) for i in range(self.max_in_flight)]
+        producer = asyncio.ensure_future(self.produce())
+        try:
+            await self.ready.wait()
+            if self.nameservers:
+                await producer
+                await self.in_q.join()
+        finally:
+            producer.cancel()
+            verifier.cancel()
+            for w in workers:
+                w.cancel()
+            resolving = list(self.resolving.values())
+            for task in resolving:
+                task.cancel()
+            await asyncio.gather(producer, verifier, *(workers + resolving), return_exceptions = True)
+            for protocol in self.protocols:
+                protocol.transport.close()
+
+    def run(self, results):
+        self.loop = asyncio.new_event_loop()
+        self.cache_thread = ThreadPoolExecutor(1)
+        try:
+            self.task = self.loop.create_task(self.main(results))
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            trace("async_lookup stopped")
+        finally:
+            #The writes still queued go to the cache before it is closed.
+            self.cache_thread.shutdown(wait = True)
+            self.loop.close()
+            self.pool.save()
+            self.wildcard_cache.save()
+            self.answers.close()
+            #End marker
+            results.put(False)
+
+    #Can be called from any thread.
+    def stop(self):
+        try:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        except (AttributeError, RuntimeError):
+            #Not started yet or already done.
+            pass
+
+#The answers of a host by record type,  as lists of strings.  Nothing if any
+#of them is a wildcard answer,  the host does not really exist.
+def filter_wildcards(hostname, records, wildcards):
+    found = []
+    for record_type, response in records.items():
+        found_addresses = []
+        for a in response:
+            a = str(a)
+            if a in wildcards:
+                trace("resovled wildcard:", hostname)
+                return []
+            found_addresses.append(a)
+        if found_addresses:
+            found.append((record_type, found_addresses))
+    return found
 
 #Extract relevant hosts
 #The dot at the end of a domain signifies the root,
 #and all TLDs are subs of the root.
+#hostname is the target,  or a hostset.hostname_table of the targets in scope.
 host_match = re.compile(r"((?<=[\s])[a-zA-Z0-9_-]+\.(?:[a-zA-Z0-9_-]+\.?)+(?=[\s]))")
 def extract_hosts(data, hostname):
     #made a global to avoid re-compilation
     global host_match
+    scope = hostname
+    if not isinstance(scope, hostset.hostname_table):
+        scope = hostset.hostname_table([hostname])
     ret = []
     hosts = re.findall(host_match, data)
     for fh in hosts:
         host = fh.rstrip(".")
-        #Is this host in scope?
-        if host.endswith(hostname):
+        #Is this host in scope?  endswith() also matched notexample.com
+        if scope.covers(host):
             ret.append(host)
     return ret
 
@@ -404,14 +1139,16 @@ def extract_subdomains(file_name):
     subs_sorted = sorted(subs.keys(), key = lambda x: subs[x], reverse = True)
     return subs_sorted
 
-def print_target(target, record_type = None, subdomains = "names.txt", resolve_list = "resolvers.txt", process_count = 16, output = False, json_output = False, found_subdomains=[],verbose=False):
+def print_target(target, record_type = None, subdomains = "names.txt", resolve_list = "resolvers.txt", process_count = 16, output = False, json_output = False, found_subdomains=[],verbose=False, deadline = None, resolver_verdicts = None, engine = "async", tried = None):
     subdomains_list = []
     results_temp = []
-    run(target, record_type, subdomains, resolve_list, process_count)
-    for result in run(target, record_type, subdomains, resolve_list, process_count):
+    multi = record_types(record_type)
+    for result in run(target, record_type, subdomains, resolve_list, process_count, deadline, resolver_verdicts, engine, tried = tried):
         (hostname, record_type, response) = result
         if not record_type:
             result = hostname
+        elif multi:
+            result = "%s,%s,%s" % (hostname, record_type, ",".join(response).strip(","))
         else:
             result = "%s,%s" % (hostname, ",".join(response).strip(","))
         if result not in found_subdomains:
@@ -421,55 +1158,128 @@ def print_target(target, record_type = None, subdomains = "names.txt", resolve_l
 
     return  set(subdomains_list)
 
-def run(target, record_type = None, subdomains = "names.txt", resolve_list = "resolvers.txt", process_count = 16):
-    subdomains = check_open(subdomains)
+#subdomains and resolve_list are file names or lists already read with check_open().
+#deadline is a time.time() timestamp,  once it passes the workers are killed
+#and run() stops yielding,  so the caller keeps everything found until then.
+#resolver_verdicts is a (shared) dict of the nameservers verified in previous runs.
+#engine is "async" for the event loop engine or "process" for the lookup processes.
+#port is the port of the nameservers,  the benchmark runs its own on a high port.
+#The names tried and found are added to the learned wordlist (see
+#wordlist.learned_index),  unless tried is a list:  it gets the wordlist
+#entries tried,  and the caller learns them with the rest of its results.
+def run(target, record_type = None, subdomains = "names.txt", resolve_list = "resolvers.txt", process_count = 16, deadline = None, resolver_verdicts = None, engine = "async", port = 53, tried = None):
+    learn = tried is None
+    if learn:
+        tried = []
+    subdomains = wordlist.recorded(open_wordlist(subdomains), tried)
+    if engine == "async":
+        results = run_async(target, record_type, subdomains, resolve_list, process_count, deadline, resolver_verdicts, port)
+    else:
+        results = run_processes(target, record_type, subdomains, resolve_list, process_count, deadline, resolver_verdicts, port)
+    found = []
+    try:
+        for result in results:
+            found.append(result[0])
+            yield result
+    finally:
+        if learn:
+            wordlist.learned_index().learn(target, found, tried)
+
+def run_async(target, record_type = None, subdomains = "names.txt", resolve_list = "resolvers.txt", process_count = 16, deadline = None, resolver_verdicts = None, port = 53):
+    subdomains = open_wordlist(subdomains)
+    resolve_list = check_open(resolve_list)
+    if record_type and not record_types(record_type):
+        try:
+            dns.rdatatype.from_text(record_type)
+        except dns.rdatatype.UnknownRdatatype:
+            error("DNS record type not supported:", record_type)
+    results = Queue.Queue()
+    engine = async_lookup(target, record_type, subdomains, resolve_list, process_count, resolver_verdicts, port = port)
+    #The event loop runs in its own thread so run() can stay a generator.
+    loop_thread = threading.Thread(target = engine.run, args = (results,))
+    loop_thread.daemon = True
+    loop_thread.start()
+    try:
+        while True:
+            wait = 10
+            if deadline is not None:
+                wait = deadline - time.time()
+                if wait <= 0:
+                    trace("Time budget exhausted, stopping the lookups")
+                    break
+                wait = min(wait, 10)
+            try:
+                result = results.get(True, wait)
+            except Queue.Empty:
+                continue
+            if not result:
+                break
+            yield result
+    finally:
+        engine.stop()
+    trace("End")
+
+def run_processes(target, record_type = None, subdomains = "names.txt", resolve_list = "resolvers.txt", process_count = 16, deadline = None, resolver_verdicts = None, port = 53):
+    subdomains = open_wordlist(subdomains)
     resolve_list = check_open(resolve_list)
     if (len(resolve_list) / 16) < process_count:
         sys.stderr.write('Warning: Fewer than 16 resovlers per thread, consider adding more nameservers to resolvers.txt.\n')
+    types = record_types(record_type)
     if os.name == 'nt':
         wildcards = {}
         spider_blacklist = {}
+        cnames = cname_cache()
     else:
         wildcards = multiprocessing.Manager().dict()
         spider_blacklist = multiprocessing.Manager().dict()
+        cnames = None
+        if types or record_type == "CNAME":
+            #The chains are shared,  a CDN name is resolved once for all the processes.
+            manager = multiprocessing.Manager()
+            cnames = cname_cache(manager.dict(), manager.dict())
     in_q = multiprocessing.Queue()
     out_q = multiprocessing.Queue()
     #have a buffer of at most two new nameservers that lookup processes can draw from.
     resolve_q = multiprocessing.Queue(maxsize = 2)
 
     #Make a source of fast nameservers avaiable for other processes.
-    verify_nameservers_proc = verify_nameservers(target, record_type, resolve_q, resolve_list, wildcards)
+    verify_nameservers_proc = verify_nameservers(target, record_type, resolve_q, resolve_list, wildcards, resolver_verdicts, port = port)
     verify_nameservers_proc.start()
     #The empty string 
     in_q.put((target, record_type))
     spider_blacklist[target]=None
-    #A list of subdomains is the input
-    for s in subdomains:
-        s = str(s).strip()
-        if s:
-            if s.find(","):
-                #SubBrute should be forgiving, a comma will never be in a url
-                #but the user might try an use a CSV file as input.
-                s=s.split(",")[0]
-            if not s.endswith(target):
-                hostname = "%s.%s" % (s, target)
-            else:
-                #A user might feed an output list as a subdomain list.
-                hostname = s
-            if hostname not in spider_blacklist:
-                spider_blacklist[hostname]=None
-                work = (hostname, record_type)
-                in_q.put(work)
-    #Terminate the queue
-    in_q.put(False)
+    #A list of subdomains is the input,  it is fed from a thread while the workers run.
+    #The wordlist names are deduplicated locally,  only spidered hosts go through the shared blacklist.
+    stop_feeding = threading.Event()
+    def feed():
+        seen = wordlist.hostname_set()
+        seen.add(target)
+        for hostname in wordlist.candidates(target, subdomains, seen):
+            if not wait_for_room(in_q, stop_feeding):
+                return
+            in_q.put((hostname, record_type))
+        #Terminate the queue
+        in_q.put(False)
+    feeder = threading.Thread(target = feed)
+    feeder.daemon = True
+    feeder.start()
+    workers = []
     for i in range(process_count):
-        worker = lookup(in_q, out_q, resolve_q, target, wildcards, spider_blacklist)
+        worker = lookup(in_q, out_q, resolve_q, target, wildcards, spider_blacklist, port = port, record_types = types, cnames = cnames)
         worker.start()
+        workers.append(worker)
     threads_remaining = process_count
     while True:
+        wait = 10
+        if deadline is not None:
+            wait = deadline - time.time()
+            if wait <= 0:
+                trace("Time budget exhausted, stopping the lookup workers")
+                break
+            wait = min(wait, 10)
         try:
             #The output is valid hostnames
-            result = out_q.get(True, 10)
+            result = out_q.get(True, wait)
             #we will get an empty exception before this runs. 
             if not result:
                 threads_remaining -= 1
@@ -485,6 +1295,15 @@ def run(target, record_type = None, subdomains = "names.txt", resolve_list = "re
         #make sure everyone is complete
         if threads_remaining <= 0:
             break
+    stop_feeding.set()
+    if threads_remaining > 0:
+        #Ran out of time,  the remaining workers will not get to finish.
+        for worker in workers:
+            try:
+                killproc(pid = worker.pid)
+            except:
+                #Windows threading.tread
+                pass
     trace("killing nameserver process")
     #We no longer require name servers.
     try:
@@ -494,6 +1313,30 @@ def run(target, record_type = None, subdomains = "names.txt", resolve_list = "re
         verify_nameservers_proc.end()
     trace("End")
 
+#Block while the work queue holds more than high_water items,  so the feeder
+#does not read the whole wordlist into the queue.  Returns False if stopped.
+def wait_for_room(q, stop, high_water = 10000):
+    try:
+        while q.qsize() > high_water:
+            if stop.wait(0.05):
+                return False
+    except NotImplementedError:
+        #No qsize() on macOS,  no backpressure there.
+        pass
+    return not stop.is_set()
+
+#A wordlist file is streamed,  a list (loaded once by a batch) is used as is,
+#both after the names learned from past scans.  Any other iterable,  like the
+#generator of permutations.permutations(),  is used as is.
+def open_wordlist(input_file):
+    if isinstance(input_file, list):
+        return wordlist.ordered_names(check_open(input_file))
+    if not isinstance(input_file, str):
+        return input_file
+    if not os.path.isfile(input_file):
+        error("File not found:", input_file)
+    return wordlist.ordered_names(input_file)
+
 #exit handler for signals.  So ctrl+c will work. 
 #The 'multiprocessing' library each process is it's own process which side-steps the GIL
 #If the user wants to exit prematurely,  each process must be killed.
@@ -529,6 +1372,11 @@ def error(*args, **kwargs):
 
 def check_open(input_file):
     ret = []
+    #Already loaded,  a batch of runs reads the lists only once.
+    if isinstance(input_file, list):
+        if not len(input_file):
+            error("List is empty")
+        return input_file
     #If we can't find a resolver from an input file, then we need to improvise.
     try:
         ret = open(input_file).readlines()
@@ -570,12 +1418,16 @@ if __name__ == "__main__":
     parser.add_option("-a", "-A", action = 'store_true', dest = "ipv4", default = False,
               help = "(optional) Print all IPv4 addresses for sub domains (default = off).")
     parser.add_option("--type", dest = "type", default = False,
-              type = "string", help = "(optional) Print all reponses for an arbitrary DNS record type (CNAME, AAAA, TXT, SOA, MX...)")                  
+              type = "string", help = "(optional) Print all reponses for an arbitrary DNS record type (CNAME, AAAA, TXT, SOA, MX...).  A,AAAA,CNAME resolves the three in one pass.")                  
     parser.add_option("-c", "--process_count", dest = "process_count",
               default = 16, type = "int",
               help = "(optional) Number of lookup theads to run. default = 16")
     parser.add_option("-f", "--filter_subs", dest = "filter", default = "",
               type = "string", help = "(optional) A file containing unorganized domain names which will be filtered into a list of subdomains sorted by frequency.  This was used to build names.txt.")                 
+    parser.add_option("-L", "--learn", dest = "learn", default = "",
+              type = "string", help = "(optional) A file of subdomains found by past scans.  Their names are tried first by the next runs.")
+    parser.add_option("-e", "--engine", dest = "engine", default = "async", choices = ["async", "process"],
+              help = "(optional) 'async' resolves from an event loop, 'process' uses one lookup process per query in flight. default = async")
     parser.add_option("-v", "--verbose", action = 'store_true', dest = "verbose", default = False,
               help = "(optional) Print debug information.")
     (options, args) = parser.parse_args()
@@ -583,9 +1435,15 @@ if __name__ == "__main__":
     
     verbose = options.verbose
 
-    if len(args) < 1 and options.filter == "" and options.targets == "":
+    if len(args) < 1 and options.filter == "" and options.targets == "" and options.learn == "":
         parser.error("You must provie a target. Use -h for help.")
 
+    if options.learn != "":
+        if not os.path.isfile(options.learn):
+            error("File not found:", options.learn)
+        print("Learned %d names" % wordlist.learned_index().learn_file(options.learn))
+        sys.exit()
+
     if options.filter != "":
         #cleanup this file and print it out
         for d in extract_subdomains(options.filter):
@@ -630,6 +1488,6 @@ if __name__ == "__main__":
             #options.output
             #options.json
             print(target, record_type, options.subs, options.resolvers, options.process_count, output, json_output)
-            print_target(target, record_type, options.subs, options.resolvers, options.process_count, output, json_output)
+            print_target(target, record_type, options.subs, options.resolvers, options.process_count, output, json_output, engine = options.engine)
 
 
@@ -0,0 +1,260 @@
+#
+#Wordlist helpers for SubBrute.
+#
+#Wordlists are streamed instead of being read and queued upfront,  so a
+#list of millions of names starts resolving right away and only a small
+#window of it is held in memory.
+#
+import os
+import re
+import mmap
+import sqlite3
+import itertools
+from array import array
+
+try:
+    from . import cache
+except ImportError:
+    import cache
+
+#Bytes read from the wordlist at a time.
+chunk_size = 1 << 20
+#Wordlists bigger than this are mapped in memory instead of read().
+mmap_threshold = 64 << 20
+
+#Yield the names of a wordlist one at a time.
+#names is a file name or an already loaded list (a batch reads the wordlist only once).
+def read_names(names, use_mmap = None):
+    if not isinstance(names, str):
+        for name in names:
+            name = str(name).strip()
+            if name:
+                yield name
+        return
+    with open(names, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap is None:
+            use_mmap = size >= mmap_threshold
+        if use_mmap and size:
+            source = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        else:
+            source = None
+        try:
+            for name in _split_chunks(f, source, size):
+                yield name
+        finally:
+            if source is not None:
+                source.close()
+
+def _split_chunks(f, source, size):
+    tail = b""
+    pos = 0
+    while True:
+        if source is not None:
+            chunk = source[pos:pos + chunk_size]
+            pos += len(chunk)
+        else:
+            chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        #The last line may continue in the next chunk.
+        tail = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line.decode("utf-8", "ignore")
+    tail = tail.strip()
+    if tail:
+        yield tail.decode("utf-8", "ignore")
+
+#Set of hostnames stored as 64 bit hashes in an open addressing table.
+#About 16 bytes per name instead of a str object plus a set slot,  and no
+#IPC like a Manager().dict().  Two names only collide if their 64 bit
+#hashes match,  which is negligible for wordlist sizes.
+class hostname_set(object):
+
+    def __init__(self, capacity = 1 << 16):
+        size = 1
+        while size < capacity * 2:
+            size <<= 1
+        self.table = array("Q", bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    @staticmethod
+    def _key(hostname):
+        #0 marks an empty slot.
+        return (hash(hostname.lower()) & 0xFFFFFFFFFFFFFFFF) or 1
+
+    def _slot(self, key):
+        table = self.table
+        mask = self.mask
+        i = key & mask
+        while table[i] and table[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def __contains__(self, hostname):
+        key = self._key(hostname)
+        return self.table[self._slot(key)] == key
+
+    def __len__(self):
+        return self.count
+
+    def add(self, hostname):
+        key = self._key(hostname)
+        i = self._slot(key)
+        if self.table[i] == key:
+            return False
+        self.table[i] = key
+        self.count += 1
+        if self.count * 3 > len(self.table) * 2:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self.table
+        self.table = array("Q", bytes(16 * len(old)))
+        self.mask = len(self.table) - 1
+        for key in old:
+            if key:
+                self.table[self._slot(key)] = key
+
+#Turn wordlist entries into hostnames of target,  skipping the ones in seen.
+def candidates(target, names, seen):
+    for s in names:
+        s = str(s).strip()
+        if s:
+            #SubBrute should be forgiving, a comma will never be in a url
+            #but the user might try an use a CSV file as input.
+            s = s.split(",")[0]
+            if not s.endswith(target):
+                hostname = "%s.%s" % (s, target)
+            else:
+                #A user might feed an output list as a subdomain list.
+                hostname = s
+            if seen.add(hostname):
+                yield hostname
+
+#Learned wordlist.
+#Every scan records,  in learned.sqlite (in the subbrute cache folder),  the
+#names it tried and the names it found,  so each name has a number of tries
+#and of hits.  The next brute force tries the names with the best hit rate
+#first,  then the rest of the wordlist,  so a run stopped early by a time budget
+#still finds most of what a full run would.  Only the names found at least once
+#are kept:  a name never found is not ranked,  its tries do not matter.
+learned_name = "learned.sqlite"
+#At most this many learned names are tried ahead of the wordlist.
+learned_limit = 100000
+#The rate is (hits + 1) / (tries + rate_tries):  a name found in its only try
+#does not outrank www,  found in most of its thousand tries.
+rate_tries = 20
+#Second levels of country code TLDs,  co.uk,  com.br...
+second_levels = set(["co", "com", "net", "org", "gov", "edu", "ac", "or", "ne", "go", "gob", "mil", "nic"])
+name_match = re.compile(r"^[a-z0-9_]([a-z0-9_-]*[a-z0-9_])?(\.[a-z0-9_]([a-z0-9_-]*[a-z0-9_])?)*$")
+
+#The wordlist entries of names,  appended to tried as they are read.
+def recorded(names, tried):
+    for name in names:
+        tried.append(name)
+        yield name
+
+class learned_index(object):
+
+    def __init__(self, path = None):
+        if path is None:
+            path = cache.cache_path(learned_name)
+        self.path = path
+        self.db = None
+
+    def connect(self):
+        if self.db is None and self.path:
+            try:
+                self.db = sqlite3.connect(self.path, timeout = 5)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("CREATE TABLE IF NOT EXISTS rates (name TEXT PRIMARY KEY, hits INTEGER, tries INTEGER)")
+            except sqlite3.Error:
+                self.db = None
+        return self.db
+
+    #The names of zone in hostnames (subdomains of zone,  or names of the wordlist).
+    @staticmethod
+    def _names(zone, hostnames, labels = False):
+        suffix = "." + zone
+        names = set()
+        for hostname in hostnames:
+            hostname = str(hostname).strip().lower().rstrip(".")
+            if hostname.endswith(suffix):
+                name = hostname[:-len(suffix)]
+            elif labels:
+                name = hostname
+            else:
+                continue
+            if name_match.match(name):
+                names.add(name)
+        return names
+
+    #One scan of zone:  the hostnames found and the wordlist entries (or
+    #hostnames) tried.  A name found counts as tried.  Returns the number of
+    #names found.
+    def learn(self, zone, hostnames, tried = ()):
+        zone = zone.lower().rstrip(".")
+        names = self._names(zone, hostnames)
+        tried = self._names(zone, tried, True) | names
+        if not tried:
+            return 0
+        db = self.connect()
+        if db is None:
+            return 0
+        try:
+            with db:
+                db.executemany("INSERT OR IGNORE INTO rates VALUES (?, 0, 0)", ((name,) for name in names))
+                db.executemany("UPDATE rates SET hits = hits + 1 WHERE name = ?", ((name,) for name in names))
+                db.executemany("UPDATE rates SET tries = tries + 1 WHERE name = ?", ((name,) for name in tried))
+        except sqlite3.Error:
+            return 0
+        return len(names)
+
+    #Results of old scans,  one hostname per line (or CSV like the output of
+    #subbrute).  The zone of a hostname is guessed:  its last two labels,  or
+    #three under a country code second level like co.uk.
+    def learn_file(self, file_name):
+        zones = {}
+        for hostname in read_names(file_name):
+            hostname = hostname.split(",")[0].lower().rstrip(".")
+            labels = hostname.split(".")
+            size = 2
+            if len(labels[-1]) == 2 and len(labels) > 2 and labels[-2] in second_levels:
+                size = 3
+            if len(labels) > size:
+                zones.setdefault(".".join(labels[-size:]), []).append(hostname)
+        return sum(self.learn(zone, hostnames) for zone, hostnames in zones.items())
+
+    #The learned names,  the best hit rate first.
+    def ranked(self, limit = None):
+        db = self.connect()
+        if db is None:
+            return []
+        if limit is None:
+            limit = learned_limit
+        try:
+            return [row[0] for row in db.execute("SELECT name FROM rates ORDER BY (hits + 1.0) / (tries + ?) DESC, hits DESC, name LIMIT ?", (rate_tries, limit))]
+        except sqlite3.Error:
+            return []
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+#The learned names first,  then the wordlist.  The duplicates are dropped by candidates().
+#The learned names are read right away:  the wordlist is consumed by a feeder
+#thread while the lookup processes are forked,  and a process forked while
+#another thread is inside sqlite can deadlock.
+def ordered_names(names, index = None):
+    if index is None:
+        index = learned_index()
+    learned = index.ranked()
+    index.close()
+    return itertools.chain(learned, read_names(names))
@@ -8,6 +8,7 @@ import re
 import sys
 import os
 import argparse
+import asyncio
 import time
 import hashlib
 import random
@@ -15,10 +16,17 @@ import multiprocessing
 import threading
 import socket
 import json
+import signal
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
 
 # external modules
 from subbrute import subbrute
+from subbrute import cache
+from subbrute import wordlist
+from subbrute import permutations
+from subbrute import hostset
 import dns.resolver
 import requests
 
@@ -95,14 +103,18 @@ def parse_args():
     parser = argparse.ArgumentParser(epilog='\tExample: \r\npython ' + sys.argv[0] + " -d google.com")
     parser.error = parser_error
     parser._optionals.title = "OPTIONS"
-    parser.add_argument('-d', '--domain', help="Domain name to enumerate it's subdomains", required=True)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('-d', '--domain', help="Domain name to enumerate it's subdomains")
+    target.add_argument('-l', '--list', help="File with one domain per line to enumerate as a single batch")
     parser.add_argument('-b', '--bruteforce', help='Enable the subbrute bruteforce module', nargs='?', default=False)
     parser.add_argument('-p', '--ports', help='Scan the found subdomains against specified tcp ports')
     parser.add_argument('-v', '--verbose', help='Enable Verbosity and display results in realtime', nargs='?', default=False)
     parser.add_argument('-t', '--threads', help='Number of threads to use for subbrute bruteforce', type=int, default=30)
     parser.add_argument('-e', '--engines', help='Specify a comma-separated list of search engines')
-    parser.add_argument('-o', '--output', help='Save the results to text file')
+    parser.add_argument('-o', '--output', help='Save the results to text file (a directory of per-domain files with -l)')
     parser.add_argument('-n', '--no-color', help='Output without color', default=False, action='store_true')
+    parser.add_argument('-m', '--max-time', help='Stop the enumeration after the given number of seconds and report the subdomains found so far', type=int)
+    parser.add_argument('-P', '--permutations', help='Resolve up to this many permutations of the subdomains found (dev-api, api2...)', type=int, default=0)
     return parser.parse_args()
 
 
@@ -140,13 +152,33 @@ def subdomain_sorting_key(hostname):
     return parts, 0
 
 
+# seconds an engine may overrun the deadline before it is terminated
+ENGINE_GRACE_PERIOD = 5
+
+
+def time_remaining(deadline):
+    """Seconds left until the given deadline (a time.time() timestamp)
+
+    Returns None when there is no deadline, and never less than 0.
+    """
+    if deadline is None:
+        return None
+    return max(0, deadline - time.time())
+
+
 class enumratorBase(object):
-    def __init__(self, base_url, engine_name, domain, subdomains=None, silent=False, verbose=True):
+    # number of result pages fetched concurrently once only the page number
+    # changes, 0 keeps the strictly sequential walk (needed by engines with bot detection)
+    PREFETCH_PAGES = 0
+
+    def __init__(self, base_url, engine_name, domain, subdomains=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         self.domain = urlparse.urlparse(domain).netloc
+        self.scope = hostset.hostname_table([self.domain])
         self.session = requests.Session()
         self.subdomains = []
         self.timeout = 25
+        self.deadline = deadline
         self.base_url = base_url
         self.engine_name = engine_name
         self.silent = silent
@@ -169,11 +201,33 @@ class enumratorBase(object):
         self.print_(G + "[-] Searching now in %s.." % (self.engine_name) + W)
         return
 
+    def in_scope(self, subdomain):
+        """ True if subdomain is the domain or one of its subdomains """
+        return self.scope.covers(subdomain)
+
+    def deadline_reached(self):
+        """ True once the global time budget of the run is used up """
+        return time_remaining(self.deadline) == 0
+
+    def get_timeout(self):
+        """ request timeout, clamped so a single request cannot outlive the deadline """
+        remaining = time_remaining(self.deadline)
+        if remaining is None:
+            return self.timeout
+        return max(1, min(self.timeout, remaining))
+
+    def sleep(self, seconds):
+        """ sleep between requests without sleeping past the deadline """
+        remaining = time_remaining(self.deadline)
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        time.sleep(seconds)
+
     def send_req(self, query, page_no=1):
 
         url = self.base_url.format(query=query, page_no=page_no)
         try:
-            resp = self.session.get(url, headers=self.headers, timeout=self.timeout)
+            resp = self.session.get(url, headers=self.headers, timeout=self.get_timeout())
         except Exception:
             resp = None
         return self.get_response(resp)
@@ -217,6 +271,11 @@ class enumratorBase(object):
         """ chlid class that user different pagnation counter should override this function """
         return num + 10
 
+    def send_reqs(self, query, pages):
+        """ fetch several result pages of the same query concurrently, responses keep the pages order """
+        with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+            return list(executor.map(lambda page_no: self.send_req(query, page_no), pages))
+
     def enumerate(self, altquery=False):
         flag = True
         page_no = 0
@@ -224,6 +283,8 @@ class enumratorBase(object):
         retries = 0
 
         while flag:
+            if self.deadline_reached():
+                return self.subdomains
             query = self.generate_query()
             count = query.count(self.domain)  # finding the number of subdomains found so far
 
@@ -234,6 +295,10 @@ class enumratorBase(object):
 
             if self.check_max_pages(page_no):  # maximum pages for Google to avoid getting blocked
                 return self.subdomains
+
+            # the query is full, from now on only the page number changes so the next pages can be prefetched
+            if self.PREFETCH_PAGES and self.check_max_subdomains(count):
+                return self.enumerate_pipelined(page_no, prev_links, retries)
             resp = self.send_req(query, page_no)
 
             # check if there is any error occured
@@ -255,29 +320,79 @@ class enumratorBase(object):
 
         return self.subdomains
 
+    def enumerate_pipelined(self, page_no, prev_links, retries):
+        """Walk the remaining result pages PREFETCH_PAGES at a time
+
+        The pages of a batch are fetched concurrently and then processed in
+        order with the same stop conditions as enumerate(): MAX_PAGES, an
+        error page, or three result pages identical to the previous one.
+        Like enumerate(), the page after a repeated page is skipped.
+        """
+        skip = False
+        while not self.deadline_reached():
+            query = self.generate_query()
+            if skip:
+                # the repeated page was the last one of the previous batch
+                page_no = self.get_page(page_no)
+                skip = False
+            pages = []
+            while len(pages) < self.PREFETCH_PAGES and not self.check_max_pages(page_no):
+                pages.append(page_no)
+                page_no = self.get_page(page_no)
+            if not pages:
+                return self.subdomains
+
+            for resp in self.send_reqs(query, pages):
+                if skip:
+                    # enumerate() would not have fetched this page
+                    skip = False
+                    continue
+                if not self.check_response_errors(resp):
+                    return self.subdomains
+                links = self.extract_domains(resp)
+
+                # same results as the previous page, maybe we have reached the last page
+                if links == prev_links:
+                    retries += 1
+                    skip = True
+                    if retries >= 3:
+                        return self.subdomains
+                prev_links = links
+            self.should_sleep()
+
+        return self.subdomains
+
 
 class enumratorBaseThreaded(multiprocessing.Process, enumratorBase):
-    def __init__(self, base_url, engine_name, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, base_url, engine_name, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
-        enumratorBase.__init__(self, base_url, engine_name, domain, subdomains, silent=silent, verbose=verbose)
+        enumratorBase.__init__(self, base_url, engine_name, domain, subdomains, silent=silent, verbose=verbose, deadline=deadline)
         multiprocessing.Process.__init__(self)
         self.q = q
         return
 
+    def found(self):
+        """The subdomains found so far, handed over if the engine is terminated"""
+        return self.subdomains
+
     def run(self):
-        domain_list = self.enumerate()
-        for domain in domain_list:
-            self.q.append(domain)
+        stop_on_terminate()
+        domain_list = None
+        try:
+            domain_list = self.enumerate()
+        finally:
+            for domain in self.found() if domain_list is None else domain_list:
+                self.q.append(domain)
 
 
 class GoogleEnum(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = "https://google.com/search?q={query}&btnG=Search&hl=en-US&biw=&bih=&gbv=1&start={page_no}&filter=0"
         self.engine_name = "Google"
         self.MAX_DOMAINS = 11
         self.MAX_PAGES = 200
-        super(GoogleEnum, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(GoogleEnum, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         self.q = q
         return
 
@@ -307,7 +422,7 @@ class GoogleEnum(enumratorBaseThreaded):
         return True
 
     def should_sleep(self):
-        time.sleep(5)
+        self.sleep(5)
         return
 
     def generate_query(self):
@@ -321,13 +436,13 @@ class GoogleEnum(enumratorBaseThreaded):
 
 
 class YahooEnum(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = "https://search.yahoo.com/search?p={query}&b={page_no}"
         self.engine_name = "Yahoo"
         self.MAX_DOMAINS = 10
         self.MAX_PAGES = 0
-        super(YahooEnum, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(YahooEnum, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         self.q = q
         return
 
@@ -344,7 +459,7 @@ class YahooEnum(enumratorBaseThreaded):
                 if not link.startswith('http'):
                     link = "http://" + link
                 subdomain = urlparse.urlparse(link).netloc
-                if not subdomain.endswith(self.domain):
+                if not self.in_scope(subdomain):
                     continue
                 if subdomain and subdomain not in self.subdomains and subdomain != self.domain:
                     if self.verbose:
@@ -372,13 +487,14 @@ class YahooEnum(enumratorBaseThreaded):
 
 
 class AskEnum(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'http://www.ask.com/web?q={query}&page={page_no}&qid=8D6EE6BF52E0C04527E51F64F22C4534&o=0&l=dir&qsrc=998&qo=pagination'
         self.engine_name = "Ask"
         self.MAX_DOMAINS = 11
         self.MAX_PAGES = 0
-        enumratorBaseThreaded.__init__(self, base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        self.PREFETCH_PAGES = 4
+        enumratorBaseThreaded.__init__(self, base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         self.q = q
         return
 
@@ -415,13 +531,14 @@ class AskEnum(enumratorBaseThreaded):
 
 
 class BingEnum(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://www.bing.com/search?q={query}&go=Submit&first={page_no}'
         self.engine_name = "Bing"
         self.MAX_DOMAINS = 30
         self.MAX_PAGES = 0
-        enumratorBaseThreaded.__init__(self, base_url, self.engine_name, domain, subdomains, q=q, silent=silent)
+        self.PREFETCH_PAGES = 4
+        enumratorBaseThreaded.__init__(self, base_url, self.engine_name, domain, subdomains, q=q, silent=silent, deadline=deadline)
         self.q = q
         self.verbose = verbose
         return
@@ -460,13 +577,13 @@ class BingEnum(enumratorBaseThreaded):
 
 
 class BaiduEnum(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://www.baidu.com/s?pn={page_no}&wd={query}&oq={query}'
         self.engine_name = "Baidu"
         self.MAX_DOMAINS = 2
         self.MAX_PAGES = 760
-        enumratorBaseThreaded.__init__(self, base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        enumratorBaseThreaded.__init__(self, base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         self.querydomain = self.domain
         self.q = q
         return
@@ -483,7 +600,7 @@ class BaiduEnum(enumratorBaseThreaded):
                 if not link.startswith('http'):
                     link = "http://" + link
                 subdomain = urlparse.urlparse(link).netloc
-                if subdomain.endswith(self.domain):
+                if self.in_scope(subdomain):
                     subdomain_list.append(subdomain)
                     if subdomain not in self.subdomains and subdomain != self.domain:
                         found_newdomain = True
@@ -507,7 +624,7 @@ class BaiduEnum(enumratorBaseThreaded):
         return True
 
     def should_sleep(self):
-        time.sleep(random.randint(2, 5))
+        self.sleep(random.randint(2, 5))
         return
 
     def generate_query(self):
@@ -520,25 +637,25 @@ class BaiduEnum(enumratorBaseThreaded):
 
 
 class NetcraftEnum(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         self.base_url = 'https://searchdns.netcraft.com/?restriction=site+ends+with&host={domain}'
         self.engine_name = "Netcraft"
-        super(NetcraftEnum, self).__init__(self.base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(NetcraftEnum, self).__init__(self.base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         self.q = q
         return
 
     def req(self, url, cookies=None):
         cookies = cookies or {}
         try:
-            resp = self.session.get(url, headers=self.headers, timeout=self.timeout, cookies=cookies)
+            resp = self.session.get(url, headers=self.headers, timeout=self.get_timeout(), cookies=cookies)
         except Exception as e:
             self.print_(e)
             resp = None
         return resp
 
     def should_sleep(self):
-        time.sleep(random.randint(1, 2))
+        self.sleep(random.randint(1, 2))
         return
 
     def get_next(self, resp):
@@ -567,7 +684,7 @@ class NetcraftEnum(enumratorBaseThreaded):
         resp = self.req(start_url)
         cookies = self.get_cookies(resp.headers)
         url = self.base_url.format(domain=self.domain)
-        while True:
+        while not self.deadline_reached():
             resp = self.get_response(self.req(url, cookies))
             self.extract_domains(resp)
             if 'Next Page' not in resp:
@@ -575,6 +692,7 @@ class NetcraftEnum(enumratorBaseThreaded):
                 break
             url = self.get_next(resp)
             self.should_sleep()
+        return self.subdomains
 
     def extract_domains(self, resp):
         links_list = list()
@@ -583,7 +701,7 @@ class NetcraftEnum(enumratorBaseThreaded):
             links_list = link_regx.findall(resp)
             for link in links_list:
                 subdomain = urlparse.urlparse(link).netloc
-                if not subdomain.endswith(self.domain):
+                if not self.in_scope(subdomain):
                     continue
                 if subdomain and subdomain not in self.subdomains and subdomain != self.domain:
                     if self.verbose:
@@ -595,42 +713,83 @@ class NetcraftEnum(enumratorBaseThreaded):
 
 
 class DNSdumpster(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://dnsdumpster.com/'
         self.live_subdomains = []
         self.engine_name = "DNSdumpster"
         self.q = q
-        self.lock = None
-        super(DNSdumpster, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        # live_subdomains collects the hosts as they are validated
+        self.lock = threading.Lock()
+        self.resolver = None
+        self.answers = None
+        # validation pool size and per-query timeout (seconds)
+        self.MAX_WORKERS = 70
+        self.DNS_TIMEOUT = 3
+        super(DNSdumpster, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         return
 
+    def lookup(self, host, rdtype):
+        ips = self.answers.get(host, rdtype)
+        if ips is None:
+            try:
+                resp = self.resolver.query(host, rdtype)
+            except dns.resolver.NXDOMAIN as e:
+                self.answers.put_nxdomain(host, subbrute.nxdomain_ttl(e))
+                return []
+            except dns.resolver.NoAnswer:
+                self.answers.put_nodata(host, rdtype)
+                return []
+            ips = [rdata.to_text() for rdata in resp]
+            self.answers.put(host, rdtype, ips, resp.rrset.ttl)
+        return ips
+
     def check_host(self, host):
         is_valid = False
-        Resolver = dns.resolver.Resolver()
-        Resolver.nameservers = ['8.8.8.8', '8.8.4.4']
-        self.lock.acquire()
         try:
-            ip = Resolver.query(host, 'A')[0].to_text()
-            if ip:
-                if self.verbose:
-                    self.print_("%s%s: %s%s" % (R, self.engine_name, W, host))
+            ips = self.lookup(host, 'A')
+            if not ips and not self.answers.nxdomain(host):
+                # no A records, the host may be IPv6 only
+                ips = self.lookup(host, 'AAAA')
+            if ips:
+                with self.lock:
+                    self.live_subdomains.append(host)
+                    if self.verbose:
+                        self.print_("%s%s: %s%s" % (R, self.engine_name, W, host))
                 is_valid = True
-                self.live_subdomains.append(host)
         except:
             pass
-        self.lock.release()
         return is_valid
 
+    def validate_hosts(self, hosts):
+        """Resolve the hosts concurrently and return the live ones
+
+        All the workers share one resolver, so the total time is bounded by
+        the slowest query instead of the number of hosts. Answers come from
+        the DNS answer cache shared with subbrute when they are still fresh.
+        """
+        self.answers = cache.answer_cache()
+        self.resolver = dns.resolver.Resolver()
+        self.resolver.nameservers = ['8.8.8.8', '8.8.4.4']
+        self.resolver.timeout = self.DNS_TIMEOUT
+        self.resolver.lifetime = self.DNS_TIMEOUT
+        executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+        futures = [executor.submit(self.check_host, host) for host in hosts]
+        futures_wait(futures, timeout=time_remaining(self.deadline))
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.answers.flush()
+        return [host for host, future in zip(hosts, futures)
+                if future.done() and not future.cancelled() and future.result()]
+
     def req(self, req_method, url, params=None):
         params = params or {}
         headers = dict(self.headers)
         headers['Referer'] = 'https://dnsdumpster.com'
         try:
             if req_method == 'GET':
-                resp = self.session.get(url, headers=headers, timeout=self.timeout)
+                resp = self.session.get(url, headers=headers, timeout=self.get_timeout())
             else:
-                resp = self.session.post(url, data=params, headers=headers, timeout=self.timeout)
+                resp = self.session.post(url, data=params, headers=headers, timeout=self.get_timeout())
         except Exception as e:
             self.print_(e)
             resp = None
@@ -642,17 +801,17 @@ class DNSdumpster(enumratorBaseThreaded):
         return token.strip()
 
     def enumerate(self):
-        self.lock = threading.BoundedSemaphore(value=70)
         resp = self.req('GET', self.base_url)
         token = self.get_csrftoken(resp)
         params = {'csrfmiddlewaretoken': token, 'targetip': self.domain}
         post_resp = self.req('POST', self.base_url, params)
         self.extract_domains(post_resp)
-        for subdomain in self.subdomains:
-            t = threading.Thread(target=self.check_host, args=(subdomain,))
-            t.start()
-            t.join()
-        return self.live_subdomains
+        return self.validate_hosts(self.subdomains)
+
+    def found(self):
+        # only the hosts that were validated before the engine was stopped
+        with self.lock:
+            return list(self.live_subdomains)
 
     def extract_domains(self, resp):
         tbl_regex = re.compile('<a name="hostanchor"><\/a>Host Records.*?<table.*?>(.*?)</table>', re.S)
@@ -666,7 +825,7 @@ class DNSdumpster(enumratorBaseThreaded):
         links = list(set(links_list))
         for link in links:
             subdomain = link.strip()
-            if not subdomain.endswith(self.domain):
+            if not self.in_scope(subdomain):
                 continue
             if subdomain and subdomain not in self.subdomains and subdomain != self.domain:
                 self.subdomains.append(subdomain.strip())
@@ -674,19 +833,19 @@ class DNSdumpster(enumratorBaseThreaded):
 
 
 class Virustotal(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://www.virustotal.com/ui/domains/{domain}/subdomains'
         self.engine_name = "Virustotal"
         self.q = q
-        super(Virustotal, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(Virustotal, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         self.url = self.base_url.format(domain=self.domain)
         return
 
     # the main send_req need to be rewritten
     def send_req(self, url):
         try:
-            resp = self.session.get(url, headers=self.headers, timeout=self.timeout)
+            resp = self.session.get(url, headers=self.headers, timeout=self.get_timeout())
         except Exception as e:
             self.print_(e)
             resp = None
@@ -695,7 +854,7 @@ class Virustotal(enumratorBaseThreaded):
 
     # once the send_req is rewritten we don't need to call this function, the stock one should be ok
     def enumerate(self):
-        while self.url != '':
+        while self.url != '' and not self.deadline_reached():
             resp = self.send_req(self.url)
             resp = json.loads(resp)
             if 'error' in resp:
@@ -714,7 +873,7 @@ class Virustotal(enumratorBaseThreaded):
             for i in resp['data']:
                 if i['type'] == 'domain':
                     subdomain = i['id']
-                    if not subdomain.endswith(self.domain):
+                    if not self.in_scope(subdomain):
                         continue
                     if subdomain not in self.subdomains and subdomain != self.domain:
                         if self.verbose:
@@ -725,17 +884,17 @@ class Virustotal(enumratorBaseThreaded):
 
 
 class ThreatCrowd(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://www.threatcrowd.org/searchApi/v2/domain/report/?domain={domain}'
         self.engine_name = "ThreatCrowd"
         self.q = q
-        super(ThreatCrowd, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(ThreatCrowd, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         return
 
     def req(self, url):
         try:
-            resp = self.session.get(url, headers=self.headers, timeout=self.timeout)
+            resp = self.session.get(url, headers=self.headers, timeout=self.get_timeout())
         except Exception:
             resp = None
 
@@ -752,7 +911,7 @@ class ThreatCrowd(enumratorBaseThreaded):
             links = json.loads(resp)['subdomains']
             for link in links:
                 subdomain = link.strip()
-                if not subdomain.endswith(self.domain):
+                if not self.in_scope(subdomain):
                     continue
                 if subdomain not in self.subdomains and subdomain != self.domain:
                     if self.verbose:
@@ -763,17 +922,17 @@ class ThreatCrowd(enumratorBaseThreaded):
 
 
 class CrtSearch(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://crt.sh/?q=%25.{domain}'
         self.engine_name = "SSL Certificates"
         self.q = q
-        super(CrtSearch, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(CrtSearch, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         return
 
     def req(self, url):
         try:
-            resp = self.session.get(url, headers=self.headers, timeout=self.timeout)
+            resp = self.session.get(url, headers=self.headers, timeout=self.get_timeout())
         except Exception:
             resp = None
 
@@ -799,7 +958,7 @@ class CrtSearch(enumratorBaseThreaded):
                     subdomains.append(link)
 
                 for subdomain in subdomains:
-                    if not subdomain.endswith(self.domain) or '*' in subdomain:
+                    if not self.in_scope(subdomain) or '*' in subdomain:
                         continue
 
                     if '@' in subdomain:
@@ -814,17 +973,17 @@ class CrtSearch(enumratorBaseThreaded):
             pass
 
 class PassiveDNS(enumratorBaseThreaded):
-    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True):
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
         subdomains = subdomains or []
         base_url = 'https://api.sublist3r.com/search.php?domain={domain}'
         self.engine_name = "PassiveDNS"
         self.q = q
-        super(PassiveDNS, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose)
+        super(PassiveDNS, self).__init__(base_url, self.engine_name, domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
         return
 
     def req(self, url):
         try:
-            resp = self.session.get(url, headers=self.headers, timeout=self.timeout)
+            resp = self.session.get(url, headers=self.headers, timeout=self.get_timeout())
         except Exception as e:
             resp = None
 
@@ -852,66 +1011,171 @@ class PassiveDNS(enumratorBaseThreaded):
 
 
 class portscan():
-    def __init__(self, subdomains, ports):
+    """Non-blocking TCP connect scanner
+
+    Every (host, port) pair is an asyncio connect attempt, limited by a
+    global and a per-host number of attempts in flight, so a scan takes
+    roughly one timeout instead of ports x timeout per host. Hosts are
+    resolved through the DNS answer cache shared with subbrute, by at most
+    max_resolvers threads so the event loop never blocks on a lookup.
+    run() returns a dict mapping each host with open ports to the sorted
+    list of those ports.
+    """
+    def __init__(self, subdomains, ports, timeout=2, max_in_flight=500, max_per_host=50, max_resolvers=32, silent=False, deadline=None):
         self.subdomains = subdomains
-        self.ports = ports
-        self.lock = None
-
-    def port_scan(self, host, ports):
-        openports = []
-        self.lock.acquire()
+        self.ports = []
         for port in ports:
             try:
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(2)
-                result = s.connect_ex((host, int(port)))
-                if result == 0:
-                    openports.append(port)
-                s.close()
-            except Exception:
+                self.ports.append(int(port))
+            except (TypeError, ValueError):
                 pass
-        self.lock.release()
-        if len(openports) > 0:
-            print("%s%s%s - %sFound open ports:%s %s%s%s" % (G, host, W, R, W, Y, ', '.join(openports), W))
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.max_per_host = max_per_host
+        self.max_resolvers = max_resolvers
+        self.silent = silent
+        self.deadline = deadline
+        self.results = {}
+        self.lock = None
+        self.resolve_lock = None
+        self.executor = None
+        self.answers = None
+
+    def lookup(self, host):
+        # runs in self.executor: the cache is sqlite and getaddrinfo() blocks
+        addresses = self.answers.get(host, 'A')
+        if addresses:
+            return socket.AF_INET, addresses[0]
+        # no A records may only mean an IPv6 only host, getaddrinfo() finds its address
+        if self.answers.nxdomain(host):
+            return None
+        try:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno == socket.EAI_NONAME:
+                self.answers.put_nxdomain(host)
+            return None
+        except OSError:
+            return None
+        ipv4 = [sockaddr[0] for family, _, _, _, sockaddr in infos if family == socket.AF_INET]
+        if ipv4:
+            # getaddrinfo() does not give the TTL, the cache uses a short default,
+            # and the cached address is the one scanned, whatever the order of infos
+            self.answers.put(host, 'A', ipv4)
+            return socket.AF_INET, ipv4[0]
+        self.answers.put_nodata(host, 'A')
+        family, _, _, _, sockaddr = infos[0]
+        return family, sockaddr[0]
+
+    async def resolve(self, host):
+        # at most max_resolvers lookups at a time, each one owns a thread of
+        # the executor until it returns, so the timeout only counts the lookup
+        # itself and not the time spent waiting for a free thread
+        await self.resolve_lock.acquire()
+        loop = asyncio.get_running_loop()
+        lookup = loop.run_in_executor(self.executor, self.lookup, host)
+        lookup.add_done_callback(lambda future: self.resolve_lock.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(lookup), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def connect(self, family, address, port, host_lock):
+        # the host slot first: a host waiting for its own ports must not hold
+        # global slots that other hosts could use
+        async with host_lock, self.lock:
+            timeout = self.timeout
+            remaining = time_remaining(self.deadline)
+            if remaining is not None:
+                if remaining == 0:
+                    return False
+                timeout = min(timeout, remaining)
+            loop = asyncio.get_running_loop()
+            s = socket.socket(family, socket.SOCK_STREAM)
+            s.setblocking(False)
+            try:
+                await asyncio.wait_for(loop.sock_connect(s, (address, port)), timeout)
+                return True
+            except (OSError, asyncio.TimeoutError):
+                return False
+            finally:
+                s.close()
 
-    def run(self):
-        self.lock = threading.BoundedSemaphore(value=20)
-        for subdomain in self.subdomains:
-            t = threading.Thread(target=self.port_scan, args=(subdomain, self.ports))
-            t.start()
+    async def port_scan(self, host, ports):
+        resolved = await self.resolve(host)
+        if resolved is None:
+            return []
+        family, address = resolved
+        host_lock = asyncio.Semaphore(self.max_per_host)
+        attempts = [self.connect(family, address, port, host_lock) for port in ports]
+        results = await asyncio.gather(*attempts)
+        openports = sorted(port for port, is_open in zip(ports, results) if is_open)
+        if len(openports) > 0:
+            self.results[host] = openports
+            if not self.silent:
+                print("%s%s%s - %sFound open ports:%s %s%s%s" % (G, host, W, R, W, Y, ', '.join(str(port) for port in openports), W))
+        return openports
 
+    async def scan(self):
+        self.lock = asyncio.Semaphore(self.max_in_flight)
+        self.resolve_lock = asyncio.Semaphore(self.max_resolvers)
+        await asyncio.gather(*[self.port_scan(subdomain, self.ports) for subdomain in self.subdomains])
+        return self.results
 
-def main(domain, threads, savefile, ports, silent, verbose, enable_bruteforce, engines):
-    bruteforce_list = set()
-    search_list = set()
+    def run(self):
+        self.results = {}
+        self.answers = cache.answer_cache()
+        self.executor = ThreadPoolExecutor(self.max_resolvers)
+        try:
+            return asyncio.run(self.scan())
+        finally:
+            # lookups that timed out are left to finish on their own
+            self.executor.shutdown(wait=False)
+            self.answers.close()
 
-    if is_windows:
-        subdomains_queue = list()
-    else:
-        subdomains_queue = multiprocessing.Manager().list()
 
-    # Check Bruteforce Status
-    if enable_bruteforce or enable_bruteforce is None:
-        enable_bruteforce = True
+class enumratorBatch(multiprocessing.Process):
+    """Run one engine over a list of domains in a single process
 
-    # Validate domain
-    domain_check = re.compile("^(http|https)?[a-zA-Z0-9]+([\-\.]{1}[a-zA-Z0-9]+)*\.[a-zA-Z]{2,}$")
-    if not domain_check.match(domain):
-        if not silent:
-            print(R + "Error: Please enter a valid domain" + W)
-        return []
+    The domains are enumerated one after the other on the same HTTP
+    session, results are put in the queue as (domain, subdomain) pairs as
+    soon as each domain is done, or when the batch is terminated.
+    """
+    def __init__(self, enum, domains, q, silent=False, verbose=True, deadline=None):
+        multiprocessing.Process.__init__(self)
+        self.enum = enum
+        self.engine_name = enum.__name__
+        self.domains = domains
+        self.q = q
+        self.silent = silent
+        self.verbose = verbose
+        self.deadline = deadline
 
-    if not domain.startswith('http://') or not domain.startswith('https://'):
-        domain = 'http://' + domain
+    def run(self):
+        stop_on_terminate()
+        session = requests.Session()
+        for domain in self.domains:
+            if time_remaining(self.deadline) == 0:
+                break
+            engine = self.enum(domain, [], q=self.q, silent=self.silent, verbose=self.verbose, deadline=self.deadline)
+            engine.session = session
+            subdomains = None
+            try:
+                subdomains = engine.enumerate()
+            except Exception:
+                # one failing domain must not cost the results of the rest of the batch
+                pass
+            finally:
+                for subdomain in engine.found() if subdomains is None else subdomains:
+                    self.q.append((engine.domain, subdomain))
 
-    parsed_domain = urlparse.urlparse(domain)
 
-    if not silent:
-        print(B + "[-] Enumerating subdomains now for %s" % parsed_domain.netloc + W)
+def valid_domain(domain):
+    domain_check = re.compile("^(http|https)?[a-zA-Z0-9]+([\-\.]{1}[a-zA-Z0-9]+)*\.[a-zA-Z]{2,}$")
+    return domain_check.match(domain)
 
-    if verbose and not silent:
-        print(Y + "[-] verbosity is enabled, will show the subdomains results in realtime" + W)
 
+def choose_engines(engines):
     supported_engines = {'baidu': BaiduEnum,
                          'yahoo': YahooEnum,
                          'google': GoogleEnum,
@@ -938,34 +1202,103 @@ def main(domain, threads, savefile, ports, silent, verbose, enable_bruteforce, e
         for engine in engines:
             if engine.lower() in supported_engines:
                 chosenEnums.append(supported_engines[engine.lower()])
+    return chosenEnums
 
-    # Start the engines enumeration
-    enums = [enum(domain, [], q=subdomains_queue, silent=silent, verbose=verbose) for enum in chosenEnums]
+
+def stop_on_terminate():
+    """Turn the SIGTERM of Process.terminate() into SystemExit
+
+    The engines still run their finally blocks and put what they found so
+    far in the queue when they are stopped after the grace period.
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+
+
+def run_engines(enums, silent, deadline):
     for enum in enums:
         enum.start()
     for enum in enums:
-        enum.join()
+        remaining = time_remaining(deadline)
+        enum.join(None if remaining is None else remaining + ENGINE_GRACE_PERIOD)
 
-    subdomains = set(subdomains_queue)
-    for subdomain in subdomains:
-        search_list.add(subdomain)
+    # engines stop cooperatively at the deadline, the ones stuck in a request
+    # are terminated and hand over what they found so far
+    stopped = [enum for enum in enums if enum.is_alive()]
+    for enum in stopped:
+        if not silent:
+            print(R + "[!] Error: %s did not finish in time, keeping the results found so far" % enum.engine_name + W)
+        enum.terminate()
+    for enum in stopped:
+        enum.join(ENGINE_GRACE_PERIOD)
+        if enum.is_alive():
+            enum.kill()
+            enum.join()
 
-    if enable_bruteforce:
+
+def bruteforce(domain, threads, search_list, silent, verbose, deadline, subs=None, resolvers=None, resolver_verdicts=None, attempts=None):
+    """Run subbrute on the domain, subs and resolvers default to the bundled lists
+
+    The names tried are appended to attempts, for the learned wordlist.
+    """
+    if time_remaining(deadline) == 0:
         if not silent:
-            print(G + "[-] Starting bruteforce module now using subbrute.." + W)
-        record_type = False
-        path_to_file = os.path.dirname(os.path.realpath(__file__))
+            print(R + "[!] Error: Time budget exhausted, skipping the bruteforce module" + W)
+        return set()
+
+    if not silent:
+        print(G + "[-] Starting bruteforce module now using subbrute.." + W)
+    record_type = False
+    path_to_file = os.path.dirname(os.path.realpath(__file__))
+    if subs is None:
         subs = os.path.join(path_to_file, 'subbrute', 'names.txt')
+    if resolvers is None:
         resolvers = os.path.join(path_to_file, 'subbrute', 'resolvers.txt')
-        process_count = threads
-        output = False
-        json_output = False
-        bruteforce_list = subbrute.print_target(parsed_domain.netloc, record_type, subs, resolvers, process_count, output, json_output, search_list, verbose)
+    process_count = threads
+    output = False
+    json_output = False
+    return subbrute.print_target(domain, record_type, subs, resolvers, process_count, output, json_output, search_list, verbose, deadline=deadline, resolver_verdicts=resolver_verdicts, tried=attempts)
 
-    subdomains = search_list.union(bruteforce_list)
 
+def permute(domain, limit, threads, found, silent, verbose, deadline, tried=None, resolvers=None, resolver_verdicts=None, attempts=None):
+    """Resolve permutations of the subdomains found (dev-api, api2...)
+
+    At most limit candidates are generated, the most promising first.
+    tried is the wordlist the bruteforce module already went through, its
+    names are not generated again. The candidates resolved are appended to
+    attempts, like bruteforce().
+    """
+    if time_remaining(deadline) == 0:
+        if not silent:
+            print(R + "[!] Error: Time budget exhausted, skipping the permutations" + W)
+        return set()
+
+    if not silent:
+        print(G + "[-] Resolving up to %s permutations of the subdomains found.." % limit + W)
+    path_to_file = os.path.dirname(os.path.realpath(__file__))
+    if resolvers is None:
+        resolvers = os.path.join(path_to_file, 'subbrute', 'resolvers.txt')
+    seen = wordlist.hostname_set()
+    if tried is not None:
+        for hostname in wordlist.candidates(domain, wordlist.read_names(tried), seen):
+            pass
+    candidates = permutations.permutations(found, domain, limit=limit, seen=seen)
+    # subbrute always resolves the domain itself, it is not a permutation
+    known = set(found)
+    known.add(domain)
+    return subbrute.print_target(domain, False, candidates, resolvers, threads, False, False, known, verbose, deadline=deadline, resolver_verdicts=resolver_verdicts, tried=attempts)
+
+
+def report(subdomains, savefile, ports, silent, deadline):
+    """Sort, save, print and port scan the subdomains found for one domain
+
+    Returns the sorted subdomains and the dict of the open ports found by
+    the port scan (see portscan.run()), empty without a port scan.
+    """
+    open_ports = {}
     if subdomains:
-        subdomains = sorted(subdomains, key=subdomain_sorting_key)
+        # same order as subdomain_sorting_key, without building a key per name;
+        # the names that are not hostnames (or another spelling of one) follow
+        subdomains = hostset.sorted_hostnames(subdomains, www_first=True)
 
         if savefile:
             write_file(savefile, subdomains)
@@ -973,17 +1306,172 @@ def main(domain, threads, savefile, ports, silent, verbose, enable_bruteforce, e
         if not silent:
             print(Y + "[-] Total Unique Subdomains Found: %s" % len(subdomains) + W)
 
+        if ports and time_remaining(deadline) == 0:
+            if not silent:
+                print(R + "[!] Error: Time budget exhausted, skipping the port scan" + W)
+            ports = None
+
         if ports:
             if not silent:
                 print(G + "[-] Start port scan now for the following ports: %s%s" % (Y, ports) + W)
             ports = ports.split(',')
-            pscan = portscan(subdomains, ports)
-            pscan.run()
+            pscan = portscan(subdomains, ports, silent=silent, deadline=deadline)
+            open_ports = pscan.run()
 
         elif not silent:
             for subdomain in subdomains:
                 print(G + subdomain + W)
-    return subdomains
+    return subdomains, open_ports
+
+
+def main(domain, threads, savefile, ports, silent, verbose, enable_bruteforce, engines, deadline=None, permutations=0, open_ports=False):
+    """Enumerate the subdomains of a domain, or of a list of domains (see main_batch())
+
+    Returns the subdomains found, or with open_ports the subdomains and the
+    dict mapping each subdomain with open ports to the sorted list of those
+    ports.
+    """
+    if isinstance(domain, (list, tuple, set)):
+        return main_batch(domain, threads, savefile, ports, silent, verbose, enable_bruteforce, engines, deadline, permutations, open_ports)
+
+    bruteforce_list = set()
+    search_list = set()
+
+    if is_windows:
+        subdomains_queue = list()
+    else:
+        subdomains_queue = multiprocessing.Manager().list()
+
+    # Check Bruteforce Status
+    if enable_bruteforce or enable_bruteforce is None:
+        enable_bruteforce = True
+
+    # Validate domain
+    if not valid_domain(domain):
+        if not silent:
+            print(R + "Error: Please enter a valid domain" + W)
+        return ([], {}) if open_ports else []
+
+    if not domain.startswith('http://') or not domain.startswith('https://'):
+        domain = 'http://' + domain
+
+    parsed_domain = urlparse.urlparse(domain)
+
+    if not silent:
+        print(B + "[-] Enumerating subdomains now for %s" % parsed_domain.netloc + W)
+
+    if verbose and not silent:
+        print(Y + "[-] verbosity is enabled, will show the subdomains results in realtime" + W)
+
+    chosenEnums = choose_engines(engines)
+
+    # Start the engines enumeration
+    enums = [enum(domain, [], q=subdomains_queue, silent=silent, verbose=verbose, deadline=deadline) for enum in chosenEnums]
+    run_engines(enums, silent, deadline)
+
+    subdomains = set(subdomains_queue)
+    for subdomain in subdomains:
+        search_list.add(subdomain)
+
+    # names resolved by subbrute, learned once with everything found
+    attempts = []
+    if enable_bruteforce:
+        bruteforce_list = bruteforce(parsed_domain.netloc, threads, search_list, silent, verbose, deadline, attempts=attempts)
+
+    subdomains = search_list.union(bruteforce_list)
+    if permutations:
+        tried = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'subbrute', 'names.txt') if enable_bruteforce else None
+        subdomains |= permute(parsed_domain.netloc, permutations, threads, subdomains, silent, verbose, deadline, tried, attempts=attempts)
+    # the next bruteforce runs try the names with the best hit rate first
+    wordlist.learned_index().learn(parsed_domain.netloc, subdomains, attempts)
+    subdomains, ports_found = report(subdomains, savefile, ports, silent, deadline)
+    return (subdomains, ports_found) if open_ports else subdomains
+
+
+def main_batch(domains, threads, savefile, ports, silent, verbose, enable_bruteforce, engines, deadline=None, permutations=0, open_ports=False):
+    """Enumerate a list of domains as one batch
+
+    Every engine runs in a single process for the whole batch, reusing its
+    HTTP session, and starts at a different offset of the domain list so
+    the engines work on different domains at the same time. The bruteforce
+    runs share the wordlist, the resolvers list and the resolvers verdicts.
+    savefile is a directory in which a <domain>.txt file is written for
+    every domain. Returns a dict mapping each domain to its subdomains, or
+    with open_ports to its subdomains and the dict of their open ports.
+    """
+    results = {}
+
+    if is_windows:
+        subdomains_queue = list()
+    else:
+        subdomains_queue = multiprocessing.Manager().list()
+
+    # Check Bruteforce Status
+    if enable_bruteforce or enable_bruteforce is None:
+        enable_bruteforce = True
+
+    netlocs = []
+    for domain in domains:
+        domain = domain.strip()
+        if not valid_domain(domain):
+            if not silent and domain:
+                print(R + "Error: Skipping invalid domain %s" % domain + W)
+            continue
+        netloc = urlparse.urlparse('http://' + domain).netloc
+        if netloc not in netlocs:
+            netlocs.append(netloc)
+    if not netlocs:
+        if not silent:
+            print(R + "Error: Please enter a valid domain" + W)
+        return results
+
+    if not silent:
+        print(B + "[-] Enumerating subdomains now for %s domains" % len(netlocs) + W)
+
+    if verbose and not silent:
+        print(Y + "[-] verbosity is enabled, will show the subdomains results in realtime" + W)
+
+    # Start the engines enumeration, engine i starts with domain i
+    urls = ['http://' + netloc for netloc in netlocs]
+    enums = []
+    for i, enum in enumerate(choose_engines(engines)):
+        offset = i % len(urls)
+        enums.append(enumratorBatch(enum, urls[offset:] + urls[:offset], subdomains_queue, silent=silent, verbose=verbose, deadline=deadline))
+    run_engines(enums, silent, deadline)
+
+    search_lists = dict((netloc, set()) for netloc in netlocs)
+    for netloc, subdomain in subdomains_queue:
+        search_lists[netloc].add(subdomain)
+
+    subs = None
+    if enable_bruteforce or permutations:
+        path_to_file = os.path.dirname(os.path.realpath(__file__))
+        if enable_bruteforce:
+            subs = subbrute.check_open(os.path.join(path_to_file, 'subbrute', 'names.txt'))
+        resolvers = subbrute.check_open(os.path.join(path_to_file, 'subbrute', 'resolvers.txt'))
+        if is_windows:
+            resolver_verdicts = dict()
+        else:
+            resolver_verdicts = multiprocessing.Manager().dict()
+
+    if savefile and not os.path.isdir(savefile):
+        os.makedirs(savefile)
+
+    for netloc in netlocs:
+        if not silent:
+            print(B + "[-] Results for %s" % netloc + W)
+        bruteforce_list = set()
+        attempts = []
+        if enable_bruteforce:
+            bruteforce_list = bruteforce(netloc, threads, search_lists[netloc], silent, verbose, deadline, subs, resolvers, resolver_verdicts, attempts)
+        subdomains = search_lists[netloc].union(bruteforce_list)
+        if permutations:
+            subdomains |= permute(netloc, permutations, threads, subdomains, silent, verbose, deadline, subs, resolvers, resolver_verdicts, attempts)
+        wordlist.learned_index().learn(netloc, subdomains, attempts)
+        domain_savefile = os.path.join(savefile, netloc + '.txt') if savefile else None
+        subdomains, ports_found = report(subdomains, domain_savefile, ports, silent, deadline)
+        results[netloc] = (subdomains, ports_found) if open_ports else subdomains
+    return results
 
 
 def interactive():
@@ -995,12 +1483,17 @@ def interactive():
     enable_bruteforce = args.bruteforce
     verbose = args.verbose
     engines = args.engines
+    deadline = time.time() + args.max_time if args.max_time else None
+    permutations = args.permutations
+    if args.list:
+        with open(args.list, 'rt') as f:
+            domain = [line.strip() for line in f if line.strip()]
     if verbose or verbose is None:
         verbose = True
     if args.no_color:
         no_color()
     banner()
-    res = main(domain, threads, savefile, ports, silent=False, verbose=verbose, enable_bruteforce=enable_bruteforce, engines=engines)
+    res = main(domain, threads, savefile, ports, silent=False, verbose=verbose, enable_bruteforce=enable_bruteforce, engines=engines, deadline=deadline, permutations=permutations)
 
 if __name__ == "__main__":
     interactive()
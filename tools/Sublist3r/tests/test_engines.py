@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sublist3r
+
+
+class StuckEnum(sublist3r.enumratorBaseThreaded):
+    """Finds two subdomains, then hangs like an engine stuck in a request"""
+
+    def __init__(self, domain, subdomains=None, q=None, silent=False, verbose=True, deadline=None):
+        super(StuckEnum, self).__init__("", "Stuck", domain, subdomains, q=q, silent=silent, verbose=verbose, deadline=deadline)
+
+    def enumerate(self):
+        self.subdomains.append("a." + self.domain)
+        self.subdomains.append("b." + self.domain)
+        time.sleep(60)
+        return self.subdomains
+
+
+@pytest.fixture(autouse=True)
+def short_grace_period(monkeypatch):
+    monkeypatch.setattr(sublist3r, "ENGINE_GRACE_PERIOD", 0.5)
+
+
+def test_terminated_engine_keeps_its_results():
+    q = multiprocessing.Manager().list()
+    enum = StuckEnum("http://example.com", q=q, silent=True)
+    start = time.time()
+    sublist3r.run_engines([enum], True, start + 0.5)
+    assert time.time() - start < 5
+    assert not enum.is_alive()
+    assert sorted(q) == ["a.example.com", "b.example.com"]
+
+
+def test_terminated_batch_keeps_the_current_domain():
+    q = multiprocessing.Manager().list()
+    batch = sublist3r.enumratorBatch(StuckEnum, ["http://example.com", "http://example.org"], q, silent=True)
+    start = time.time()
+    sublist3r.run_engines([batch], True, start + 0.5)
+    assert time.time() - start < 5
+    assert sorted(q) == [("example.com", "a.example.com"), ("example.com", "b.example.com")]
@@ -0,0 +1,97 @@
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sublist3r
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # the scanner resolves through the DNS answer cache, keep it out of ~/.cache
+    monkeypatch.setenv("SUBBRUTE_CACHE_DIR", str(tmp_path))
+
+
+def listener(backlog=8):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    s.listen(backlog)
+    return s
+
+
+def closed_port():
+    s = listener()
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def filtered_port(held):
+    # a listener whose accept queue is full drops the SYNs, so a connect to
+    # it hangs until the timeout like a filtered port
+    s = listener(0)
+    port = s.getsockname()[1]
+    c = socket.create_connection(("127.0.0.1", port))
+    held.extend((s, c))
+    return port
+
+
+def test_reports_exactly_the_open_ports():
+    servers = [listener(), listener()]
+    try:
+        open_ports = sorted(s.getsockname()[1] for s in servers)
+        ports = open_ports + [closed_port(), closed_port()]
+        results = sublist3r.portscan(["127.0.0.1"], ports, timeout=1, silent=True).run()
+        assert results == {"127.0.0.1": open_ports}
+    finally:
+        for s in servers:
+            s.close()
+
+
+def test_no_open_ports_no_entry():
+    results = sublist3r.portscan(["127.0.0.1"], [closed_port()], timeout=1, silent=True).run()
+    assert results == {}
+
+
+def test_unresponsive_ports_take_one_timeout():
+    held = []
+    try:
+        ports = [filtered_port(held) for _ in range(6)]
+        timeout = 0.5
+        start = time.time()
+        results = sublist3r.portscan(["127.0.0.1"], ports, timeout=timeout, silent=True).run()
+        elapsed = time.time() - start
+        assert results == {}
+        # the ports are tried at the same time, not one timeout after the other
+        assert timeout * 0.8 <= elapsed < timeout * 3
+    finally:
+        for s in held:
+            s.close()
+
+
+def test_deadline_stops_the_scan():
+    held = []
+    try:
+        ports = [filtered_port(held) for _ in range(3)]
+        start = time.time()
+        results = sublist3r.portscan(["127.0.0.1"], ports, timeout=10, silent=True, deadline=start + 0.5).run()
+        assert results == {}
+        assert time.time() - start < 3
+    finally:
+        for s in held:
+            s.close()
+
+
+def test_report_returns_the_open_ports():
+    server = listener()
+    try:
+        port = server.getsockname()[1]
+        subdomains, open_ports = sublist3r.report(["127.0.0.1"], None, "%d,%d" % (port, closed_port()), True, None)
+        assert subdomains == ["127.0.0.1"]
+        assert open_ports == {"127.0.0.1": [port]}
+    finally:
+        server.close()